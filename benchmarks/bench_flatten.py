@@ -0,0 +1,85 @@
+"""
+Benchmark: DocumentFlattener vs. the previous pd.json_normalize + per-column apply path.
+
+Usage:
+    python benchmarks/bench_flatten.py [--docs 100000] [--batch 5000]
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+from bson import ObjectId
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from converter.mongo import DocumentFlattener  # noqa: E402
+from converter.sql import sanitize_sql_name  # noqa: E402
+
+
+def make_docs(count):
+    """Builds documents shaped like a typical application collection."""
+    now = datetime.datetime(2024, 1, 1)
+    docs = []
+    for i in range(count):
+        doc = {
+            '_id': ObjectId(),
+            'name': f"user {i}",
+            'age': i % 90,
+            'score': i * 0.5,
+            'created': now + datetime.timedelta(seconds=i),
+            'address': {'city': f"city {i % 100}", 'zip': f"{i % 99999:05d}", 'geo': {'lat': 1.5, 'lng': -2.5}},
+            'tags': ['a', 'b', str(i % 7)],
+            'orders': [{'id': i, 'total': 9.99, 'at': now}],
+        }
+        if i % 10 == 0:
+            doc['referrer'] = {'id': ObjectId(), 'channel': 'ads'}
+        docs.append(doc)
+    return docs
+
+
+def legacy_flatten(docs):
+    """The flattening previously done inline by the MongoDB -> SQL workers."""
+    def json_converter(o):
+        if hasattr(o, 'isoformat'):
+            return o.isoformat()
+        raise TypeError(f"Object of type {o.__class__.__name__} is not JSON serializable")
+
+    df = pd.json_normalize(docs, sep='_')
+    if '_id' in df.columns:
+        df['_id'] = df['_id'].astype(str)
+    df.rename(columns={col: sanitize_sql_name(col) for col in df.columns}, inplace=True)
+    for col in df.columns:
+        if df[col].apply(lambda x: isinstance(x, list)).any():
+            df[col] = df[col].apply(lambda x: json.dumps(x, default=json_converter) if isinstance(x, list) else x)
+            df[col] = df[col].apply(lambda x: json.dumps(x) if isinstance(x, list) else x)
+    return df
+
+
+def run(label, func, batches):
+    start = time.perf_counter()
+    rows = sum(len(func(batch)) for batch in batches)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {elapsed:8.2f}s  {rows / elapsed:12,.0f} docs/s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--docs', type=int, default=100000, help="number of documents to flatten")
+    parser.add_argument('--batch', type=int, default=5000, help="documents per batch")
+    args = parser.parse_args()
+
+    docs = make_docs(args.docs)
+    batches = [docs[i:i + args.batch] for i in range(0, len(docs), args.batch)]
+    print(f"Flattening {args.docs} documents in batches of {args.batch}:")
+    legacy = run("json_normalize + apply", legacy_flatten, batches)
+    flattener = DocumentFlattener()
+    single_pass = run("DocumentFlattener", flattener.flatten, batches)
+    print(f"Speed-up: {legacy / single_pass:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
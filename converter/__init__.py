@@ -0,0 +1,11 @@
+"""
+Conversion engine shared by the desktop app (main.py) and the command line
+(`python -m converter`). Nothing in this package imports tkinter or customtkinter.
+"""
+from .engine import (DEFAULT_PARALLEL_WORKERS, MAX_PARALLEL_WORKERS, Reporter, TransferSummary, export_mongo_to_csv,
+                     export_mongo_to_file, export_sql_to_csv, export_sql_to_file, import_files_to_mongo,
+                     import_files_to_sql, mongo_db_to_mongo, mongo_db_to_sql, mongo_to_mongo, mongo_to_sql, sql_db_to_mongo,
+                     sql_db_to_sql, sql_to_mongo, sql_to_sql, sync_mongo_to_sql, sync_sql_to_mongo)
+from .export import EXPORT_FORMATS, export_format
+from .imports import IMPORT_FORMATS, import_format
+from .sql import SQLSettings, sql_connections
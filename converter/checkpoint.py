@@ -0,0 +1,68 @@
+"""Checkpoints of resumable transfers, kept in a small JSON file."""
+import datetime
+import json
+import os
+import threading
+
+from bson import json_util
+
+DEFAULT_CHECKPOINT_FILE = '.converter_checkpoints.json'
+DEFAULT_SYNC_STATE_FILE = '.converter_sync_state.json' # Watermarks of the incremental syncs
+
+
+class CheckpointStore:
+    """
+    Remembers the last committed key of each unfinished transfer, so a transfer
+    that failed or was stopped can continue after it. Incremental syncs keep
+    their watermark, the last synced change, the same way. The file is replaced
+    atomically on every save, and keys are stored as MongoDB Extended JSON so
+    ObjectIds and dates come back with their type.
+    """
+
+    def __init__(self, path=DEFAULT_CHECKPOINT_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _store(self, checkpoints):
+        if not checkpoints:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(checkpoints, f, indent=2)
+        os.replace(temp_path, self.path)
+
+    def get(self, job_id):
+        """Returns (last_key, rows) of an unfinished transfer, or None."""
+        with self._lock:
+            entry = self._load().get(job_id)
+        if entry is None:
+            return None
+        return json_util.loads(entry['last_key']), entry['rows']
+
+    def save(self, job_id, last_key, rows):
+        """Records that every row up to `last_key` (`rows` in total) has been committed."""
+        try:
+            encoded_key = json_util.dumps(last_key)
+        except TypeError: # e.g. a Decimal sync watermark, which the next sync compares as text
+            encoded_key = json_util.dumps(str(last_key))
+        with self._lock:
+            checkpoints = self._load()
+            checkpoints[job_id] = {'last_key': encoded_key, 'rows': rows,
+                                   'saved_at': datetime.datetime.now().isoformat(timespec='seconds')}
+            self._store(checkpoints)
+
+    def clear(self, job_id):
+        """Forgets a transfer, once it has finished or is started over."""
+        with self._lock:
+            checkpoints = self._load()
+            if checkpoints.pop(job_id, None) is not None:
+                self._store(checkpoints)
@@ -0,0 +1,385 @@
+"""
+Command-line entry point: runs the conversions on headless machines, without Tk.
+
+    python -m converter sql-to-mongo --sql-type postgresql --host db1 --dbname shop --user etl --table orders
+    python -m converter mongo-db-to-sql --sql-type sqlite --output nightly.db --workers 8 --overwrite
+    python -m converter sync-sql-to-mongo --sql-type mysql --dbname shop --table orders --watermark updated_at
+    python -m converter sql-db-to-sql --sql-type mysql --dbname shop --target-sql-type postgresql --target-dbname shop
+    python -m converter mongo-db-to-mongo --mongo-uri mongodb://staging:27017/ --mongo-db shop --target-mongo-uri mongodb://prod:27017/
+    python -m converter run nightly.json
+
+SQL passwords can be passed with --password or the CONVERTER_SQL_PASSWORD
+environment variable (--target-password or CONVERTER_TARGET_SQL_PASSWORD for the
+target of a SQL-to-SQL copy). A job file is a JSON object with shared "sql" and "mongo"
+settings and a list of "jobs"; each job names an `operation` and its options,
+and may override the shared settings:
+
+    {
+      "sql": {"sql_type": "PostgreSQL", "host": "db1", "dbname": "shop", "user": "etl", "password_env": "SHOP_PW"},
+      "mongo": {"uri": "mongodb://localhost:27017/", "db": "shop"},
+      "overwrite": true,
+      "jobs": [
+        {"operation": "sql-db-to-mongo", "workers": 8},
+        {"operation": "export-mongo", "collection": "orders", "output": "orders.csv.gz"},
+        {"operation": "export-sql", "table": "order_lines", "output": "order_lines.parquet"},
+        {"operation": "sql-db-to-sql", "target_sql": {"sql_type": "SQLite", "sqlite_path": "shop_copy.db"}}
+      ]
+    }
+
+An unfinished transfer continues from its checkpoint unless --restart ("resume":
+false in a job file) is given; --overwrite only decides whether existing
+targets are replaced, so a resumed run doesn't need it.
+
+The exit status is 0 when every job succeeded and 1 otherwise.
+"""
+import argparse
+import json
+import os
+import sys
+
+from . import engine
+from .checkpoint import DEFAULT_CHECKPOINT_FILE, DEFAULT_SYNC_STATE_FILE
+from .engine import Reporter, TransferSummary
+from .mongo import connect_mongo
+from .sql import SQL_TYPES, SQLSettings, sql_connections
+
+DEFAULT_MONGO_URI = "mongodb://localhost:27017/"
+DEFAULT_MONGO_DB = "converted_db"
+PASSWORD_ENV = "CONVERTER_SQL_PASSWORD"
+TARGET_PASSWORD_ENV = "CONVERTER_TARGET_SQL_PASSWORD"
+
+# name -> (operation, reads/writes SQL, reads/writes MongoDB)
+OPERATIONS = {
+    'sql-to-mongo': (engine.sql_to_mongo, True, True),
+    'sql-db-to-mongo': (engine.sql_db_to_mongo, True, True),
+    'mongo-to-sql': (engine.mongo_to_sql, True, True),
+    'mongo-db-to-sql': (engine.mongo_db_to_sql, True, True),
+    'sync-sql-to-mongo': (engine.sync_sql_to_mongo, True, True),
+    'sync-mongo-to-sql': (engine.sync_mongo_to_sql, True, True),
+    'export-sql': (engine.export_sql_to_file, True, False),
+    'export-mongo': (engine.export_mongo_to_file, False, True),
+    'import-to-mongo': (engine.import_files_to_mongo, False, True),
+    'import-to-sql': (engine.import_files_to_sql, True, False),
+    'sql-to-sql': (engine.sql_to_sql, True, False),
+    'sql-db-to-sql': (engine.sql_db_to_sql, True, False),
+    'mongo-to-mongo': (engine.mongo_to_mongo, False, True),
+    'mongo-db-to-mongo': (engine.mongo_db_to_mongo, False, True),
+    'export-sql-csv': (engine.export_sql_to_file, True, False), # Former names of the two exports
+    'export-mongo-csv': (engine.export_mongo_to_file, False, True),
+}
+TARGET_SQL_OPERATIONS = ('sql-to-sql', 'sql-db-to-sql') # Also write to a second SQL database, the "target_sql" settings
+TARGET_MONGO_OPERATIONS = ('mongo-to-mongo', 'mongo-db-to-mongo') # Write to a second MongoDB database, the "target_mongo" settings
+
+SQL_TYPE_ALIASES = {sql_type.lower().replace(' ', ''): sql_type for sql_type in SQL_TYPES}
+SQL_TYPE_ALIASES.update({'postgres': "PostgreSQL", 'mssql': "SQL Server"})
+
+
+class ConsoleReporter(Reporter):
+    """Logs to stderr and adds a progress line every 10%."""
+
+    def __init__(self, assume_yes=False, stream=None, resume=None):
+        super().__init__(assume_yes=assume_yes, stream=stream, resume=resume)
+        self._logged_step = 0
+
+    def progress(self, percent):
+        step = int(percent // 10)
+        if step > self._logged_step:
+            self._logged_step = step
+            self.log(f"Progress: {step * 10}%")
+
+    def notify(self, title, message):
+        self.log(f"{title}: {' '.join(message.split())}")
+
+
+def sql_type_name(value):
+    """Maps a case-insensitive DB type name (e.g. 'postgres', 'sqlserver') to its canonical name."""
+    sql_type = SQL_TYPE_ALIASES.get(str(value).lower().replace(' ', '').replace('_', ''))
+    if sql_type is None:
+        raise ValueError(f"Unsupported SQL type '{value}'. Choose one of: {', '.join(SQL_TYPES)}.")
+    return sql_type
+
+
+def _sql_settings(options):
+    options = dict(options)
+    password_env = options.pop('password_env', None)
+    if password_env:
+        options['password'] = os.environ.get(password_env, '')
+    options['sql_type'] = sql_type_name(options.get('sql_type', ''))
+    return SQLSettings(**options)
+
+
+def run_job(job, reporter, mongo_clients=None):
+    """
+    Runs one job: a dict with an `operation` name, its "sql"/"mongo" connection
+    settings and the keyword options of the operation. MongoClients are reused
+    across jobs through `mongo_clients` (URI -> client), SQL connections through
+    the shared pool of each database. Returns the operation's result.
+    """
+    job = dict(job)
+    operation = job.pop('operation', None)
+    if operation not in OPERATIONS:
+        raise ValueError(f"Unknown operation '{operation}'. Choose one of: {', '.join(OPERATIONS)}.")
+    function, uses_sql, uses_mongo = OPERATIONS[operation]
+    sql_options = job.pop('sql', None)
+    target_sql_options = job.pop('target_sql', None)
+    target_mongo_options = job.pop('target_mongo', None)
+    mongo_options = job.pop('mongo', None) or {}
+    job.pop('overwrite', None) # Answered by the reporter
+    job.pop('resume', None)
+    if isinstance(job.get('fields'), str):
+        job['fields'] = [f.strip() for f in job['fields'].split(',') if f.strip()]
+    if isinstance(job.get('paths'), str):
+        job['paths'] = [job['paths']]
+
+    if uses_sql:
+        if not sql_options:
+            raise ValueError(f"'{operation}' needs SQL connection settings.")
+        job['sql'] = _sql_settings(sql_options)
+    if operation in TARGET_SQL_OPERATIONS:
+        if not target_sql_options:
+            raise ValueError(f"'{operation}' needs target SQL connection settings.")
+        job['target'] = _sql_settings(target_sql_options)
+    if mongo_clients is None:
+        mongo_clients = {}
+
+    def mongo_database(uri, db):
+        if uri not in mongo_clients:
+            mongo_clients[uri] = connect_mongo(uri)
+        return mongo_clients[uri][db]
+
+    if uses_mongo:
+        job['mongo_db'] = mongo_database(mongo_options.get('uri', DEFAULT_MONGO_URI), mongo_options.get('db', DEFAULT_MONGO_DB))
+    if operation in TARGET_MONGO_OPERATIONS:
+        if not target_mongo_options or not target_mongo_options.get('uri'):
+            raise ValueError(f"'{operation}' needs the URI of the target MongoDB server.")
+        job['target_db'] = mongo_database(target_mongo_options['uri'], target_mongo_options.get('db') or job['mongo_db'].name)
+    return function(reporter=reporter, **job)
+
+
+def run_jobs(jobs, defaults=None):
+    """Runs the jobs one after the other, logging failures instead of stopping. Returns the exit status."""
+    defaults = defaults or {}
+    mongo_clients = {}
+    status = 0
+    try:
+        for number, job in enumerate(jobs, start=1):
+            job = {**defaults, **job}
+            reporter = ConsoleReporter(assume_yes=bool(job.get('overwrite')), resume=job.get('resume', True))
+            operation = job.get('operation')
+            if len(jobs) > 1:
+                reporter.log(f"--- Job {number}/{len(jobs)}: {operation} ---")
+            try:
+                result = run_job(job, reporter, mongo_clients)
+            except Exception as e:
+                reporter.log(f"ERROR during {operation}: {e}")
+                status = 1
+                continue
+            if isinstance(result, TransferSummary) and result.failed:
+                reporter.log(f"ERROR: {len(result.failed)} failed: {', '.join(result.failed)}")
+                status = 1
+    finally:
+        for client in mongo_clients.values():
+            client.close()
+        sql_connections.dispose()
+    return status
+
+
+def _add_sql_arguments(parser, prefix='', title="SQL database", password_env=PASSWORD_ENV):
+    group = parser.add_argument_group(title)
+    group.add_argument(f'--{prefix}sql-type', required=True, type=sql_type_name,
+                       help="sqlite, postgresql, mysql or sqlserver")
+    group.add_argument(f'--{prefix}sqlite-path', default='', help="SQLite database file")
+    group.add_argument(f'--{prefix}host', default='localhost', help="server host (SQL Server: server name)")
+    group.add_argument(f'--{prefix}port', default='', help="server port (default: the DB type's port)")
+    group.add_argument(f'--{prefix}dbname', default='', help="database name")
+    group.add_argument(f'--{prefix}user', default='', help="user name (SQL Server: empty for Windows authentication)")
+    group.add_argument(f'--{prefix}password', default=os.environ.get(password_env, ''),
+                       help=f"password (default: ${password_env})")
+    group.add_argument(f'--{prefix}mssql-driver', default='', help="SQL Server ODBC driver (default: the newest installed)")
+
+
+def _sql_options_from_args(args, prefix=''):
+    option = lambda name: getattr(args, prefix + name)
+    return dict(sql_type=option('sql_type'), sqlite_path=option('sqlite_path'), host=option('host'), port=option('port'),
+                dbname=option('dbname'), user=option('user'), password=option('password'), driver=option('mssql_driver'))
+
+
+def _add_mongo_arguments(parser):
+    group = parser.add_argument_group("MongoDB")
+    group.add_argument('--mongo-uri', default=DEFAULT_MONGO_URI, help=f"connection URI (default: {DEFAULT_MONGO_URI})")
+    group.add_argument('--mongo-db', default=DEFAULT_MONGO_DB, help=f"database name (default: {DEFAULT_MONGO_DB})")
+
+
+def _add_target_mongo_arguments(parser):
+    group = parser.add_argument_group("Target MongoDB")
+    group.add_argument('--target-mongo-uri', required=True, help="connection URI of the target server")
+    group.add_argument('--target-mongo-db', help="target database name (default: --mongo-db)")
+
+
+def _add_source_arguments(parser):
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--table', help="source table")
+    source.add_argument('--query', help="custom SQL query")
+
+
+def _add_checkpoint_argument(parser):
+    parser.add_argument('--checkpoint-file', default=DEFAULT_CHECKPOINT_FILE,
+                        help=f"where the progress of unfinished transfers is kept (default: {DEFAULT_CHECKPOINT_FILE})")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--resume', dest='resume', action='store_const', const=True,
+                       help="continue an unfinished transfer from its checkpoint (the default)")
+    group.add_argument('--restart', dest='resume', action='store_const', const=False,
+                       help="discard the checkpoint of an unfinished transfer and start over")
+
+
+def _add_sync_state_argument(parser):
+    parser.add_argument('--state-file', default=DEFAULT_SYNC_STATE_FILE,
+                        help=f"where the watermark of each sync is kept (default: {DEFAULT_SYNC_STATE_FILE})")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m converter",
+                                     description="Convert data between SQL databases and MongoDB without the desktop UI.")
+    commands = parser.add_subparsers(dest='operation', required=True, metavar='operation')
+
+    def add_operation(name, help_text):
+        _, uses_sql, uses_mongo = OPERATIONS[name]
+        command = commands.add_parser(name, help=help_text, description=help_text)
+        command.add_argument('-y', '--overwrite', action='store_true',
+                             help="overwrite existing targets instead of skipping them")
+        if uses_sql:
+            _add_sql_arguments(command)
+        if uses_mongo:
+            _add_mongo_arguments(command)
+        if name in TARGET_SQL_OPERATIONS:
+            _add_sql_arguments(command, prefix='target-', title="Target SQL database", password_env=TARGET_PASSWORD_ENV)
+        if name in TARGET_MONGO_OPERATIONS:
+            _add_target_mongo_arguments(command)
+        return command
+
+    command = add_operation('sql-to-mongo', "Convert one table or query result to a MongoDB collection.")
+    _add_source_arguments(command)
+    command.add_argument('--collection', help="target collection (default: the table name)")
+    command.add_argument('--workers', type=int, default=1, help="key ranges of the table read at once")
+    command.add_argument('--relaxed-writes', action='store_true', help="use w=1, j=false for the inserts")
+    command.add_argument('--native-dates', dest='native_datetimes', action='store_true', help="store dates as BSON datetimes")
+    _add_checkpoint_argument(command)
+
+    command = add_operation('sql-db-to-mongo', "Convert every table of a SQL database to MongoDB.")
+    command.add_argument('--workers', type=int, default=engine.DEFAULT_PARALLEL_WORKERS, help="tables converted at once")
+    command.add_argument('--relaxed-writes', action='store_true', help="use w=1, j=false for the inserts")
+    command.add_argument('--native-dates', dest='native_datetimes', action='store_true', help="store dates as BSON datetimes")
+
+    command = add_operation('mongo-to-sql', "Convert one MongoDB collection to a SQL table.")
+    command.add_argument('--collection', required=True, help="source collection")
+    command.add_argument('--output', help="SQLite target file (default: <collection>_from_mongo.db)")
+    command.add_argument('--workers', type=int, default=1, help="_id ranges of the collection read at once")
+    command.add_argument('--normalize', action='store_true', help="split arrays of sub-documents into child tables")
+    _add_checkpoint_argument(command)
+
+    command = add_operation('mongo-db-to-sql', "Convert every collection of a MongoDB database to SQL tables.")
+    command.add_argument('--workers', type=int, default=engine.DEFAULT_PARALLEL_WORKERS, help="collections converted at once")
+    command.add_argument('--output', help="SQLite target file (default: <database>_from_mongo.db)")
+    command.add_argument('--normalize', action='store_true', help="split arrays of sub-documents into child tables")
+
+    command = add_operation('sync-sql-to-mongo', "Upsert the rows of a table that changed since the last sync into MongoDB.")
+    command.add_argument('--table', required=True, help="source table (needs a single-column primary key)")
+    command.add_argument('--watermark', help="column that grows with every change, e.g. updated_at (default: the primary key)")
+    command.add_argument('--collection', help="target collection (default: the table name)")
+    command.add_argument('--relaxed-writes', action='store_true', help="use w=1, j=false for the upserts")
+    command.add_argument('--native-dates', dest='native_datetimes', action='store_true', help="store dates as BSON datetimes")
+    _add_sync_state_argument(command)
+
+    command = add_operation('sync-mongo-to-sql', "Upsert the documents of a collection that changed since the last sync into SQL.")
+    command.add_argument('--collection', required=True, help="source collection")
+    command.add_argument('--watermark', default='_id', help="field that grows with every change, e.g. updated_at (default: _id)")
+    command.add_argument('--output', help="SQLite target file (default: <collection>_from_mongo.db)")
+    _add_sync_state_argument(command)
+
+    for name in ('export-sql', 'export-sql-csv'):
+        command = add_operation(name, "Export one table or query result to a CSV, Parquet or Arrow IPC file.")
+        _add_source_arguments(command)
+        command.add_argument('--output', required=True,
+                             help="output file: .csv (.csv.gz and .csv.zst are compressed), .parquet, or .arrow/.feather")
+
+    for name in ('export-mongo', 'export-mongo-csv'):
+        command = add_operation(name, "Export one MongoDB collection to a CSV, JSON Lines or BSON file.")
+        command.add_argument('--collection', required=True, help="source collection")
+        command.add_argument('--output', required=True,
+                             help="output file: .csv (.csv.gz and .csv.zst are compressed), .jsonl (.jsonl.gz), or .bson")
+        command.add_argument('--fields', help="comma-separated field paths to export (default: every field; "
+                                              "a CSV header is sampled from the collection)")
+        command.add_argument('--workers', type=int, default=1, help="_id ranges of the collection read at once")
+
+    command = add_operation('import-to-mongo', "Load CSV, Parquet, Arrow, JSON Lines or BSON files into MongoDB.")
+    command.add_argument('paths', nargs='+', metavar='file', help="files to load, each into the collection named after it")
+    command.add_argument('--collection', help="load every file into this collection instead")
+    command.add_argument('--workers', type=int, default=engine.DEFAULT_PARALLEL_WORKERS, help="collections loaded at once")
+    command.add_argument('--relaxed-writes', action='store_true', help="use w=1, j=false for the inserts")
+    command.add_argument('--native-dates', dest='native_datetimes', action='store_true', help="store dates as BSON datetimes")
+
+    command = add_operation('import-to-sql', "Load CSV, Parquet, Arrow, JSON Lines or BSON files into SQL tables.")
+    command.add_argument('paths', nargs='+', metavar='file', help="files to load, each into the table named after it")
+    command.add_argument('--table', help="load every file into this table instead")
+    command.add_argument('--workers', type=int, default=engine.DEFAULT_PARALLEL_WORKERS, help="tables loaded at once")
+    command.add_argument('--output', help="SQLite target file (default: --sqlite-path)")
+
+    command = add_operation('sql-to-sql', "Copy one table or query result into another SQL database.")
+    _add_source_arguments(command)
+    command.add_argument('--target-table', help="target table (default: the table name)")
+
+    command = add_operation('sql-db-to-sql', "Copy every table of a SQL database into another SQL database.")
+    command.add_argument('--workers', type=int, default=engine.DEFAULT_PARALLEL_WORKERS, help="tables copied at once")
+
+    command = add_operation('mongo-to-mongo', "Copy one collection into another MongoDB database as raw BSON.")
+    command.add_argument('--collection', required=True, help="source collection")
+    command.add_argument('--target-collection', help="target collection (default: the collection name)")
+    command.add_argument('--workers', type=int, default=1, help="_id ranges of the collection read at once")
+    command.add_argument('--relaxed-writes', action='store_true', help="use w=1, j=false for the inserts")
+
+    command = add_operation('mongo-db-to-mongo', "Copy every collection of a MongoDB database into another one as raw BSON.")
+    command.add_argument('--workers', type=int, default=engine.DEFAULT_PARALLEL_WORKERS, help="collections copied at once")
+    command.add_argument('--relaxed-writes', action='store_true', help="use w=1, j=false for the inserts")
+
+    command = commands.add_parser('run', help="Run the jobs of a JSON job file.", description="Run the jobs of a JSON job file.")
+    command.add_argument('job_file', help="path of the JSON job file")
+    return parser
+
+
+def _job_from_args(args):
+    _, uses_sql, uses_mongo = OPERATIONS[args.operation]
+    job = {'operation': args.operation, 'overwrite': args.overwrite}
+    if getattr(args, 'resume', None) is not None:
+        job['resume'] = args.resume
+    if uses_sql:
+        job['sql'] = _sql_options_from_args(args)
+    if args.operation in TARGET_SQL_OPERATIONS:
+        job['target_sql'] = _sql_options_from_args(args, prefix='target_')
+    if args.operation in TARGET_MONGO_OPERATIONS:
+        job['target_mongo'] = {'uri': args.target_mongo_uri, 'db': args.target_mongo_db}
+    if uses_mongo:
+        job['mongo'] = {'uri': args.mongo_uri, 'db': args.mongo_db}
+    for name in ('paths', 'table', 'query', 'target_table', 'target_collection', 'collection', 'output', 'fields', 'workers', 'relaxed_writes', 'native_datetimes',
+                 'normalize', 'checkpoint_file', 'watermark', 'state_file'):
+        value = getattr(args, name, None)
+        if value not in (None, False):
+            job[name] = value
+    return job
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.operation != 'run':
+        return run_jobs([_job_from_args(args)])
+
+    try:
+        with open(args.job_file, encoding='utf-8') as f:
+            job_file = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Could not read job file '{args.job_file}': {e}", file=sys.stderr)
+        return 2
+    jobs = job_file.pop('jobs', [])
+    if not jobs:
+        print(f"Job file '{args.job_file}' has no jobs.", file=sys.stderr)
+        return 2
+    return run_jobs(jobs, defaults=job_file)
@@ -0,0 +1,1653 @@
+"""
+The conversion, sync and export operations, independent of any UI. Each operation reports
+through a Reporter, so the same code runs behind the desktop app and the
+command line.
+"""
+import datetime
+import sqlite3
+import sys
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import closing
+from pathlib import Path
+from typing import NamedTuple
+
+import pandas as pd
+from bson import ObjectId
+
+from .checkpoint import DEFAULT_CHECKPOINT_FILE, DEFAULT_SYNC_STATE_FILE, CheckpointStore
+from .export import EXPORT_FORMATS, export_format
+from .imports import import_format, import_target_name
+from .mongo import (MONGO_FETCH_BATCH_SIZE, MONGO_SAMPLE_SIZE, MONGO_WRITE_WORKERS, DocumentFlattener, DocumentNormalizer,
+                    MongoBulkWriter,
+                    MongoTypePlan, create_mongo_indexes, ensure_mongo_unique_index, iter_mongo_batches,
+                    iter_mongo_keyset_batches,
+                    iter_mongo_partitions, mongo_collection_indexes, mongo_collection_options, mongo_id_keyset_safe,
+                    mongo_id_ranges,
+                    mongo_id_splits, raw_bson_collection, replicate_mongo_indexes, sample_mongo_documents,
+                    sample_mongo_tables)
+from .pipeline import iter_pipelined
+from .sql import (SQL_FETCH_BATCH_SIZE, IndexSpec, SQLBatchWriter, SQLRowWriter, SQLSettings, SingleWriterQueue, count_sql_rows,
+                  estimate_table_sizes, infer_sql_schema, iter_sql_chunks, iter_sql_keyset_chunks,
+                  iter_sql_row_batches, key_range_query, key_range_splits, list_sql_tables, list_target_tables,
+                  param_placeholder, primary_key_columns, quote_sql_identifier, row_column_types, sanitize_sql_name,
+                  sql_connections, sql_key_bounds, sql_table_indexes, table_column_types, tune_sqlite_for_bulk_load)
+
+DEFAULT_PARALLEL_WORKERS = 4 # Tables/collections converted at once by the full-database operations
+MAX_PARALLEL_WORKERS = 16
+TABLE_PROGRESS_LOG_ROWS = 100000 # Log a progress line per table every N rows
+
+
+class Reporter:
+    """
+    Receives the log lines, progress and questions of an operation.
+    This base class is non-interactive: log lines are written to a stream
+    (stderr by default), progress is ignored and every yes/no question is
+    answered with `assume_yes`, except whether to continue an unfinished
+    transfer, which is answered with `resume` when it is set. The desktop app
+    overrides it with dialogs.
+    """
+
+    def __init__(self, assume_yes=False, stream=None, resume=None):
+        self.assume_yes = assume_yes
+        self.stream = stream
+        self.resume = resume
+
+    def log(self, message):
+        """Records one line of the operation log."""
+        print(f"[{datetime.datetime.now():%Y-%m-%d %H:%M:%S}] {message}", file=self.stream or sys.stderr, flush=True)
+
+    def progress(self, percent):
+        """Receives the completion (0-100) of the running operation."""
+
+    def confirm(self, title, question):
+        """Asks a yes/no question, such as whether to overwrite an existing target."""
+        return self.assume_yes
+
+    def confirm_resume(self, title, question):
+        """Asks whether to continue an unfinished transfer from its checkpoint, or to start it over."""
+        return self.confirm(title, question) if self.resume is None else self.resume
+
+    def notify(self, title, message):
+        """Reports the outcome of an operation."""
+        self.log(message)
+
+
+class TransferSummary(NamedTuple):
+    """Outcome of a full-database operation."""
+    converted: int
+    skipped: int
+    failed: list
+
+
+def clamp_workers(workers):
+    """Returns the number of parallel workers, clamped to a sane range."""
+    return max(1, min(int(workers), MAX_PARALLEL_WORKERS))
+
+
+def _source_query(sql_type, table, query):
+    if query:
+        return query
+    if not table:
+        raise ValueError("Either a table or a custom query is required.")
+    return f"SELECT * FROM {quote_sql_identifier(table, sql_type)}"
+
+
+def _without_keys(chunks):
+    """Adapts plain DataFrame chunks to the (chunk, last key) pairs of the keyset readers."""
+    with closing(chunks):
+        for chunk in chunks:
+            yield chunk, None
+
+
+def _checkpointable_key(value):
+    """Whether a SQL key is stored unchanged in MongoDB, so the documents after a checkpoint can be found by it."""
+    return isinstance(value, (int, str)) and not isinstance(value, bool)
+
+
+def _ask_resume(reporter, checkpoints, job_id, source_name):
+    """Returns the (last key, rows) checkpoint to continue from, or None to start over."""
+    saved = checkpoints.get(job_id)
+    if saved is None:
+        return None
+    last_key, rows = saved
+    if reporter.confirm_resume("Resume Transfer", f"A previous transfer of '{source_name}' stopped after {rows} rows. Continue from there?\n\n- 'Yes' to Resume.\n- 'No' to Start over."):
+        if isinstance(last_key, dict): # Several key ranges read in parallel
+            reporter.log(f"Resuming {len(last_key['last'])} key ranges ({rows} rows already converted).")
+        else:
+            reporter.log(f"Resuming after key {last_key!r} ({rows} rows already converted).")
+        return saved
+    checkpoints.clear(job_id)
+    return None
+
+
+class _PendingCheckpoints:
+    """
+    Saves the checkpoint of a chunk once it and every chunk read before it have
+    been written by a MongoBulkWriter, which writes several chunks at once.
+    """
+
+    def __init__(self, writer, save):
+        self.writer = writer
+        self.save = save # Called with (last key, rows)
+        self._pending = deque() # (insert futures, last key, rows) of the chunks not checkpointed yet, in read order
+
+    def add(self, futures, last_key, rows):
+        self._pending.append((futures, last_key, rows))
+        committed = None
+        while self._pending and all(f.done() for f in self._pending[0][0]):
+            committed = self._pending.popleft()
+        if committed and self.writer.error is None:
+            self.save(committed[1], committed[2])
+
+
+def _scalar(value):
+    """Turns a pandas/numpy scalar into the plain Python value that DB drivers accept."""
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    return value.item() if hasattr(value, 'item') else value
+
+
+def _field_value(doc, path):
+    """Returns the value of a dotted field path of a document, or None if it is missing."""
+    for part in path.split('.'):
+        if not isinstance(doc, dict):
+            return None
+        doc = doc.get(part)
+    return doc
+
+
+def _key_ranges(splits, last_keys=None):
+    """
+    Returns the (after, before) bounds of the integer key ranges separated by
+    `splits`, each range holding the keys with after < key < before (None
+    meaning open). A range continues after its entry of `last_keys`, if any.
+    """
+    bounds = [None] + list(splits) + [None]
+    ranges = [(None if low is None else low - 1, high) for low, high in zip(bounds, bounds[1:])]
+    if last_keys:
+        ranges = [(after if last is None else last, before) for (after, before), last in zip(ranges, last_keys)]
+    return ranges
+
+
+def _mongo_range(after, before):
+    """Builds the filter of the values with after < value < before (None meaning open)."""
+    condition = {}
+    if after is not None:
+        condition['$gt'] = after
+    if before is not None:
+        condition['$lt'] = before
+    return condition or {'$exists': True}
+
+
+def _insert_key_ranges(sql, table, key, splits, ranges, writer, type_plan, save_checkpoint, rows_done, resumed=None):
+    """
+    Reads the key ranges of a table at the same time, each on its own source
+    connection, and inserts every chunk through the shared MongoBulkWriter.
+    When `save_checkpoint` is given, ranges are read by keyset pagination and
+    the last committed key of every range is checkpointed together with the
+    splits, so the run can resume each range where it stopped. The first
+    range to fail stops the others.
+    """
+    sql_type = sql.sql_type
+    last_keys = list(resumed['last']) if resumed else [None] * len(ranges)
+    range_rows = [0] * len(ranges)
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def save_range(index, last_key, rows):
+        with lock:
+            last_keys[index], range_rows[index] = last_key, rows
+            save_checkpoint({'splits': splits, 'last': list(last_keys)}, rows_done + sum(range_rows))
+
+    def read_range(index, after, before):
+        conn = sql.connect()
+        if save_checkpoint:
+            chunks = iter_sql_keyset_chunks(conn, sql_type, table, key, after=after, before=before)
+            pending = _PendingCheckpoints(writer, lambda last_key, rows: save_range(index, last_key, rows))
+        else:
+            range_query, params = key_range_query(sql_type, table, key, after, before)
+            chunks = _without_keys(iter_sql_chunks(conn, sql_type, range_query, params=params))
+        records = iter_pipelined(chunks, lambda page: (type_plan.apply(page[0]), page[1]))
+        try:
+            rows_read = 0
+            for docs, last_key in records:
+                if stop.is_set():
+                    return
+                futures = writer.add(docs)
+                rows_read += len(docs)
+                if save_checkpoint:
+                    pending.add(futures, last_key, rows_read)
+        finally:
+            records.close()
+            chunks.close()
+            conn.close()
+
+    with ThreadPoolExecutor(max_workers=len(ranges)) as pool:
+        futures = [pool.submit(read_range, index, after, before) for index, (after, before) in enumerate(ranges)]
+        try:
+            for future in as_completed(futures):
+                future.result()
+        finally:
+            stop.set()
+
+
+def _copy_sql_indexes(sql, table, collection, reporter):
+    """Builds the primary key and indexes of a source table on the collection it was loaded into."""
+    try:
+        indexes = sql_table_indexes(sql.engine(), table)
+        errors = create_mongo_indexes(collection, indexes)
+    except Exception as e: # e.g. SQLAlchemy is not installed
+        reporter.log(f"WARNING: The indexes of table '{table}' were not copied to '{collection.name}': {e}")
+        return
+    if indexes:
+        reporter.log(f"Indexed '{collection.name}' like table '{table}' ({len(indexes)} indexes and keys).")
+    for error in errors:
+        reporter.log(f"WARNING: Index {error} on '{collection.name}'.")
+
+
+def _copy_mongo_indexes(collection, writer, reporter):
+    """Builds the indexes of a source collection, `_id` included, on the table it was loaded into."""
+    try:
+        indexes = mongo_collection_indexes(collection)
+        errors = writer.build_indexes(indexes)
+    except Exception as e:
+        reporter.log(f"WARNING: The indexes of collection '{collection.name}' were not copied to '{writer.table_name}': {e}")
+        return
+    reporter.log(f"Indexed table '{writer.table_name}' like collection '{collection.name}' ({len(indexes)} indexes).")
+    for error in errors:
+        reporter.log(f"WARNING: Index {error} on table '{writer.table_name}'.")
+
+
+def _link_child_tables(normalizers, writers, reporter):
+    """
+    Indexes the key of every child table of a normalized conversion and, where
+    the target can add one, declares its parent key as a foreign key to the
+    parent table. Run it after the parent tables are indexed: a foreign key
+    needs a unique index on the columns it references.
+    """
+    keys, references = {}, {}
+    for normalizer in normalizers:
+        keys.update(normalizer.keys)
+        references.update(normalizer.references)
+    for table, (parent, columns, parent_columns) in references.items(): # Parents come before their children
+        writer = writers.get(table)
+        if writer is None:
+            continue
+        for error in writer.build_indexes([IndexSpec(tuple((column, 1) for column in keys[table]), True)]):
+            reporter.log(f"WARNING: Index {error} on table '{table}'.")
+        try:
+            writer.add_foreign_key(columns, parent, parent_columns)
+        except Exception as e:
+            reporter.log(f"WARNING: Table '{table}' was not linked to '{parent}' by a foreign key: {e}")
+        reporter.log(f"Indexed child table '{table}' of '{parent}' on ({', '.join(keys[table])}).")
+
+
+def sql_to_mongo(sql, mongo_db, reporter, table=None, query=None, collection=None,
+                 relaxed_writes=False, native_datetimes=False, checkpoint_file=DEFAULT_CHECKPOINT_FILE, workers=1):
+    """
+    Streams a table, or the result of a custom query, into a MongoDB collection.
+    The collection defaults to the table name. Tables with a single-column
+    primary key are read by keyset pagination and checkpointed as chunks are
+    committed, so a transfer that stops can be resumed; only integer and text
+    keys are checkpointed, as other keys (e.g. dates and decimals) are stored
+    in MongoDB converted and couldn't be matched on resume, and tables without
+    such a key are streamed in a single query instead. With `workers` > 1, a
+    table with an integer primary key (or a SQLite rowid) is split into that
+    many key ranges, which are read at the same time on their own connections.
+    Returns the number of inserted documents, or None if nothing was converted.
+    """
+    sql_type = sql.sql_type
+    whole_table = table and not query
+    query = _source_query(sql_type, table, query)
+    collection_name = collection or table
+    if not collection_name:
+        raise ValueError("A target collection name is required for a custom query.")
+
+    reporter.log(f"Starting conversion: {sql_type} to MongoDB collection '{collection_name}'...")
+    conn = sql.connect()
+    chunks = None
+    try:
+        # 1. Pick up the checkpoint of a previous run, if the table can be read in key order
+        key_column = None
+        if whole_table:
+            key_columns = primary_key_columns(conn, sql_type, table)
+            if len(key_columns) == 1:
+                key_column = key_columns[0]
+            else:
+                reporter.log(f"Table '{table}' has no single-column primary key, so this transfer can't be resumed if it stops.")
+        checkpoints = CheckpointStore(checkpoint_file)
+        job_id = f"sql-to-mongo {sql.describe()}/{table} -> {mongo_db.name}.{collection_name}"
+        resume = _ask_resume(reporter, checkpoints, job_id, table) if key_column else None
+        resume_after, rows_done = resume or (None, 0)
+
+        # 2. Split the table into key ranges read in parallel, or stream it in one pass
+        total_rows = count_sql_rows(conn, sql_type, query)
+        if total_rows is not None:
+            reporter.log(f"Source has {total_rows} rows. Streaming in batches of {SQL_FETCH_BATCH_SIZE}.")
+
+        partition_key, splits = None, None
+        if isinstance(resume_after, dict): # Checkpoint of a partitioned run: resume every range
+            partition_key, splits = key_column, resume_after['splits']
+        elif whole_table and workers > 1 and not resume:
+            partition_key = key_column or ("rowid" if sql_type == "SQLite" else None)
+            splits = key_range_splits(conn, sql_type, table, partition_key, clamp_workers(workers)) if partition_key else None
+            if not splits:
+                reporter.log(f"Table '{table}' has no integer key to split on, so it is read by a single worker.")
+
+        if splits:
+            ranges = _key_ranges(splits, resume_after['last'] if resume else None)
+            reporter.log(f"Reading {len(ranges)} ranges of '{partition_key}' in parallel.")
+        else:
+            if key_column and not resume:
+                first_key = (sql_key_bounds(conn, sql_type, table, key_column) or (None,))[0]
+                if first_key is not None and not _checkpointable_key(first_key):
+                    reporter.log(f"Key '{key_column}' of table '{table}' holds {type(first_key).__name__} values, so this transfer can't be resumed if it stops.")
+                    checkpoints.clear(job_id)
+                    checkpoints = None
+            if key_column and checkpoints: # Keyset pages, so the transfer can continue after any of them
+                chunks = iter_sql_keyset_chunks(conn, sql_type, table, key_column, after=resume_after)
+            else:
+                chunks = _without_keys(iter_sql_chunks(conn, sql_type, query))
+            first_chunk = next(chunks, None)
+            if first_chunk is None:
+                if resume:
+                    checkpoints.clear(job_id)
+                    reporter.notify("Complete", f"All {rows_done} rows had already been converted to '{collection_name}'.")
+                    return rows_done
+                reporter.log("Warning: Source is empty. Nothing to convert.")
+                reporter.notify("Complete", "The source table/query is empty. No data was converted.")
+                return None
+
+        # 3. Prepare the target collection
+        target = mongo_db[collection_name]
+        if resume:
+            # Documents inserted after the checkpoint was saved would otherwise be duplicated
+            bounds = ranges if splits else [(resume_after, None)]
+            removed = sum(target.delete_many({key_column: _mongo_range(after, before)}).deleted_count for after, before in bounds)
+            if removed:
+                reporter.log(f"Removed {removed} documents written after the checkpoint.")
+        elif collection_name in mongo_db.list_collection_names():
+            if not reporter.confirm("Confirm Overwrite", f"Collection '{collection_name}' already exists. Overwrite it?"):
+                reporter.log("Conversion cancelled by user.")
+                return None
+            target.drop()
+            reporter.log(f"Dropped existing collection '{collection_name}'.")
+
+        # 4. Read, convert and insert as pipeline stages, so the next chunks are read while one is inserted
+        type_plan = MongoTypePlan(native_datetimes=native_datetimes)
+
+        def report_progress(inserted):
+            if total_rows:
+                reporter.progress(min((rows_done + inserted) / total_rows * 100, 100))
+
+        save_checkpoint = (lambda last_key, rows: checkpoints.save(job_id, last_key, rows)) if checkpoints else None
+        with MongoBulkWriter(target, relaxed_write_concern=relaxed_writes, on_progress=report_progress,
+                             workers=max(MONGO_WRITE_WORKERS, len(splits or ()) + 1)) as writer:
+            if splits:
+                _insert_key_ranges(sql, table, partition_key, splits, ranges, writer, type_plan,
+                                   save_checkpoint if key_column else None, rows_done, resume_after if resume else None)
+            else:
+                def keyed_chunks():
+                    yield first_chunk
+                    yield from chunks
+
+                rows_read = rows_done
+                pending = _PendingCheckpoints(writer, save_checkpoint)
+                records = iter_pipelined(keyed_chunks(), lambda page: (type_plan.apply(page[0]), page[1]))
+                with closing(records):
+                    for docs, last_key in records:
+                        futures = writer.add(docs)
+                        if key_column and save_checkpoint:
+                            rows_read += len(docs)
+                            pending.add(futures, last_key, rows_read)
+        if key_column and checkpoints:
+            checkpoints.clear(job_id)
+        reporter.log(f"Successfully inserted {writer.summary()} into '{collection_name}'.")
+        if writer.failed:
+            reporter.log(f"WARNING: {writer.failed} documents were rejected by MongoDB. First error: {writer.first_error()}")
+
+        # 5. Index the loaded collection like the source table
+        if whole_table:
+            _copy_sql_indexes(sql, table, target, reporter)
+        reporter.progress(100)
+        reporter.notify("Success", f"Successfully converted {writer.inserted} records to MongoDB collection '{collection_name}'.")
+        return writer.inserted
+    finally:
+        if chunks is not None:
+            chunks.close() # Releases the server-side cursor
+        conn.close()
+
+
+def sql_db_to_mongo(sql, mongo_db, reporter, workers=DEFAULT_PARALLEL_WORKERS,
+                    relaxed_writes=False, native_datetimes=False):
+    """
+    Converts every table of a SQL database into a collection of the same name,
+    several tables at once, each worker on its own source connection.
+    """
+    sql_type = sql.sql_type
+    conn = sql.connect()
+    worker_conns = [] # Source connections opened by the pool threads
+    try:
+        tables_to_convert = list_sql_tables(conn, sql_type)
+        if not tables_to_convert:
+            reporter.notify("No Tables", "No tables found in the selected SQL database to convert.")
+            return TransferSummary(0, 0, [])
+
+        # --- Ask for overwrite strategy once ---
+        overwrite = reporter.confirm("Confirm Overwrite Strategy", "For collections that already exist in MongoDB, do you want to Overwrite them?\n\n- 'Yes' to Overwrite existing collections.\n- 'No' to Skip existing collections.")
+        reporter.log(f"Starting full database conversion ({len(tables_to_convert)} tables) with strategy: {'Overwrite' if overwrite else 'Skip'}.")
+
+        existing_collections = set(mongo_db.list_collection_names()) # MongoClient is thread-safe and shared by all workers
+        tables_to_skip = [t for t in tables_to_convert if t in existing_collections and not overwrite]
+        for table_name in tables_to_skip:
+            reporter.log(f"Skipping table '{table_name}' as it already exists in MongoDB.")
+        tables_to_convert = [t for t in tables_to_convert if t not in tables_to_skip]
+
+        # Largest tables first, so the long ones don't all finish last
+        table_sizes = estimate_table_sizes(conn, sql_type, tables_to_convert)
+        tables_to_convert.sort(key=lambda t: table_sizes[t], reverse=True)
+        queries = {t: _source_query(sql_type, t, None) for t in tables_to_convert}
+
+        workers = max(1, min(clamp_workers(workers), len(tables_to_convert)))
+        reporter.log(f"Converting {len(tables_to_convert)} tables with {workers} parallel worker(s), largest first.")
+
+        # --- Each pool thread gets its own source connection ---
+        thread_state = threading.local()
+        conns_lock = threading.Lock()
+
+        def get_worker_conn():
+            if not hasattr(thread_state, 'conn'):
+                thread_state.conn = sql.connect()
+                with conns_lock:
+                    worker_conns.append(thread_state.conn)
+            return thread_state.conn
+
+        def convert_table(table_name):
+            """Streams one table into its collection. Returns its MongoBulkWriter, or None if the table is empty."""
+            reporter.log(f"Converting table '{table_name}'...")
+            collection = mongo_db[table_name]
+            if table_name in existing_collections and overwrite:
+                collection.drop() # Even if the table turns out to be empty, so no stale documents are left behind
+            chunks = iter_sql_chunks(get_worker_conn(), sql_type, queries[table_name])
+            try:
+                first_chunk = next(chunks, None)
+                if first_chunk is None:
+                    return None
+
+                type_plan = MongoTypePlan(native_datetimes=native_datetimes)
+                record_batches = iter_pipelined(chunks, type_plan.apply) # Reads and converts ahead of the inserts
+
+                logged_steps = 0
+                def report_progress(inserted):
+                    nonlocal logged_steps
+                    if inserted // TABLE_PROGRESS_LOG_ROWS > logged_steps:
+                        logged_steps = inserted // TABLE_PROGRESS_LOG_ROWS
+                        reporter.log(f"  '{table_name}': {inserted} documents inserted so far...")
+
+                with closing(record_batches), MongoBulkWriter(collection, relaxed_write_concern=relaxed_writes,
+                                                              on_progress=report_progress) as writer:
+                    writer.add(type_plan.apply(first_chunk))
+                    for batch in record_batches:
+                        writer.add(batch)
+                return writer
+            finally:
+                chunks.close()
+
+        # --- Convert the tables on the worker pool ---
+        converted_count = 0
+        converted_tables = []
+        failed_tables = []
+        if tables_to_convert:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(convert_table, t): t for t in tables_to_convert}
+                for done, future in enumerate(as_completed(futures), start=1):
+                    table_name = futures[future]
+                    try:
+                        writer = future.result()
+                        if writer:
+                            reporter.log(f"✅ Successfully inserted {writer.summary()} into '{table_name}'.")
+                            if writer.failed:
+                                reporter.log(f"WARNING: {writer.failed} documents of '{table_name}' were rejected by MongoDB. First error: {writer.first_error()}")
+                            converted_count += 1
+                            converted_tables.append(table_name)
+                        else:
+                            reporter.log(f"Table '{table_name}' is empty. Skipping.")
+                    except Exception as e:
+                        failed_tables.append(table_name)
+                        reporter.log(f"ERROR converting table '{table_name}': {e}")
+                    reporter.progress(done / len(futures) * 100)
+
+        # --- Index the loaded collections like their tables, several collections at once ---
+        if converted_tables:
+            reporter.log(f"Building the indexes of {len(converted_tables)} collections...")
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(lambda t: _copy_sql_indexes(sql, t, mongo_db[t], reporter), converted_tables))
+
+        # --- Finalization ---
+        summary = TransferSummary(converted_count, len(tables_to_skip), failed_tables)
+        reporter.progress(100)
+        reporter.log("Full database conversion finished.")
+        reporter.notify("Conversion Complete", f"Finished converting database.\n\n- Converted: {summary.converted} tables\n- Skipped: {summary.skipped} tables\n- Failed: {len(summary.failed)} tables")
+        return summary
+    finally:
+        for worker_conn in worker_conns:
+            worker_conn.close()
+        conn.close()
+
+
+def _flat_id(value):
+    """Returns an _id as the flattened value stored in SQL tables, or None if it can't be compared there."""
+    if isinstance(value, ObjectId):
+        return str(value)
+    return value if isinstance(value, (str, int, float)) else None
+
+
+def mongo_to_sql(mongo_db, sql, reporter, collection, output=None, checkpoint_file=DEFAULT_CHECKPOINT_FILE, workers=1,
+                 normalize=False):
+    """
+    Streams a MongoDB collection into a SQL table named after it, page by page
+    in `_id` order, checkpointing the last `_id` of every committed page so a
+    transfer that stops can be resumed. A collection whose _ids mix BSON types
+    can't be paged by _id, so it is read by a plain cursor, without
+    checkpoints. With `workers` > 1, the collection is
+    split into that many `_id` ranges that are read and flattened on parallel
+    cursors, each range checkpointed on its own. For SQLite the table is
+    written to a new database file, `output` or '<collection>_from_mongo.db'.
+    With `normalize`, arrays of sub-documents become child tables instead of
+    JSON columns (see DocumentNormalizer), written from the same pages.
+    Returns the number of rows written, or None if nothing was converted.
+    """
+    sql_type = sql.sql_type
+    # Use the collection name as the table name, ensuring it's a valid SQL identifier
+    table_name_sql = sanitize_sql_name(collection)
+    output_db_path = Path(output or f"{collection}_from_mongo.db") if sql_type == "SQLite" else None
+    target_name = f"SQLite:{output_db_path.resolve()}" if output_db_path else sql.describe()
+    checkpoints = CheckpointStore(checkpoint_file)
+    job_id = f"mongo-to-sql {mongo_db.name}.{collection} -> {target_name}/{table_name_sql}" + (" normalized" if normalize else "")
+    reporter.log(f"Starting conversion: MongoDB collection '{collection}' to {sql_type} table...")
+    source = mongo_db[collection]
+    keyset = mongo_id_keyset_safe(source)
+    if keyset:
+        resume = _ask_resume(reporter, checkpoints, job_id, collection)
+    else:
+        resume = None
+        reporter.log(f"Collection '{collection}' has _ids of several types, so it is read by a single cursor and can't be resumed.")
+    resume_after, rows_done = resume or (None, 0)
+
+    if output_db_path and not resume and output_db_path.exists():
+        if not reporter.confirm("Confirm Overwrite", f"Database file '{output_db_path}' already exists. Overwrite it?"):
+            reporter.log("Conversion cancelled by user.")
+            return None
+
+    def page_tables(flattener, batch):
+        """Flattens a page into {table: DataFrame}: the collection's table, and its child tables when normalizing."""
+        if normalize:
+            return flattener.normalize(batch)
+        return {table_name_sql: flattener.flatten(batch)}
+    new_flattener = (lambda: DocumentNormalizer(table_name_sql)) if normalize else DocumentFlattener
+
+    conn = None
+    try:
+        # 1. Read the collection in _id order: one keyset page at a time, or several _id ranges at once
+        total_docs = source.estimated_document_count()
+        splits = None
+        if isinstance(resume_after, dict): # Checkpoint of a partitioned run: resume every range
+            splits = resume_after['splits']
+        elif workers > 1 and keyset and not resume:
+            splits = mongo_id_splits(source, clamp_workers(workers))
+            if not splits:
+                reporter.log(f"Collection '{collection}' can't be split into _id ranges, so it is read by a single cursor.")
+
+        if splits:
+            ranges = mongo_id_ranges(splits, resume_after['last'] if resume else None)
+            last_ids = list(resume_after['last']) if resume else [None] * len(ranges)
+            flatteners = [new_flattener() for _ in ranges]
+            pages = iter_mongo_partitions(source, ranges, keyset=True,
+                                          transform=lambda index, batch: page_tables(flatteners[index], batch))
+            reporter.log(f"Reading about {total_docs} documents from collection '{collection}' as {len(ranges)} parallel _id ranges.")
+        else:
+            batches = iter_mongo_keyset_batches(source, after=resume_after) if keyset else iter_mongo_batches(source)
+            first_batch = next(batches, None)
+            if first_batch is None:
+                if resume:
+                    checkpoints.clear(job_id)
+                    reporter.notify("Complete", f"All {rows_done} documents had already been converted to table '{table_name_sql}'.")
+                    return rows_done
+                reporter.log("Warning: Collection is empty. Nothing to convert.")
+                reporter.notify("Complete", "The MongoDB collection is empty. No data was converted.")
+                return None
+
+            flatteners = [new_flattener()]
+            def keyset_batches():
+                yield first_batch
+                yield from batches
+            # Reads and flattens the next pages on their own threads while a page is written
+            pages = iter_pipelined(keyset_batches(), lambda batch: (0, page_tables(flatteners[0], batch), batch[-1]['_id']))
+            reporter.log(f"Streaming about {total_docs} documents from collection '{collection}' in pages of {MONGO_FETCH_BATCH_SIZE}.")
+
+        # 2. Open the SQL target, its column types inferred from a sample of the collection
+        if normalize:
+            schemas = {table: infer_sql_schema(df) for table, df in sample_mongo_tables(source, table_name_sql).items()}
+        else:
+            schemas = {table_name_sql: infer_sql_schema(sample_mongo_documents(source))}
+        reporter.log(f"Inferred the types of {sum(map(len, schemas.values()))} columns from a sample of up to {MONGO_SAMPLE_SIZE} documents.")
+        if sql_type == "SQLite":
+            conn = tune_sqlite_for_bulk_load(sqlite3.connect(output_db_path))
+        target = conn or sql.engine() # PostgreSQL, MySQL or SQL Server: the pooled engine
+        writers = {} # table -> SQLBatchWriter: the collection's table, then its child tables as they appear
+        def table_writer(table):
+            if table not in writers:
+                writers[table] = SQLBatchWriter(target, sql_type, table, if_exists='replace', schema=schemas.get(table))
+            return writers[table]
+        writer = table_writer(table_name_sql)
+        if resume:
+            resumed = [(table_name_sql, '_id')]
+            if normalize: # Child tables hold the _id of their document in their key column
+                resumed += [(table, flatteners[0].key_column) for table in list_target_tables(target, sql_type)
+                            if table.startswith(f"{table_name_sql}_")]
+            for table, key_column in resumed:
+                resumed_writer = table_writer(table)
+                if splits: # Append to the committed rows of every range
+                    resumed_writer.resume()
+                    for after, before in ranges:
+                        resumed_writer.delete_key_range(key_column, _flat_id(after), _flat_id(before))
+                else: # Append to the rows that were already committed
+                    resumed_writer.resume(key_column, _flat_id(resume_after))
+                if table != table_name_sql and key_column not in (resumed_writer.columns or ()):
+                    del writers[table] # Not a child table, only a similar name
+
+        # 3. Write each flattened page in its own transactions, then checkpoint it
+        rows_written = 0
+        with closing(pages):
+            for index, tables, last_id in pages:
+                for table, df in tables.items():
+                    table_writer(table).write(df)
+                rows_written = writer.rows_written
+                if splits:
+                    last_ids[index] = last_id
+                    checkpoints.save(job_id, {'splits': splits, 'last': list(last_ids)}, rows_done + rows_written)
+                elif keyset:
+                    checkpoints.save(job_id, last_id, rows_done + rows_written)
+                if total_docs:
+                    reporter.progress(min((rows_done + rows_written) / total_docs * 100, 100))
+        checkpoints.clear(job_id)
+        if normalize:
+            reporter.log(f"Normalized collection '{collection}' into {len(writers)} tables.")
+        else:
+            column_count = len({name for flattener in flatteners for name in flattener.schema.values()})
+            reporter.log(f"Flattened {column_count} columns for table '{table_name_sql}'.")
+
+        # 4. Index the loaded table like the source collection, and key its child tables
+        _copy_mongo_indexes(source, writer, reporter)
+        if normalize:
+            _link_child_tables(flatteners, writers, reporter)
+        reporter.progress(100)
+
+        if sql_type == "SQLite":
+            reporter.log(f"Successfully wrote {rows_written} rows to table '{table_name_sql}' in '{output_db_path}'.")
+            reporter.notify("Success", f"Successfully converted {rows_written} records to SQLite table '{table_name_sql}' in the file:\n{output_db_path.resolve()}")
+        else:
+            reporter.log(f"Successfully wrote {rows_written} rows to {sql_type} table '{table_name_sql}'.")
+            reporter.notify("Success", f"Successfully converted {rows_written} records to {sql_type} table '{table_name_sql}'.")
+        return rows_written
+    finally:
+        if conn:
+            conn.close()
+
+
+def mongo_db_to_sql(mongo_db, sql, reporter, workers=DEFAULT_PARALLEL_WORKERS, output=None, normalize=False):
+    """
+    Converts every collection of a MongoDB database into a SQL table, several
+    collections at once. Server targets are written through a pooled engine with
+    a connection per worker; SQLite targets (a new file, `output` or
+    '<database>_from_mongo.db') are written by a single writer thread. With
+    `normalize`, each collection's arrays of sub-documents become child tables.
+    """
+    sql_type = sql.sql_type
+    collections_to_convert = mongo_db.list_collection_names()
+    if not collections_to_convert:
+        reporter.notify("No Collections", f"No collections found in MongoDB database '{mongo_db.name}' to convert.")
+        return TransferSummary(0, 0, [])
+
+    # --- Ask for overwrite strategy ---
+    overwrite = reporter.confirm("Confirm Overwrite Strategy", f"This will convert {len(collections_to_convert)} collections to {sql_type} tables. For tables that already exist, do you want to Overwrite them?\n\n- 'Yes' to Overwrite existing tables.\n- 'No' to Skip existing tables.")
+    reporter.log(f"Starting full MongoDB conversion ({len(collections_to_convert)} collections) with strategy: {'Overwrite' if overwrite else 'Skip'}.")
+    if_exists = 'replace' if overwrite else 'append'
+    workers = max(1, min(clamp_workers(workers), len(collections_to_convert)))
+
+    engine = None
+    conn = None
+    sqlite_writer = None
+    schemas = {} # table -> column types inferred from a sample of its collection
+    writers = {} # table -> SQLBatchWriter, kept to index the tables once they are loaded
+    normalizers = {} # collection -> DocumentNormalizer, which knows its child tables
+    try:
+        # --- Setup SQL Engine/Connection ---
+        if sql_type == "SQLite":
+            output_db_path = Path(output or f"{mongo_db.name}_from_mongo.db")
+            if output_db_path.exists() and overwrite:
+                reporter.log(f"Deleting existing SQLite DB file: {output_db_path}")
+                sql_connections.dispose(SQLSettings("SQLite", sqlite_path=str(output_db_path))) # Pooled readers keep it open
+                output_db_path.unlink()
+            # SQLite allows a single writer: the readers feed one writer thread through a queue
+            conn = tune_sqlite_for_bulk_load(sqlite3.connect(output_db_path, check_same_thread=False))
+            sqlite_writer = SingleWriterQueue(lambda table: SQLBatchWriter(conn, sql_type, table, if_exists=if_exists,
+                                                                           schema=schemas.get(table)))
+        else:
+            engine = sql.engine() # Shared pool: each worker checks out its own connection
+
+        # --- Get existing tables from SQL DB for skip logic ---
+        existing_sql_tables = []
+        if not overwrite:
+            existing_sql_tables = list_target_tables(conn if sql_type == "SQLite" else engine, sql_type)
+            reporter.log(f"Found existing SQL tables for skip check: {existing_sql_tables}")
+
+        skipped_count = 0
+        pending_collections = []
+        for coll_name in collections_to_convert:
+            table_name_sql = sanitize_sql_name(coll_name)
+            if not overwrite and table_name_sql in existing_sql_tables:
+                reporter.log(f"Skipping collection '{coll_name}' as table '{table_name_sql}' already exists in SQL database.")
+                skipped_count += 1
+            else:
+                pending_collections.append(coll_name)
+
+        def convert_collection(coll_name):
+            """Streams one collection into its table. Returns the number of documents read."""
+            table_name_sql = sanitize_sql_name(coll_name)
+            reporter.log(f"Processing collection '{coll_name}'...")
+            if normalize:
+                normalizer = normalizers[coll_name] = DocumentNormalizer(table_name_sql)
+                for table, df in sample_mongo_tables(mongo_db[coll_name], table_name_sql).items():
+                    schemas[table] = infer_sql_schema(df)
+                page_tables = normalizer.normalize
+            else:
+                flattener = DocumentFlattener()
+                schemas[table_name_sql] = infer_sql_schema(sample_mongo_documents(mongo_db[coll_name]))
+                page_tables = lambda batch: {table_name_sql: flattener.flatten(batch)}
+
+            def write(table, df):
+                if sql_type == "SQLite":
+                    sqlite_writer.write(table, df)
+                    return
+                if table not in writers: # Each worker writes through its own pooled connection
+                    writers[table] = SQLBatchWriter(engine, sql_type, table, if_exists=if_exists, schema=schemas.get(table))
+                writers[table].write(df)
+
+            docs_read = 0
+            pages = iter_pipelined(iter_mongo_batches(mongo_db[coll_name]), lambda batch: (page_tables(batch), len(batch)))
+            with closing(pages):
+                for tables, docs in pages:
+                    for table, df in tables.items():
+                        write(table, df)
+                    docs_read += docs
+            return docs_read
+
+        # --- Convert the collections on the worker pool ---
+        reporter.log(f"Converting {len(pending_collections)} collections with {workers} parallel worker(s).")
+        results = {}
+        failed_collections = []
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(convert_collection, c): c for c in pending_collections}
+            for done, future in enumerate(as_completed(futures), start=1):
+                coll_name = futures[future]
+                try:
+                    results[coll_name] = future.result()
+                except Exception as e:
+                    failed_collections.append(coll_name)
+                    reporter.log(f"ERROR converting collection '{coll_name}': {e}")
+                reporter.progress(done / len(futures) * 100)
+
+        if sqlite_writer:
+            sqlite_writer.close() # Flush the pages still queued for the SQLite writer
+            for coll_name in list(results):
+                tables = normalizers[coll_name].keys if normalize else [sanitize_sql_name(coll_name)]
+                error = next((sqlite_writer.errors[table] for table in tables if table in sqlite_writer.errors), None)
+                if error:
+                    del results[coll_name]
+                    failed_collections.append(coll_name)
+                    reporter.log(f"ERROR converting collection '{coll_name}': {error}")
+            writers = sqlite_writer.writers
+            sqlite_writer = None
+
+        converted_count = 0
+        for coll_name, docs_read in results.items():
+            if docs_read:
+                reporter.log(f"✅ Successfully wrote {docs_read} documents to table '{sanitize_sql_name(coll_name)}'.")
+                converted_count += 1
+            else:
+                reporter.log(f"Collection '{coll_name}' is empty. Skipping.")
+
+        # --- Index the loaded tables like their collections: in parallel on a server, one at a time on SQLite ---
+        loaded = [(coll_name, writers[sanitize_sql_name(coll_name)]) for coll_name, docs_read in results.items()
+                  if docs_read and sanitize_sql_name(coll_name) in writers]
+        def index_collection(coll_name, writer):
+            _copy_mongo_indexes(mongo_db[coll_name], writer, reporter)
+            if normalize:
+                _link_child_tables([normalizers[coll_name]], writers, reporter)
+
+        if loaded:
+            reporter.log(f"Building the indexes of {len(loaded)} tables...")
+            with ThreadPoolExecutor(max_workers=1 if sql_type == "SQLite" else workers) as pool:
+                list(pool.map(lambda item: index_collection(*item), loaded))
+
+        # --- Finalization ---
+        summary = TransferSummary(converted_count, skipped_count, failed_collections)
+        reporter.progress(100)
+        reporter.log("Full MongoDB to SQL conversion finished.")
+        reporter.notify("Conversion Complete", f"Finished converting database.\n\n- Converted: {summary.converted} collections\n- Skipped: {summary.skipped} collections\n- Failed: {len(summary.failed)} collections")
+        return summary
+    finally:
+        if sqlite_writer: # Only set here if the conversion failed before it was flushed
+            sqlite_writer.close()
+        if conn:
+            conn.close()
+
+
+def sync_sql_to_mongo(sql, mongo_db, reporter, table, watermark=None, collection=None,
+                      relaxed_writes=False, native_datetimes=False, state_file=DEFAULT_SYNC_STATE_FILE):
+    """
+    Copies the rows of a table that changed since the previous sync into a
+    MongoDB collection (the table name by default), upserting them on the
+    table's single-column primary key. Changed rows are found with the
+    `watermark` column, e.g. updated_at; it defaults to the primary key, which
+    only picks up new rows. Rows whose watermark equals the saved one are read
+    again, so rows that share a timestamp are never missed; deleted rows are
+    not propagated. The first sync into an empty collection inserts instead of
+    upserting. Returns the number of synced rows.
+    """
+    sql_type = sql.sql_type
+    collection_name = collection or table
+    conn = sql.connect()
+    chunks = None
+    try:
+        key_columns = primary_key_columns(conn, sql_type, table)
+        if len(key_columns) != 1:
+            raise ValueError(f"Table '{table}' needs a single-column primary key to be synced incrementally.")
+        key_column = key_columns[0]
+        watermark = watermark or key_column
+
+        state = CheckpointStore(state_file)
+        job_id = f"sync {sql.describe()}/{table}/{watermark} -> {mongo_db.name}.{collection_name}"
+        saved = state.get(job_id)
+        since = saved[0] if saved else None
+        target = mongo_db[collection_name]
+        initial_load = saved is None and target.estimated_document_count() == 0
+        if initial_load:
+            reporter.log(f"Starting sync: first load of table '{table}' into '{collection_name}'...")
+        elif since is None:
+            reporter.log(f"Starting sync: no watermark saved yet, upserting every row of '{table}' into '{collection_name}'...")
+        else:
+            reporter.log(f"Starting sync: rows of '{table}' with {watermark} >= {since!r} into '{collection_name}'...")
+
+        # 1. Select the changed rows, oldest change first
+        table_sql = quote_sql_identifier(table, sql_type)
+        watermark_sql = quote_sql_identifier(watermark, sql_type)
+        query = f"SELECT * FROM {table_sql}"
+        params = None
+        if since is not None:
+            query += f" WHERE {watermark_sql} >= {param_placeholder(sql_type)}"
+            params = (since,)
+        total_rows = count_sql_rows(conn, sql_type, query, params)
+        if total_rows is not None:
+            reporter.log(f"{total_rows} rows to sync.")
+        chunks = iter_sql_chunks(conn, sql_type, f"{query} ORDER BY {watermark_sql}", params=params)
+
+        # 2. Upsert them on the primary key, saving the watermark as chunks are committed
+        ensure_mongo_unique_index(target, key_column)
+        type_plan = MongoTypePlan(native_datetimes=native_datetimes)
+
+        def report_progress(written):
+            if total_rows:
+                reporter.progress(min(written / total_rows * 100, 100))
+
+        def prepare(chunk):
+            changes = chunk[watermark].dropna()
+            return type_plan.apply(chunk), _scalar(changes.iloc[-1]) if not changes.empty else None
+
+        rows_read = 0
+        last_change = since
+        records = iter_pipelined(chunks, prepare)
+        with closing(records), MongoBulkWriter(target, relaxed_write_concern=relaxed_writes, on_progress=report_progress,
+                                               upsert_key=None if initial_load else key_column) as writer:
+            pending = _PendingCheckpoints(writer, lambda last_key, rows: state.save(job_id, last_key, rows))
+            for docs, chunk_change in records:
+                futures = writer.add(docs)
+                rows_read += len(docs)
+                if chunk_change is not None:
+                    last_change = chunk_change
+                if last_change is not None:
+                    pending.add(futures, last_change, rows_read)
+        if last_change is not None:
+            state.save(job_id, last_change, rows_read)
+
+        if initial_load:
+            reporter.log(f"Inserted {writer.summary()} into '{collection_name}'.")
+        else:
+            reporter.log(f"Upserted {writer.summary()} into '{collection_name}' ({writer.upserted} new).")
+        if writer.failed:
+            reporter.log(f"WARNING: {writer.failed} documents were rejected by MongoDB. First error: {writer.first_error()}")
+        reporter.progress(100)
+        reporter.notify("Sync Complete", f"Synced {writer.inserted} changed rows of '{table}' to MongoDB collection '{collection_name}'.")
+        return writer.inserted
+    finally:
+        if chunks is not None:
+            chunks.close()
+        conn.close()
+
+
+def sync_mongo_to_sql(mongo_db, sql, reporter, collection, watermark='_id', output=None,
+                      state_file=DEFAULT_SYNC_STATE_FILE):
+    """
+    Copies the documents of a collection that changed since the previous sync
+    into the SQL table named after it, upserting them on `_id`. Changed
+    documents are found with the `watermark` field: `_id` picks up new
+    documents, a field such as updated_at also picks up modified ones.
+    Documents whose watermark equals the saved one are read again; deleted
+    documents are not propagated. For SQLite the table lives in `output` or
+    '<collection>_from_mongo.db', which is kept between syncs. Returns the
+    number of synced rows.
+    """
+    sql_type = sql.sql_type
+    table_name_sql = sanitize_sql_name(collection)
+    output_db_path = Path(output or f"{collection}_from_mongo.db") if sql_type == "SQLite" else None
+    target_name = f"SQLite:{output_db_path.resolve()}" if output_db_path else sql.describe()
+    state = CheckpointStore(state_file)
+    job_id = f"sync {mongo_db.name}.{collection}/{watermark} -> {target_name}/{table_name_sql}"
+    saved = state.get(job_id)
+    since = saved[0] if saved else None
+    if since is None:
+        reporter.log(f"Starting sync: no watermark saved yet, syncing every document of '{collection}' to table '{table_name_sql}'...")
+    else:
+        reporter.log(f"Starting sync: documents of '{collection}' with {watermark} >= {since!r} to table '{table_name_sql}'...")
+
+    source = mongo_db[collection]
+    if watermark != '_id' and not any(index['key'][0][0] == watermark for index in source.index_information().values()):
+        reporter.log(f"WARNING: '{collection}' has no index on '{watermark}', so every sync scans the whole collection.")
+
+    conn = None
+    try:
+        # 1. Open the SQL target, keeping the rows of the previous syncs; new columns are typed from a sample
+        schema = infer_sql_schema(sample_mongo_documents(source))
+        if sql_type == "SQLite":
+            conn = sqlite3.connect(output_db_path)
+            writer = SQLBatchWriter(conn, sql_type, table_name_sql, if_exists='append', upsert_key='_id', schema=schema)
+        else: # PostgreSQL, MySQL or SQL Server
+            writer = SQLBatchWriter(sql.engine(), sql_type, table_name_sql, if_exists='append', upsert_key='_id',
+                                    schema=schema)
+        writer.resume()
+
+        # 2. Upsert the changed documents page by page, oldest change first, saving the watermark of each page
+        query = {watermark: {'$gte': since}} if since is not None else None
+        total_docs = source.count_documents(query or {})
+        reporter.log(f"{total_docs} documents to sync.")
+        flattener = DocumentFlattener()
+
+        def prepare(batch):
+            changes = [_field_value(doc, watermark) for doc in batch]
+            return flattener.flatten(batch), next((value for value in reversed(changes) if value is not None), None)
+
+        rows_written = 0
+        last_change = since
+        pages = iter_pipelined(iter_mongo_batches(source, query=query, sort=[(watermark, 1)]), prepare)
+        with closing(pages):
+            for df, page_change in pages:
+                rows_written = writer.write(df)
+                if page_change is not None:
+                    last_change = page_change
+                if last_change is not None:
+                    state.save(job_id, last_change, rows_written)
+                if total_docs:
+                    reporter.progress(min(rows_written / total_docs * 100, 100))
+        reporter.progress(100)
+        reporter.log(f"Upserted {rows_written} rows into table '{table_name_sql}'.")
+        reporter.notify("Sync Complete", f"Synced {rows_written} changed documents of '{collection}' to {sql_type} table '{table_name_sql}'.")
+        return rows_written
+    finally:
+        if conn:
+            conn.close()
+
+
+def _copy_table_indexes(sql, table, target, target_table, reporter):
+    """Builds the primary key and indexes of a source table on the table it was copied into."""
+    target_conn = target.open_connection() if target.sql_type == "SQLite" else None
+    try:
+        indexes = sql_table_indexes(sql.engine(), table)
+        writer = SQLBatchWriter(target_conn or target.engine(), target.sql_type, target_table, if_exists='append')
+        writer.resume()
+        errors = writer.build_indexes(indexes)
+    except Exception as e:
+        reporter.log(f"WARNING: The indexes of table '{table}' were not copied to '{target_table}': {e}")
+        return
+    finally:
+        if target_conn:
+            target_conn.close()
+    if indexes:
+        reporter.log(f"Indexed table '{target_table}' like table '{table}' ({len(indexes)} indexes and keys).")
+    for error in errors:
+        reporter.log(f"WARNING: Index {error} on table '{target_table}'.")
+
+
+def _copy_sql_rows(sql, target, query, target_table, table=None, on_progress=None):
+    """
+    Streams the rows of a query into a new target table, replacing any table of
+    that name. Columns are typed from the source table's metadata when `table`
+    is given, else from the first rows. Returns the number of rows written, or
+    None if the source is empty and no table was created.
+    """
+    conn = sql.connect()
+    batches = iter_sql_row_batches(conn, sql.sql_type, query)
+    writer = SQLRowWriter(target, target_table)
+    try:
+        first = next(batches, None)
+        if first is None:
+            return None
+        columns, rows = first
+        column_types = table_column_types(sql.engine(), table, target.sql_type) if table else {}
+        fallback = row_column_types(columns, rows, target.sql_type)
+        writer.create({column: column_types.get(column, fallback[column]) for column in columns})
+
+        def pages():
+            yield rows
+            for _, more_rows in batches:
+                yield more_rows
+
+        # The next pages are read and converted while one is written
+        with closing(iter_pipelined(pages(), writer.prepare)) as prepared:
+            for page in prepared:
+                rows_written = writer.send(page)
+                if on_progress:
+                    on_progress(rows_written)
+        return writer.rows_written
+    finally:
+        writer.close()
+        batches.close() # Releases the server-side cursor
+        conn.close()
+
+
+def _check_distinct_sql_target(sql, target, pairs):
+    """Raises ValueError if a copy would read and replace the same table."""
+    if sql.describe() == target.describe():
+        same = [source for source, target_table in pairs if source and source.lower() == target_table.lower()]
+        if same:
+            raise ValueError(f"Table '{same[0]}' can't be copied onto itself. Choose another target database or table name.")
+
+
+def sql_to_sql(sql, target, reporter, table=None, query=None, target_table=None):
+    """
+    Copies a table, or the result of a custom query, into a table of another
+    SQL database (`target`, SQLSettings), of the same or another dialect. The
+    target table defaults to the source table's name. Rows stream from a
+    server-side cursor into the target's bulk-load path as plain tuples; the
+    columns of a table are typed from its reflected metadata, and the table's
+    primary key and indexes are rebuilt once the rows are in. Returns the
+    number of copied rows, or None if nothing was copied.
+    """
+    whole_table = table and not query
+    query = _source_query(sql.sql_type, table, query)
+    target_table = sanitize_sql_name(target_table or table or '')
+    if not target_table:
+        raise ValueError("A target table name is required for a custom query.")
+    _check_distinct_sql_target(sql, target, [(table if whole_table else None, target_table)])
+
+    reporter.log(f"Starting copy: {sql.sql_type} source to {target.sql_type} table '{target_table}'...")
+    with closing(target.connect()) as target_conn:
+        existing_tables = {name.lower() for name in list_sql_tables(target_conn, target.sql_type)}
+    if target_table.lower() in existing_tables:
+        if not reporter.confirm("Confirm Overwrite", f"Table '{target_table}' already exists in the target database. Overwrite it?"):
+            reporter.log("Copy cancelled by user.")
+            return None
+
+    with closing(sql.connect()) as conn:
+        total_rows = count_sql_rows(conn, sql.sql_type, query)
+    if total_rows is not None:
+        reporter.log(f"Source has {total_rows} rows. Streaming in batches of {SQL_FETCH_BATCH_SIZE}.")
+
+    def report_progress(rows):
+        if total_rows:
+            reporter.progress(min(rows / total_rows * 100, 100))
+
+    rows_written = _copy_sql_rows(sql, target, query, target_table, table if whole_table else None, report_progress)
+    if rows_written is None:
+        reporter.log("Warning: Source is empty. Nothing to copy.")
+        reporter.notify("Complete", "The source table/query is empty. No data was copied.")
+        return None
+    reporter.log(f"✅ Successfully copied {rows_written} rows into table '{target_table}'.")
+    if whole_table:
+        _copy_table_indexes(sql, table, target, target_table, reporter)
+    reporter.progress(100)
+    reporter.notify("Success", f"Successfully copied {rows_written} rows to {target.sql_type} table '{target_table}'.")
+    return rows_written
+
+
+def sql_db_to_sql(sql, target, reporter, workers=DEFAULT_PARALLEL_WORKERS):
+    """
+    Copies every table of a SQL database into a table of the same name in
+    `target` (SQLSettings), several tables at once, and rebuilds their keys
+    and indexes (see sql_to_sql). A SQLite target is written one table at a
+    time, as it allows a single writer. Returns a TransferSummary.
+    """
+    with closing(sql.connect()) as conn:
+        tables_to_copy = list_sql_tables(conn, sql.sql_type)
+        table_sizes = estimate_table_sizes(conn, sql.sql_type, tables_to_copy)
+    if not tables_to_copy:
+        reporter.notify("No Tables", "No tables found in the selected SQL database to copy.")
+        return TransferSummary(0, 0, [])
+    target_names = {t: sanitize_sql_name(t) for t in tables_to_copy}
+    _check_distinct_sql_target(sql, target, target_names.items())
+
+    # --- Ask for overwrite strategy once ---
+    overwrite = reporter.confirm("Confirm Overwrite Strategy", "For tables that already exist in the target database, do you want to Overwrite them?\n\n- 'Yes' to Overwrite existing tables.\n- 'No' to Skip existing tables.")
+    reporter.log(f"Starting full database copy ({len(tables_to_copy)} tables) to {target.sql_type} with strategy: {'Overwrite' if overwrite else 'Skip'}.")
+    with closing(target.connect()) as target_conn:
+        existing_tables = {name.lower() for name in list_sql_tables(target_conn, target.sql_type)}
+    tables_to_skip = [t for t in tables_to_copy if target_names[t].lower() in existing_tables and not overwrite]
+    for table_name in tables_to_skip:
+        reporter.log(f"Skipping table '{table_name}' as it already exists in the target database.")
+    tables_to_copy = sorted((t for t in tables_to_copy if t not in tables_to_skip), key=lambda t: table_sizes[t], reverse=True)
+
+    workers = 1 if target.sql_type == "SQLite" else max(1, min(clamp_workers(workers), len(tables_to_copy) or 1))
+    reporter.log(f"Copying {len(tables_to_copy)} tables with {workers} parallel worker(s), largest first.")
+
+    def copy_table(table_name):
+        """Copies one table and its indexes. Returns the number of rows copied, or None if the table is empty."""
+        reporter.log(f"Copying table '{table_name}'...")
+        logged_steps = 0
+
+        def report_progress(rows):
+            nonlocal logged_steps
+            if rows // TABLE_PROGRESS_LOG_ROWS > logged_steps:
+                logged_steps = rows // TABLE_PROGRESS_LOG_ROWS
+                reporter.log(f"  '{table_name}': {rows} rows copied so far...")
+
+        query = _source_query(sql.sql_type, table_name, None)
+        rows_written = _copy_sql_rows(sql, target, query, target_names[table_name], table_name, report_progress)
+        if rows_written is not None:
+            _copy_table_indexes(sql, table_name, target, target_names[table_name], reporter)
+        return rows_written
+
+    copied_count = 0
+    failed_tables = []
+    if tables_to_copy:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(copy_table, t): t for t in tables_to_copy}
+            for done, future in enumerate(as_completed(futures), start=1):
+                table_name = futures[future]
+                try:
+                    rows_written = future.result()
+                    if rows_written is None:
+                        reporter.log(f"Table '{table_name}' is empty. Skipping.")
+                    else:
+                        reporter.log(f"✅ Successfully copied {rows_written} rows into '{target_names[table_name]}'.")
+                        copied_count += 1
+                except Exception as e:
+                    failed_tables.append(table_name)
+                    reporter.log(f"ERROR copying table '{table_name}': {e}")
+                reporter.progress(done / len(futures) * 100)
+
+    summary = TransferSummary(copied_count, len(tables_to_skip), failed_tables)
+    reporter.progress(100)
+    reporter.log("Full database copy finished.")
+    reporter.notify("Copy Complete", f"Finished copying database.\n\n- Copied: {summary.converted} tables\n- Skipped: {summary.skipped} tables\n- Failed: {len(summary.failed)} tables")
+    return summary
+
+
+def _mongo_seeds(client):
+    """
+    Returns the (host, port) servers a client knows, without waiting for server
+    selection, or None if they can't be told. Unlike `client.address`, this
+    also works with several mongos routers.
+    """
+    try:
+        return set(client.topology_description.server_descriptions())
+    except Exception:
+        return None
+
+
+def _check_distinct_mongo_target(mongo_db, target_db, pairs):
+    """
+    Raises ValueError if a copy would read and replace the same collection.
+    Clients that share a server are the same cluster; when their servers
+    can't be told, same-named collections of same-named databases are refused.
+    """
+    source_seeds, target_seeds = _mongo_seeds(mongo_db.client), _mongo_seeds(target_db.client)
+    same_cluster = source_seeds is None or target_seeds is None or bool(source_seeds & target_seeds)
+    if mongo_db.name == target_db.name and same_cluster:
+        same = [source for source, target in pairs if source == target]
+        if same:
+            raise ValueError(f"Collection '{same[0]}' can't be copied onto itself. Choose another target database or collection name.")
+
+
+def _create_mongo_target(source, target_db, name, reporter):
+    """Creates the target collection with the options of the source (capped, validator, collation, ...)."""
+    try:
+        target_db.create_collection(name, **mongo_collection_options(source))
+    except Exception as e: # e.g. an option the target server doesn't support; the inserts create a plain collection
+        reporter.log(f"WARNING: Collection '{name}' was created without the options of '{source.name}': {e}")
+
+
+def _replicate_collection_indexes(source, target, reporter):
+    """Builds the indexes of a source collection on the collection it was copied into."""
+    try:
+        count, errors = replicate_mongo_indexes(source, target)
+    except Exception as e:
+        reporter.log(f"WARNING: The indexes of collection '{source.name}' were not copied to '{target.name}': {e}")
+        return
+    if count:
+        reporter.log(f"Indexed '{target.name}' like '{source.name}' ({count} indexes).")
+    for error in errors:
+        reporter.log(f"WARNING: Index {error} on '{target.name}'.")
+
+
+def _copy_raw_documents(source, target, relaxed_writes=False, on_progress=None, splits=None):
+    """
+    Copies the documents of a collection as raw BSON, never decoding them, with
+    unordered insert_many batches. With `splits` (see mongo_id_splits), the
+    `_id` ranges between them are read in parallel. Returns the MongoBulkWriter.
+    """
+    raw_source = raw_bson_collection(source)
+    with MongoBulkWriter(target, relaxed_write_concern=relaxed_writes, on_progress=on_progress,
+                         workers=max(MONGO_WRITE_WORKERS, len(splits or ()) + 1)) as writer:
+        if splits:
+            batches = iter_mongo_partitions(raw_source, mongo_id_ranges(splits))
+            with closing(batches):
+                for _, docs, _ in batches:
+                    writer.add(docs)
+        else:
+            with closing(iter_pipelined(iter_mongo_batches(raw_source))) as batches: # Reads ahead of the inserts
+                for docs in batches:
+                    writer.add(docs)
+    return writer
+
+
+def mongo_to_mongo(mongo_db, target_db, reporter, collection, target_collection=None, workers=1, relaxed_writes=False):
+    """
+    Copies a collection into a collection of another MongoDB database
+    (`target_db`, e.g. on another cluster), named `target_collection` or like
+    the source. Documents travel as raw BSON, without being decoded or
+    re-encoded. The target is created with the options of the source, and its
+    indexes are rebuilt once the documents are in. With `workers` > 1, the
+    collection is read as that many parallel `_id` ranges. Returns the number
+    of copied documents, or None if nothing was copied.
+    """
+    target_name = target_collection or collection
+    _check_distinct_mongo_target(mongo_db, target_db, [(collection, target_name)])
+    reporter.log(f"Starting copy: MongoDB collection '{collection}' to '{target_db.name}.{target_name}'...")
+
+    source = mongo_db[collection]
+    if source.find_one(projection={'_id': 1}) is None:
+        reporter.log("Warning: Collection is empty. Nothing to copy.")
+        reporter.notify("Complete", "The MongoDB collection is empty. No data was copied.")
+        return None
+    if target_name in target_db.list_collection_names():
+        if not reporter.confirm("Confirm Overwrite", f"Collection '{target_name}' already exists in the target database. Overwrite it?"):
+            reporter.log("Copy cancelled by user.")
+            return None
+        target_db.drop_collection(target_name)
+        reporter.log(f"Dropped existing collection '{target_name}'.")
+    _create_mongo_target(source, target_db, target_name, reporter)
+
+    total_docs = source.estimated_document_count()
+    reporter.log(f"Source has about {total_docs} documents. Copying them as raw BSON.")
+
+    def report_progress(inserted):
+        if total_docs:
+            reporter.progress(min(inserted / total_docs * 100, 100))
+
+    splits = mongo_id_splits(source, clamp_workers(workers)) if workers > 1 else None
+    if splits:
+        reporter.log(f"Reading the collection as {len(splits) + 1} parallel _id ranges.")
+    target = target_db[target_name]
+    writer = _copy_raw_documents(source, target, relaxed_writes, report_progress, splits)
+    reporter.log(f"✅ Successfully copied {writer.summary()} into '{target_name}'.")
+    if writer.failed:
+        reporter.log(f"WARNING: {writer.failed} documents were rejected by MongoDB. First error: {writer.first_error()}")
+    _replicate_collection_indexes(source, target, reporter)
+    reporter.progress(100)
+    reporter.notify("Success", f"Successfully copied {writer.inserted} documents to collection '{target_name}'.")
+    return writer.inserted
+
+
+def mongo_db_to_mongo(mongo_db, target_db, reporter, workers=DEFAULT_PARALLEL_WORKERS, relaxed_writes=False):
+    """
+    Copies every collection of a MongoDB database into `target_db`, several
+    collections at once, as raw BSON (see mongo_to_mongo); the indexes of each
+    collection are rebuilt once it is loaded. Views are recreated on the
+    copied collections afterwards. Returns a TransferSummary.
+    """
+    collections, views = [], []
+    for info in mongo_db.list_collections():
+        if info['name'].startswith('system.'):
+            continue
+        (views if info.get('type') == 'view' else collections).append(info['name'])
+    if not collections and not views:
+        reporter.notify("No Collections", f"No collections found in MongoDB database '{mongo_db.name}' to copy.")
+        return TransferSummary(0, 0, [])
+    _check_distinct_mongo_target(mongo_db, target_db, [(name, name) for name in collections + views])
+
+    # --- Ask for overwrite strategy once ---
+    overwrite = reporter.confirm("Confirm Overwrite Strategy", f"This will copy {len(collections) + len(views)} collections to database '{target_db.name}'. For collections that already exist there, do you want to Overwrite them?\n\n- 'Yes' to Overwrite existing collections.\n- 'No' to Skip existing collections.")
+    reporter.log(f"Starting full MongoDB copy ({len(collections)} collections, {len(views)} views) with strategy: {'Overwrite' if overwrite else 'Skip'}.")
+    existing = set(target_db.list_collection_names())
+    skipped = [name for name in collections + views if name in existing and not overwrite]
+    for name in skipped:
+        reporter.log(f"Skipping collection '{name}' as it already exists in the target database.")
+    collections = [name for name in collections if name not in skipped]
+    views = [name for name in views if name not in skipped]
+
+    # Largest collections first, so the long ones don't all finish last
+    sizes = {name: mongo_db[name].estimated_document_count() for name in collections}
+    collections.sort(key=lambda name: sizes[name], reverse=True)
+    workers = max(1, min(clamp_workers(workers), len(collections) or 1))
+    reporter.log(f"Copying {len(collections)} collections with {workers} parallel worker(s), largest first.")
+
+    def copy_collection(name):
+        """Copies one collection and its indexes. Returns its MongoBulkWriter."""
+        reporter.log(f"Copying collection '{name}'...")
+        source = mongo_db[name]
+        if name in existing:
+            target_db.drop_collection(name)
+        _create_mongo_target(source, target_db, name, reporter)
+        logged_steps = 0
+
+        def report_progress(inserted):
+            nonlocal logged_steps
+            if inserted // TABLE_PROGRESS_LOG_ROWS > logged_steps:
+                logged_steps = inserted // TABLE_PROGRESS_LOG_ROWS
+                reporter.log(f"  '{name}': {inserted} documents copied so far...")
+
+        writer = _copy_raw_documents(source, target_db[name], relaxed_writes, report_progress)
+        _replicate_collection_indexes(source, target_db[name], reporter)
+        return writer
+
+    copied_count = 0
+    failed = []
+    if collections:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(copy_collection, name): name for name in collections}
+            for done, future in enumerate(as_completed(futures), start=1):
+                name = futures[future]
+                try:
+                    writer = future.result()
+                    reporter.log(f"✅ Successfully copied {writer.summary()} into '{name}'.")
+                    if writer.failed:
+                        reporter.log(f"WARNING: {writer.failed} documents of '{name}' were rejected by MongoDB. First error: {writer.first_error()}")
+                    copied_count += 1
+                except Exception as e:
+                    failed.append(name)
+                    reporter.log(f"ERROR copying collection '{name}': {e}")
+                reporter.progress(done / len(futures) * 100)
+
+    # --- Recreate the views once the collections they read are in place ---
+    for name in views:
+        try:
+            options = mongo_db[name].options()
+            if name in existing:
+                target_db.drop_collection(name)
+            target_db.create_collection(name, viewOn=options['viewOn'], pipeline=options.get('pipeline', []),
+                                        **({'collation': options['collation']} if 'collation' in options else {}))
+            reporter.log(f"✅ Created view '{name}' on '{options['viewOn']}'.")
+            copied_count += 1
+        except Exception as e:
+            failed.append(name)
+            reporter.log(f"ERROR creating view '{name}': {e}")
+
+    summary = TransferSummary(copied_count, len(skipped), failed)
+    reporter.progress(100)
+    reporter.log("Full MongoDB copy finished.")
+    reporter.notify("Copy Complete", f"Finished copying database.\n\n- Copied: {summary.converted} collections\n- Skipped: {summary.skipped} collections\n- Failed: {len(summary.failed)} collections")
+    return summary
+
+
+def _export_format(output, source):
+    """Returns the export format of `output` for a 'sql' or 'mongo' source, or raises ValueError."""
+    fmt = export_format(output)
+    if getattr(fmt, f'export_{source}') is None:
+        supported = ', '.join(f"{f.name} ({f.extensions[0]})" for f in EXPORT_FORMATS if getattr(f, f'export_{source}'))
+        kind = "SQL sources" if source == 'sql' else "MongoDB collections"
+        raise ValueError(f"{fmt.name} files cannot be exported from {kind}. Supported formats: {supported}.")
+    return fmt
+
+
+def export_sql_to_file(sql, reporter, output, table=None, query=None):
+    """
+    Streams a table, or the result of a custom query, into a file whose format
+    follows its extension: CSV (compressed when `output` ends in .gz or .zst),
+    Parquet (.parquet) or Arrow IPC (.arrow, .feather). Returns the number of
+    exported rows, or None when PostgreSQL's COPY did not report it.
+    """
+    sql_type = sql.sql_type
+    query = _source_query(sql_type, table, query)
+    fmt = _export_format(output, 'sql')
+    reporter.log(f"Starting export: {sql_type} source to {output} ({fmt.name})...")
+    conn = sql.connect()
+    try:
+        total_rows = None
+        if sql_type == "PostgreSQL" and fmt.name == "CSV":
+            reporter.log("Using PostgreSQL COPY ... TO STDOUT for the export.")
+        else:
+            total_rows = count_sql_rows(conn, sql_type, query)
+
+        def report_progress(rows):
+            if total_rows:
+                reporter.progress(min(rows / total_rows * 100, 100))
+
+        rows_exported = fmt.export_sql(conn, sql_type, query, output, on_progress=report_progress)
+    finally:
+        conn.close()
+    reporter.log(f"✅ Successfully exported {rows_exported if rows_exported is not None else 'all'} rows to {output}.")
+    reporter.progress(100)
+    reporter.notify("Success", f"Data successfully exported to:\n{output}")
+    return rows_exported
+
+
+def export_mongo_to_file(mongo_db, reporter, collection, output, fields=None, workers=1):
+    """
+    Streams a collection into a file whose format follows its extension: CSV
+    (compressed when `output` ends in .gz or .zst), JSON Lines (.jsonl) or a
+    BSON dump (.bson). CSV flattens the documents; the other two keep them
+    whole. Only `fields` are read when given. With `workers` > 1, the
+    collection is read as that many parallel `_id` ranges. Returns the number
+    of exported rows, or None if the collection is empty.
+    """
+    fmt = _export_format(output, 'mongo')
+    reporter.log(f"Starting export: MongoDB collection '{collection}' to {output} ({fmt.name})...")
+
+    # --- Check the source ---
+    source = mongo_db[collection]
+    if source.find_one(projection={'_id': 1}) is None:
+        reporter.log("Warning: Collection is empty. Nothing to export.")
+        reporter.notify("Complete", "The MongoDB collection is empty. No data was exported.")
+        return None
+
+    total_docs = source.estimated_document_count()
+    if fields:
+        reporter.log(f"Exporting only the fields: {', '.join(fields)}")
+    elif fmt.name == "CSV":
+        reporter.log(f"Building the CSV header from a sample of {MONGO_SAMPLE_SIZE} documents.")
+
+    def report_progress(rows):
+        if total_docs:
+            reporter.progress(min(rows / total_docs * 100, 100))
+
+    # --- Stream batches into the (optionally compressed) file ---
+    splits = mongo_id_splits(source, clamp_workers(workers)) if workers > 1 else None
+    if splits:
+        reporter.log(f"Reading the collection as {len(splits) + 1} parallel _id ranges.")
+
+    rows_exported, dropped_columns = fmt.export_mongo(source, output, fields=fields, on_progress=report_progress, splits=splits)
+    if dropped_columns:
+        reporter.log(f"WARNING: These fields were not in the CSV header and were left out: {', '.join(dropped_columns)}")
+    reporter.log(f"✅ Successfully exported {rows_exported} rows to {output}.")
+    reporter.progress(100)
+    reporter.notify("Success", f"Data successfully exported to:\n{output}")
+    return rows_exported
+
+
+# Former names, kept for existing callers and job files; the format still follows the extension
+export_sql_to_csv = export_sql_to_file
+export_mongo_to_csv = export_mongo_to_file
+
+
+def _group_import_files(paths, target):
+    """Returns {target name: [files]}: every file into `target` when given, else each into the name of its file."""
+    files_by_target = {}
+    for path in paths:
+        files_by_target.setdefault(target or import_target_name(path), []).append(path)
+    return files_by_target
+
+
+def _import_pages(fmt, path, frames, native_datetimes=False):
+    """
+    Reads a file as pipelined pages: DataFrames for SQL targets (`frames`), else
+    lists of documents for MongoDB. Documents are flattened for SQL and tables
+    converted with a MongoTypePlan for MongoDB; BSON dumps go to MongoDB raw.
+    """
+    if frames:
+        if fmt.frames:
+            return iter_pipelined(fmt.frames(path))
+        return iter_pipelined(fmt.documents(path), DocumentFlattener().flatten)
+    if fmt.documents:
+        return iter_pipelined(fmt.documents(path, raw=True))
+    return iter_pipelined(fmt.frames(path), MongoTypePlan(native_datetimes=native_datetimes).apply)
+
+
+def import_files_to_mongo(mongo_db, reporter, paths, collection=None, workers=DEFAULT_PARALLEL_WORKERS,
+                          relaxed_writes=False, native_datetimes=False):
+    """
+    Loads CSV, Parquet, Arrow IPC, JSON Lines or BSON files (by extension) into
+    MongoDB, each file into the collection named after it, or every file into
+    `collection`. Files are read page by page and inserted with MongoBulkWriter;
+    collections load in parallel, and the files of one collection one after
+    another. Returns a TransferSummary of the collections.
+    """
+    formats = {path: import_format(path) for path in paths} # Fails before loading anything
+    files_by_target = _group_import_files(paths, collection)
+    existing = [name for name in files_by_target if name in mongo_db.list_collection_names()]
+    overwrite = bool(existing) and reporter.confirm("Confirm Overwrite Strategy", f"These collections already exist: {', '.join(existing)}. Do you want to Overwrite them?\n\n- 'Yes' to Overwrite existing collections.\n- 'No' to Append to them.")
+    reporter.log(f"Starting import of {len(paths)} files into {len(files_by_target)} MongoDB collections with strategy: {'Overwrite' if overwrite else 'Append'}.")
+    workers = max(1, min(clamp_workers(workers), len(files_by_target)))
+
+    def load_collection(name):
+        """Inserts the files of one collection. Returns the number of inserted documents."""
+        target = mongo_db[name]
+        if overwrite and name in existing:
+            target.drop()
+            reporter.log(f"Dropped existing collection '{name}'.")
+        with MongoBulkWriter(target, relaxed_write_concern=relaxed_writes) as writer:
+            for path in files_by_target[name]:
+                reporter.log(f"Importing '{path}' ({formats[path].name}) into collection '{name}'...")
+                with closing(_import_pages(formats[path], path, frames=False, native_datetimes=native_datetimes)) as pages:
+                    for docs in pages:
+                        writer.add(docs)
+        reporter.log(f"✅ Imported {writer.summary()} into '{name}'.")
+        if writer.failed:
+            reporter.log(f"WARNING: {writer.failed} documents were rejected by MongoDB. First error: {writer.first_error()}")
+        return writer.inserted
+
+    reporter.log(f"Importing with {workers} parallel worker(s).")
+    converted, failed = 0, []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(load_collection, name): name for name in files_by_target}
+        for done, future in enumerate(as_completed(futures), start=1):
+            try:
+                future.result()
+                converted += 1
+            except Exception as e:
+                failed.append(futures[future])
+                reporter.log(f"ERROR importing into collection '{futures[future]}': {e}")
+            reporter.progress(done / len(futures) * 100)
+
+    summary = TransferSummary(converted, 0, failed)
+    reporter.log("File import finished.")
+    reporter.notify("Import Complete", f"Finished importing {len(paths)} files.\n\n- Loaded: {summary.converted} collections\n- Failed: {len(summary.failed)} collections")
+    return summary
+
+
+def import_files_to_sql(sql, reporter, paths, table=None, workers=DEFAULT_PARALLEL_WORKERS, output=None):
+    """
+    Loads CSV, Parquet, Arrow IPC, JSON Lines or BSON files (by extension) into
+    SQL tables, each file into the table named after it, or every file into
+    `table`. Documents are flattened like a MongoDB collection would be. Tables
+    load in parallel, the files of one table one after another, through the
+    same writers as the MongoDB conversions: a pooled engine on a server, a
+    single writer thread for SQLite, whose target is `output` or the settings'
+    database file (tuned for bulk loading only if the import creates it).
+    Returns a TransferSummary of the tables.
+    """
+    sql_type = sql.sql_type
+    formats = {path: import_format(path) for path in paths} # Fails before loading anything
+    files_by_target = _group_import_files(paths, table and sanitize_sql_name(table))
+    if sql_type == "SQLite" and not (output or sql.sqlite_path):
+        raise ValueError("A SQLite database file is required as the import target.")
+    workers = max(1, min(clamp_workers(workers), len(files_by_target)))
+
+    engine = None
+    conn = None
+    sqlite_writer = None
+    try:
+        if sql_type == "SQLite":
+            db_path = Path(output or sql.sqlite_path)
+            created = not db_path.exists()
+            conn = sqlite3.connect(db_path, check_same_thread=False)
+            if created: # An existing database keeps its own durability settings
+                tune_sqlite_for_bulk_load(conn)
+        else:
+            engine = sql.engine() # Shared pool: each worker checks out its own connection
+        existing = [name for name in files_by_target if name in list_target_tables(conn or engine, sql_type)]
+        overwrite = bool(existing) and reporter.confirm("Confirm Overwrite Strategy", f"These tables already exist: {', '.join(existing)}. Do you want to Overwrite them?\n\n- 'Yes' to Overwrite existing tables.\n- 'No' to Append to them.")
+        reporter.log(f"Starting import of {len(paths)} files into {len(files_by_target)} {sql_type} tables with strategy: {'Overwrite' if overwrite else 'Append'}.")
+        if_exists = 'replace' if overwrite else 'append'
+        if sql_type == "SQLite": # SQLite allows a single writer: the readers feed one writer thread through a queue
+            sqlite_writer = SingleWriterQueue(lambda name: SQLBatchWriter(conn, sql_type, name, if_exists=if_exists))
+
+        def load_table(name):
+            """Writes the files of one table. Returns the number of rows read."""
+            if sqlite_writer:
+                write = lambda df: sqlite_writer.write(name, df)
+            else: # The files of a table share one writer, so only the first one replaces the table
+                write = SQLBatchWriter(engine, sql_type, name, if_exists=if_exists).write
+            rows_read = 0
+            for path in files_by_target[name]:
+                reporter.log(f"Importing '{path}' ({formats[path].name}) into table '{name}'...")
+                with closing(_import_pages(formats[path], path, frames=True)) as pages:
+                    for df in pages:
+                        write(df)
+                        rows_read += len(df)
+            return rows_read
+
+        reporter.log(f"Importing with {workers} parallel worker(s).")
+        results = {}
+        failed = []
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(load_table, name): name for name in files_by_target}
+            for done, future in enumerate(as_completed(futures), start=1):
+                try:
+                    results[futures[future]] = future.result()
+                except Exception as e:
+                    failed.append(futures[future])
+                    reporter.log(f"ERROR importing into table '{futures[future]}': {e}")
+                reporter.progress(done / len(futures) * 100)
+
+        if sqlite_writer:
+            sqlite_writer.close() # Flush the pages still queued for the SQLite writer
+            for name in list(results):
+                if name in sqlite_writer.errors:
+                    del results[name]
+                    failed.append(name)
+                    reporter.log(f"ERROR importing into table '{name}': {sqlite_writer.errors[name]}")
+            sqlite_writer = None
+        for name, rows_read in results.items():
+            reporter.log(f"✅ Successfully wrote {rows_read} rows to table '{name}'.")
+
+        summary = TransferSummary(len(results), 0, failed)
+        reporter.log("File import finished.")
+        reporter.notify("Import Complete", f"Finished importing {len(paths)} files.\n\n- Loaded: {summary.converted} tables\n- Failed: {len(summary.failed)} tables")
+        return summary
+    finally:
+        if sqlite_writer: # Only set here if the import failed before it was flushed
+            sqlite_writer.close()
+        if conn:
+            conn.close()
@@ -0,0 +1,320 @@
+"""
+File exports, streamed so that memory use does not grow with the source. SQL
+results can be written as CSV, Parquet or Arrow IPC files, MongoDB collections
+as CSV, JSON Lines or BSON dumps. The format follows the file's extension (see
+EXPORT_FORMATS); text formats are compressed while they are written when the
+name ends in .gz or .zst.
+"""
+import gzip
+import io
+from pathlib import Path
+from typing import Callable, NamedTuple, Optional
+
+import pandas as pd
+from bson import json_util
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+
+from .mongo import (DocumentFlattener, iter_mongo_batches, iter_mongo_partitions, mongo_id_ranges, mongo_projection,
+                    sample_mongo_columns)
+from .sql import iter_sql_chunks
+
+ZSTD_AVAILABLE = False
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    pass # .csv.zst exports will report the missing package
+
+PYARROW_AVAILABLE = False
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pass # Parquet and Arrow exports will report the missing package
+
+ARROW_ROW_GROUP_ROWS = 131072 # Rows per Parquet row group / Arrow record batch
+ARROW_COMPRESSION = 'zstd'
+
+
+def open_export_file(path, encoding='utf-8-sig', binary=False):
+    """
+    Opens a file for writing, compressed with gzip (.gz) or zstd (.zst) according to its extension.
+    The file is opened in text mode unless `binary` is set.
+    """
+    suffix = Path(path).suffix.lower()
+    text_options = {} if binary else {'encoding': encoding, 'newline': ''}
+    if suffix == '.gz':
+        return gzip.open(path, 'wb' if binary else 'wt', **text_options)
+    if suffix == '.zst':
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("Zstandard compression requires the 'zstandard' package. Run 'pip install zstandard' to enable it.")
+        stream = zstandard.ZstdCompressor().stream_writer(open(path, 'wb'))
+        return stream if binary else io.TextIOWrapper(stream, **text_options)
+    return open(path, 'wb' if binary else 'w', **text_options)
+
+
+def _query_columns(conn, sql_type, query):
+    """Returns the column names of a query's result, running it once just for its description."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query)
+        return [col[0] for col in cursor.description] if cursor.description else []
+    finally:
+        if sql_type == "MySQL" and conn.unread_result:
+            conn.consume_results()
+        cursor.close()
+
+
+def export_sql_to_csv_stream(conn, sql_type, query, out_file, on_progress=None):
+    """
+    Writes the result of a query to an open text file as CSV without holding it in memory.
+    PostgreSQL uses COPY ... TO STDOUT, other backends are streamed chunk by chunk.
+    Returns the number of exported rows, or None when the server did the export.
+    """
+    if sql_type == "PostgreSQL":
+        cursor = conn.cursor()
+        try:
+            cursor.copy_expert(f"COPY ({query.rstrip().rstrip(';')}) TO STDOUT WITH CSV HEADER", out_file)
+            return cursor.rowcount if cursor.rowcount >= 0 else None
+        finally:
+            cursor.close()
+
+    rows_written = 0
+    for chunk in iter_sql_chunks(conn, sql_type, query):
+        chunk.to_csv(out_file, header=rows_written == 0, index=False)
+        rows_written += len(chunk)
+        if on_progress:
+            on_progress(rows_written)
+    if rows_written == 0: # Still write the header, like a full read would
+        columns = _query_columns(conn, sql_type, query)
+        if columns:
+            pd.DataFrame(columns=columns).to_csv(out_file, index=False)
+    return rows_written
+
+
+def _arrow_table(df):
+    """Converts a page to an Arrow table; object columns Arrow cannot type (e.g. UUIDs) are exported as text."""
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        df = df.copy()
+        for position, column in enumerate(df.columns):
+            series = df.iloc[:, position]
+            if series.dtype == object:
+                try:
+                    pa.array(series, from_pandas=True)
+                except (pa.ArrowInvalid, pa.ArrowTypeError):
+                    df.iloc[:, position] = series.map(lambda value: value if value is None else str(value))
+        return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def _conform_table(table, schema, rows_before):
+    """Casts a row group to the schema of the first one, as the file has a single schema."""
+    if table.schema.equals(schema, check_metadata=False):
+        return table
+    columns = []
+    for position, field in enumerate(schema):
+        column = table.column(position)
+        if not column.type.equals(field.type):
+            try:
+                column = column.cast(field.type)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+                raise RuntimeError(f"Column '{field.name}' holds {column.type} values after row {rows_before}, "
+                                   f"but {field.type} values before; export to CSV instead. ({e})") from e
+        columns.append(column)
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def export_sql_to_arrow_stream(conn, sql_type, query, path, file_format='parquet', on_progress=None):
+    """
+    Writes the result of a query to a Parquet (`file_format='parquet'`) or Arrow
+    IPC (`'arrow'`) file, one row group of ARROW_ROW_GROUP_ROWS rows at a time,
+    compressed with zstd. The column types come from the first row group;
+    columns that are empty in it are typed as text. Returns the number of
+    exported rows.
+    """
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError("Parquet and Arrow exports require the 'pyarrow' package. Run 'pip install pyarrow' to enable them.")
+    writer = schema = None
+    pending = []
+    pending_rows = rows_written = 0
+
+    def write_row_group():
+        nonlocal writer, schema
+        table = _arrow_table(pd.concat(pending, ignore_index=True) if len(pending) > 1 else pending[0])
+        if writer is None:
+            schema = pa.schema([field.with_type(pa.string()) if pa.types.is_null(field.type) else field
+                                for field in table.schema], metadata=table.schema.metadata)
+            if file_format == 'parquet':
+                writer = pq.ParquetWriter(path, schema, compression=ARROW_COMPRESSION)
+            else:
+                writer = pa.ipc.new_file(path, schema, options=pa.ipc.IpcWriteOptions(compression=ARROW_COMPRESSION))
+        table = _conform_table(table, schema, rows_written - pending_rows)
+        if file_format == 'parquet':
+            writer.write_table(table, row_group_size=ARROW_ROW_GROUP_ROWS)
+        else:
+            writer.write_table(table, max_chunksize=ARROW_ROW_GROUP_ROWS)
+        pending.clear()
+
+    try:
+        for chunk in iter_sql_chunks(conn, sql_type, query):
+            pending.append(chunk)
+            pending_rows += len(chunk)
+            rows_written += len(chunk)
+            if pending_rows >= ARROW_ROW_GROUP_ROWS:
+                write_row_group()
+                pending_rows = 0
+            if on_progress:
+                on_progress(rows_written)
+        if pending:
+            write_row_group()
+        if writer is None: # Still write the columns, like a CSV header
+            pending.append(pd.DataFrame({column: pd.Series(dtype=object) for column in _query_columns(conn, sql_type, query)}))
+            write_row_group()
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows_written
+
+
+def export_mongo_to_csv_stream(collection, out_file, fields=None, on_progress=None, splits=None):
+    """
+    Writes a collection to an open text file as CSV, one cursor batch at a time.
+    Only `fields` leave the server when given, and they also form the header;
+    otherwise the header comes from a sample of the collection. With `splits`
+    (see mongo_id_splits), the _id ranges are read and flattened on parallel
+    cursors and the rows are written in the order they arrive. Returns the number
+    of exported rows and the sorted list of columns that were not in the header.
+    """
+    projection = mongo_projection(fields)
+    if fields:
+        header = [field.replace('.', '_') for field in fields]
+    else:
+        header = sample_mongo_columns(collection, projection)
+    pd.DataFrame(columns=header).to_csv(out_file, index=False)
+
+    if splits:
+        flatteners = [DocumentFlattener(sanitize_names=False) for _ in range(len(splits) + 1)]
+        frames = (df for _, df, _ in iter_mongo_partitions(collection, mongo_id_ranges(splits), projection=projection,
+                                                          transform=lambda index, batch: flatteners[index].flatten(batch)))
+    else:
+        flattener = DocumentFlattener(sanitize_names=False)
+        frames = (flattener.flatten(batch) for batch in iter_mongo_batches(collection, projection=projection))
+
+    rows_written = 0
+    dropped_columns = set()
+    header_columns = set(header)
+    for df in frames:
+        dropped_columns.update(col for col in df.columns if col not in header_columns)
+        df.reindex(columns=header).to_csv(out_file, header=False, index=False)
+        rows_written += len(df)
+        if on_progress:
+            on_progress(rows_written)
+    return rows_written, sorted(dropped_columns)
+
+
+def _mongo_export_batches(collection, projection, splits, encode):
+    """Yields (documents, encoded batch) pairs, encoded on parallel cursors when `splits` are given."""
+    if splits:
+        for _, (count, data), _ in iter_mongo_partitions(collection, mongo_id_ranges(splits), projection=projection,
+                                                         transform=lambda index, batch: (len(batch), encode(batch))):
+            yield count, data
+    else:
+        for batch in iter_mongo_batches(collection, projection=projection):
+            yield len(batch), encode(batch)
+
+
+def export_mongo_to_jsonl_stream(collection, out_file, fields=None, on_progress=None, splits=None):
+    """
+    Writes a collection to an open text file as JSON Lines, one document per
+    line in relaxed MongoDB Extended JSON, so nesting, ObjectIds and dates are
+    kept as they are (`mongoimport` reads the file back). Only `fields` are
+    exported when given. Returns the number of exported documents.
+    """
+    options = json_util.RELAXED_JSON_OPTIONS
+
+    def encode(batch):
+        return ''.join(json_util.dumps(doc, json_options=options) + '\n' for doc in batch)
+
+    rows_written = 0
+    for count, lines in _mongo_export_batches(collection, mongo_projection(fields), splits, encode):
+        out_file.write(lines)
+        rows_written += count
+        if on_progress:
+            on_progress(rows_written)
+    return rows_written
+
+
+def export_mongo_to_bson_stream(collection, out_file, fields=None, on_progress=None, splits=None):
+    """
+    Writes a collection to an open binary file as a BSON dump, the format of
+    `mongodump` that `mongorestore` loads. The documents are copied as the raw
+    BSON the server sent, without decoding them. Only `fields` are exported
+    when given. Returns the number of exported documents.
+    """
+    raw = collection.with_options(codec_options=CodecOptions(document_class=RawBSONDocument))
+    rows_written = 0
+    for count, data in _mongo_export_batches(raw, mongo_projection(fields), splits, lambda batch: b''.join(doc.raw for doc in batch)):
+        out_file.write(data)
+        rows_written += count
+        if on_progress:
+            on_progress(rows_written)
+    return rows_written
+
+
+def _sql_to_text(export):
+    def write(conn, sql_type, query, path, on_progress=None):
+        with open_export_file(path) as out_file:
+            return export(conn, sql_type, query, out_file, on_progress=on_progress)
+    return write
+
+
+def _sql_to_arrow(file_format):
+    def write(conn, sql_type, query, path, on_progress=None):
+        return export_sql_to_arrow_stream(conn, sql_type, query, path, file_format=file_format, on_progress=on_progress)
+    return write
+
+
+def _mongo_to_file(export, binary=False):
+    def write(collection, path, fields=None, on_progress=None, splits=None):
+        with open_export_file(path, encoding='utf-8', binary=binary) as out_file:
+            return export(collection, out_file, fields=fields, on_progress=on_progress, splits=splits), []
+    return write
+
+
+def _mongo_to_csv(collection, path, fields=None, on_progress=None, splits=None):
+    with open_export_file(path) as out_file:
+        return export_mongo_to_csv_stream(collection, out_file, fields=fields, on_progress=on_progress, splits=splits)
+
+
+class ExportFormat(NamedTuple):
+    """
+    A file format for exports. `export_sql(conn, sql_type, query, path,
+    on_progress)` returns the number of rows, or None when unknown;
+    `export_mongo(collection, path, fields, on_progress, splits)` returns the
+    number of documents and the columns left out of the file. A format that
+    cannot hold one of the two sources leaves its function as None.
+    """
+    name: str
+    extensions: tuple # Matched against the end of the file name, e.g. '.csv.gz'
+    export_sql: Optional[Callable] = None
+    export_mongo: Optional[Callable] = None
+
+
+EXPORT_FORMATS = (
+    ExportFormat("CSV", ('.csv', '.csv.gz', '.csv.zst'), _sql_to_text(export_sql_to_csv_stream), _mongo_to_csv),
+    ExportFormat("Parquet", ('.parquet',), export_sql=_sql_to_arrow('parquet')),
+    ExportFormat("Arrow IPC", ('.arrow', '.feather'), export_sql=_sql_to_arrow('arrow')),
+    ExportFormat("JSON Lines", ('.jsonl', '.jsonl.gz', '.jsonl.zst', '.ndjson'),
+                 export_mongo=_mongo_to_file(export_mongo_to_jsonl_stream)),
+    ExportFormat("BSON dump", ('.bson', '.bson.gz'), export_mongo=_mongo_to_file(export_mongo_to_bson_stream, binary=True)),
+)
+
+
+def export_format(path):
+    """Returns the ExportFormat of a file name, by its extension; other names are exported as CSV."""
+    name = str(path).lower()
+    matches = [(len(extension), fmt) for fmt in EXPORT_FORMATS for extension in fmt.extensions if name.endswith(extension)]
+    return max(matches, key=lambda match: match[0])[1] if matches else EXPORT_FORMATS[0]
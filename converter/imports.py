@@ -0,0 +1,149 @@
+"""
+File imports, the reverse of the exports: CSV, Parquet, Arrow IPC, JSON Lines
+and BSON files are read a page at a time, so a file of any size loads in
+constant memory. The format follows the file's extension (see IMPORT_FORMATS);
+text files ending in .gz or .zst are decompressed while they are read.
+"""
+import gzip
+import io
+from pathlib import Path
+from typing import Callable, NamedTuple, Optional
+
+import pandas as pd
+from bson import decode_file_iter, json_util
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+
+from .export import PYARROW_AVAILABLE, ZSTD_AVAILABLE
+from .mongo import MONGO_FETCH_BATCH_SIZE
+from .sql import SQL_FETCH_BATCH_SIZE, sanitize_sql_name
+
+if ZSTD_AVAILABLE:
+    import zstandard
+if PYARROW_AVAILABLE:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+
+def open_import_file(path, encoding='utf-8-sig', binary=False):
+    """
+    Opens a file for reading, decompressing gzip (.gz) or zstd (.zst) according to its extension.
+    The file is opened in text mode unless `binary` is set; text files may start with a BOM.
+    """
+    suffix = Path(path).suffix.lower()
+    text_options = {} if binary else {'encoding': encoding, 'newline': ''}
+    if suffix == '.gz':
+        return gzip.open(path, 'rb' if binary else 'rt', **text_options)
+    if suffix == '.zst':
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("Zstandard compression requires the 'zstandard' package. Run 'pip install zstandard' to enable it.")
+        stream = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+        return stream if binary else io.TextIOWrapper(stream, **text_options)
+    return open(path, 'rb' if binary else 'r', **text_options)
+
+
+def _require_pyarrow():
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError("Parquet and Arrow imports require the 'pyarrow' package. Run 'pip install pyarrow' to enable them.")
+
+
+def iter_csv_frames(path, batch_size=SQL_FETCH_BATCH_SIZE):
+    """Yields a CSV file as DataFrames of at most `batch_size` rows."""
+    with open_import_file(path) as in_file:
+        yield from pd.read_csv(in_file, chunksize=batch_size)
+
+
+def iter_parquet_frames(path, batch_size=SQL_FETCH_BATCH_SIZE):
+    """Yields a Parquet file as DataFrames of at most `batch_size` rows, decoding one row group at a time."""
+    _require_pyarrow()
+    parquet_file = pq.ParquetFile(path)
+    try:
+        for batch in parquet_file.iter_batches(batch_size=batch_size):
+            yield batch.to_pandas()
+    finally:
+        parquet_file.close()
+
+
+def iter_arrow_frames(path, batch_size=SQL_FETCH_BATCH_SIZE):
+    """Yields an Arrow IPC file as DataFrames of at most `batch_size` rows, reading it through a memory map."""
+    _require_pyarrow()
+    with pa.memory_map(str(path)) as source:
+        reader = pa.ipc.open_file(source)
+        for position in range(reader.num_record_batches):
+            batch = reader.get_batch(position)
+            for start in range(0, batch.num_rows, batch_size):
+                yield batch.slice(start, batch_size).to_pandas()
+
+
+def iter_jsonl_documents(path, batch_size=MONGO_FETCH_BATCH_SIZE, raw=False):
+    """
+    Yields the documents of a JSON Lines file as lists of at most `batch_size`,
+    reading it line by line. MongoDB Extended JSON values such as {"$oid": ...}
+    and {"$date": ...} become ObjectIds and datetimes; blank lines are skipped.
+    `raw` is accepted for symmetry with the BSON reader and has no effect.
+    """
+    batch = []
+    with open_import_file(path) as in_file:
+        for line in in_file:
+            if line.strip():
+                batch.append(json_util.loads(line))
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+    if batch:
+        yield batch
+
+
+def iter_bson_documents(path, batch_size=MONGO_FETCH_BATCH_SIZE, raw=False):
+    """
+    Yields the documents of a BSON dump (e.g. from `mongodump` or a .bson
+    export) as lists of at most `batch_size`. With `raw`, the documents are
+    RawBSONDocuments that can be inserted without ever being decoded.
+    """
+    codec_options = CodecOptions(document_class=RawBSONDocument) if raw else CodecOptions()
+    batch = []
+    with open_import_file(path, binary=True) as in_file:
+        for doc in decode_file_iter(in_file, codec_options=codec_options):
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+class ImportFormat(NamedTuple):
+    """
+    A file format for imports. Tabular formats read `frames(path)`, an
+    iterator of DataFrames; document formats read `documents(path, raw=False)`,
+    an iterator of lists of documents. The engine converts either one to what
+    the target needs.
+    """
+    name: str
+    extensions: tuple # Matched against the end of the file name, e.g. '.csv.gz'
+    frames: Optional[Callable] = None
+    documents: Optional[Callable] = None
+
+
+IMPORT_FORMATS = (
+    ImportFormat("CSV", ('.csv', '.csv.gz', '.csv.zst'), frames=iter_csv_frames),
+    ImportFormat("Parquet", ('.parquet',), frames=iter_parquet_frames),
+    ImportFormat("Arrow IPC", ('.arrow', '.feather'), frames=iter_arrow_frames),
+    ImportFormat("JSON Lines", ('.jsonl', '.jsonl.gz', '.jsonl.zst', '.ndjson'), documents=iter_jsonl_documents),
+    ImportFormat("BSON dump", ('.bson', '.bson.gz'), documents=iter_bson_documents),
+)
+
+
+def import_format(path):
+    """Returns the ImportFormat of a file name, by its extension, or raises ValueError."""
+    name = str(path).lower()
+    matches = [(len(extension), fmt) for fmt in IMPORT_FORMATS for extension in fmt.extensions if name.endswith(extension)]
+    if not matches:
+        supported = ', '.join(extension for fmt in IMPORT_FORMATS for extension in fmt.extensions)
+        raise ValueError(f"Can't tell the format of '{path}'. Supported extensions: {supported}.")
+    return max(matches, key=lambda match: match[0])[1]
+
+
+def import_target_name(path):
+    """Returns the table/collection name for a file: its name without the extensions, e.g. 'orders' for orders.csv.gz."""
+    return sanitize_sql_name(Path(path).name.split('.')[0] or Path(path).name)
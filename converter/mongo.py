@@ -0,0 +1,682 @@
+"""MongoDB-side helpers: batched reads, document flattening and parallel bulk inserts."""
+import datetime
+import json
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import bson
+import pandas as pd
+from bson import ObjectId
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+from pymongo import IndexModel, MongoClient, UpdateOne, WriteConcern
+from pymongo.errors import BulkWriteError, OperationFailure
+
+from .sql import IndexSpec, sanitize_sql_name
+
+MONGO_FETCH_BATCH_SIZE = 5000 # Documents read from a MongoDB cursor per page
+MONGO_BATCH_BYTES = 8 * 1024 * 1024 # Target size of one insert_many batch
+MONGO_WRITE_WORKERS = 4 # insert_many batches in flight per collection
+MONGO_SAMPLE_SIZE = 1000 # Documents sampled to discover the fields of a collection
+MONGO_SPLIT_SAMPLES = 100 # _id values sampled per range when a collection is split for parallel reads
+MONGO_TIMEOUT_MS = 5000
+_PATH_SEP = '\0' # Joins the keys of a nested field; unlike the output separator, BSON keys can't contain it
+
+
+def connect_mongo(uri, timeout_ms=MONGO_TIMEOUT_MS):
+    """Opens a MongoClient and checks that the server is reachable."""
+    client = MongoClient(uri, serverSelectionTimeoutMS=timeout_ms)
+    client.server_info()  # Force connection check
+    return client
+
+
+def _nulls_to_none(series):
+    """Returns an object Series where NaN/NaT/None are all None (BSON null)."""
+    return series.astype(object).where(series.notna(), None)
+
+
+class MongoTypePlan:
+    """
+    Converts DataFrame chunks to BSON-ready documents column by column.
+    The conversion of each column is chosen once from its dtype (and, for object
+    columns, from its first non-null value) and reused for every later chunk, so
+    no per-cell type checks are needed. Dates become ISO strings unless
+    `native_datetimes` is set, in which case they are stored as BSON datetimes.
+    """
+
+    def __init__(self, native_datetimes=False):
+        self.native_datetimes = native_datetimes
+        self._plan = {} # column position -> (dtype, conversion)
+
+    def _conversion_for(self, series):
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return 'datetime'
+        if pd.api.types.is_timedelta64_dtype(series):
+            return 'text'
+        if pd.api.types.is_float_dtype(series):
+            return 'nullable'
+        if not pd.api.types.is_object_dtype(series):
+            return 'nullable' if pd.api.types.is_string_dtype(series) else 'native'
+        first_valid = series.first_valid_index()
+        sample = None if first_valid is None else series[first_valid]
+        if isinstance(sample, datetime.datetime):
+            return 'datetime_objects'
+        if isinstance(sample, datetime.date):
+            return 'date_objects'
+        if isinstance(sample, datetime.time):
+            return 'text'
+        if isinstance(sample, Decimal):
+            return 'decimal'
+        if isinstance(sample, (bytearray, memoryview)):
+            return 'binary'
+        return 'nullable'
+
+    def _convert(self, series, conversion):
+        if conversion == 'native': # ints and bools never hold nulls
+            return series
+        if conversion == 'datetime_objects':
+            series, conversion = pd.to_datetime(series, errors='coerce', utc=True).dt.tz_localize(None), 'datetime'
+        if conversion == 'datetime':
+            offset = ''
+            if series.dt.tz is not None:
+                series, offset = series.dt.tz_convert('UTC').dt.tz_localize(None), '+00:00' # BSON datetimes are UTC
+            if self.native_datetimes:
+                return pd.Series(series.dt.to_pydatetime(), index=series.index, dtype=object).where(series.notna(), None)
+            return _nulls_to_none(series.dt.strftime('%Y-%m-%dT%H:%M:%S.%f').str.removesuffix('.000000') + offset)
+        if conversion == 'date_objects':
+            dates = pd.to_datetime(series, errors='coerce')
+            if self.native_datetimes:
+                return pd.Series(dates.dt.to_pydatetime(), index=series.index, dtype=object).where(dates.notna(), None)
+            return _nulls_to_none(dates.dt.strftime('%Y-%m-%d'))
+        if conversion == 'decimal':
+            return _nulls_to_none(pd.to_numeric(series, errors='coerce'))
+        if conversion == 'binary':
+            return series.map(bytes, na_action='ignore').astype(object).where(series.notna(), None)
+        if conversion == 'text':
+            return _nulls_to_none(series.astype(str).where(series.notna()))
+        return _nulls_to_none(series)
+
+    def apply(self, df):
+        """Returns the rows of a chunk as a list of documents."""
+        columns = [str(col) for col in df.columns]
+        values = []
+        for position in range(len(columns)):
+            series = df.iloc[:, position]
+            planned = self._plan.get(position)
+            if planned is None or planned[0] != series.dtype: # Re-plan only if a later chunk changed dtype
+                planned = self._plan[position] = (series.dtype, self._conversion_for(series))
+            values.append(self._convert(series, planned[1]).tolist())
+        return [dict(zip(columns, row)) for row in zip(*values)]
+
+
+class MongoBulkWriter:
+    """
+    Inserts documents into a collection with unordered insert_many batches that are
+    capped by size, keeping several batches in flight on a thread pool.
+    Use it as a context manager: leaving the block waits for the pending batches.
+    Documents rejected by the server (e.g. duplicate keys) are counted in `failed`
+    instead of stopping the load. With an `upsert_key`, each document replaces the
+    fields of the document with the same key through unordered bulk_write
+    batches of UpdateOne(upsert=True), and is inserted if there is none.
+    """
+
+    def __init__(self, collection, relaxed_write_concern=False, on_progress=None,
+                 max_batch_bytes=MONGO_BATCH_BYTES, workers=MONGO_WRITE_WORKERS, upsert_key=None):
+        if relaxed_write_concern: # Acknowledged by the primary only, without waiting for the journal
+            collection = collection.with_options(write_concern=WriteConcern(w=1, j=False))
+        self.collection = collection
+        self.on_progress = on_progress # Called from the pool threads with the running insert count
+        self.max_batch_bytes = max_batch_bytes
+        self.upsert_key = upsert_key
+        self.inserted = 0 # Documents written, including the ones that updated an existing document
+        self.upserted = 0 # Documents that did not exist yet (upsert mode only)
+        self.failed = 0
+        self.bytes_sent = 0
+        self.write_errors = [] # The first few per-document errors, for the log
+        self._error = None # A fatal (non per-document) error raised by a batch
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+        self._slots = threading.Semaphore(workers * 2) # Bounds the batches held in memory
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._elapsed = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._pool.shutdown(wait=True, cancel_futures=exc_type is not None)
+        self._elapsed = time.perf_counter() - self._started
+        if exc_type is None and self._error:
+            raise self._error
+        return False
+
+    def add(self, docs):
+        """
+        Splits `docs` into size-capped batches and queues them, blocking while too many are pending.
+        Returns the futures of the queued batches.
+        """
+        if self._error:
+            raise self._error
+        if not docs:
+            return []
+        sample = docs[:10]
+        try:
+            avg_size = max(1, sum(len(bson.encode(d)) for d in sample) // len(sample))
+        except Exception:
+            avg_size = 1024 # Unencodable sample, the insert itself will report the problem
+        per_batch = max(1, self.max_batch_bytes // avg_size)
+        futures = []
+        for start in range(0, len(docs), per_batch):
+            batch = docs[start:start + per_batch]
+            self._slots.acquire()
+            futures.append(self._pool.submit(self._insert, batch, len(batch) * avg_size))
+        return futures
+
+    def _insert(self, batch, approx_bytes):
+        upserted = 0
+        try:
+            if self.upsert_key:
+                result = self.collection.bulk_write(
+                    [UpdateOne({self.upsert_key: doc[self.upsert_key]}, {'$set': doc}, upsert=True) for doc in batch],
+                    ordered=False)
+                upserted = result.upserted_count
+            else:
+                self.collection.insert_many(batch, ordered=False)
+            inserted = len(batch)
+        except BulkWriteError as e:
+            write_errors = e.details.get('writeErrors', [])
+            inserted = len(batch) - len(write_errors) if self.upsert_key else e.details.get('nInserted', 0)
+            upserted = e.details.get('nUpserted', 0)
+            with self._lock:
+                self.write_errors.extend(write_errors[:5 - len(self.write_errors)])
+        except Exception as e:
+            self._error = self._error or e
+            return
+        finally:
+            self._slots.release()
+        with self._lock:
+            self.inserted += inserted
+            self.upserted += upserted
+            self.failed += len(batch) - inserted
+            self.bytes_sent += approx_bytes
+            total = self.inserted
+        if self.on_progress:
+            self.on_progress(total)
+
+    @property
+    def error(self):
+        """The fatal error that stopped a batch, if any."""
+        return self._error
+
+    def first_error(self):
+        """Returns the message of the first rejected document, if any."""
+        return self.write_errors[0].get('errmsg') if self.write_errors else None
+
+    def summary(self):
+        """Returns a one-line throughput report."""
+        elapsed = self._elapsed if self._elapsed is not None else time.perf_counter() - self._started
+        elapsed = max(elapsed, 1e-6)
+        return (f"{self.inserted} documents in {elapsed:.1f}s "
+                f"({self.inserted / elapsed:,.0f} docs/s, {self.bytes_sent / elapsed / 1e6:.1f} MB/s)")
+
+
+def _json_default(o):
+    """Serializes date/time objects (and anything else, as a last resort) inside lists."""
+    if hasattr(o, 'isoformat'):
+        return o.isoformat()
+    return str(o)
+
+
+def iter_mongo_batches(collection, batch_size=MONGO_FETCH_BATCH_SIZE, projection=None, query=None, sort=None):
+    """Yields the documents of a collection (matching `query`, if any) as lists of at most `batch_size` documents."""
+    batch = []
+    for doc in collection.find(query, projection=projection, batch_size=batch_size, sort=sort):
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def mongo_id_range(after=None, before=None):
+    """Returns the query of the documents with after < _id <= before, either bound being left open when None."""
+    condition = {}
+    if after is not None:
+        condition['$gt'] = after
+    if before is not None:
+        condition['$lte'] = before
+    return {'_id': condition} if condition else {}
+
+
+def iter_mongo_keyset_batches(collection, batch_size=MONGO_FETCH_BATCH_SIZE, after=None, before=None):
+    """
+    Yields the documents of a collection in `_id` order as lists of at most
+    `batch_size` documents, each page read with its own `{_id: {$gt: last}}`
+    query. Every page costs the same wherever it is in the collection, no cursor
+    stays open between pages, and a run can continue after any page. Starts
+    after the `_id` value `after` when given, and stops after `before`. Only
+    the _ids of the first page's BSON type are matched: check the collection
+    with mongo_id_keyset_safe first.
+    """
+    while True:
+        batch = list(collection.find(mongo_id_range(after, before)).sort('_id', 1).limit(batch_size))
+        if not batch:
+            return
+        yield batch
+        if len(batch) < batch_size:
+            return
+        after = batch[-1]['_id']
+
+
+def _id_type_bracket(value):
+    """Returns the BSON comparison bracket of an _id, for the types whose ranges can be split."""
+    if isinstance(value, ObjectId):
+        return 'objectId'
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return 'number'
+    if isinstance(value, str):
+        return 'string'
+    return None
+
+
+def mongo_id_keyset_safe(collection):
+    """
+    Returns whether a collection can be read by _id range queries without
+    missing documents. Range queries only match _ids of one BSON type, so the
+    lowest and highest _id (and therefore every _id) must both be ObjectIds,
+    numbers or strings. An empty collection is safe.
+    """
+    first = collection.find_one(sort=[('_id', 1)], projection={'_id': 1})
+    if first is None:
+        return True
+    last = collection.find_one(sort=[('_id', -1)], projection={'_id': 1})
+    return _id_type_bracket(first['_id']) is not None and _id_type_bracket(first['_id']) == _id_type_bracket(last['_id'])
+
+
+def mongo_id_splits(collection, parts, samples_per_part=MONGO_SPLIT_SAMPLES):
+    """
+    Picks the _id values that split a collection into `parts` ranges of about
+    the same size, from a $sample of its _ids. Returns None when the _ids can't
+    be read by range queries (see mongo_id_keyset_safe), and when the collection
+    is empty or too small to split.
+    """
+    if not mongo_id_keyset_safe(collection):
+        return None
+    last = collection.find_one(sort=[('_id', -1)], projection={'_id': 1})
+    if last is None:
+        return None
+    pipeline = [{'$sample': {'size': parts * samples_per_part}}, {'$project': {'_id': 1}}]
+    ids = sorted(doc['_id'] for doc in collection.aggregate(pipeline))
+    splits = sorted({ids[len(ids) * part // parts] for part in range(1, parts)} - {last['_id']}) if ids else []
+    return splits or None
+
+
+def mongo_id_ranges(splits, last_ids=None):
+    """
+    Returns the (after, before) _id bounds of the ranges separated by `splits`
+    (see mongo_id_range). A range continues after its entry of `last_ids`, if any.
+    """
+    bounds = [None] + list(splits) + [None]
+    ranges = list(zip(bounds, bounds[1:]))
+    if last_ids:
+        ranges = [(after if last is None else last, before) for (after, before), last in zip(ranges, last_ids)]
+    return ranges
+
+
+def iter_mongo_partitions(collection, ranges, batch_size=MONGO_FETCH_BATCH_SIZE, projection=None, keyset=False,
+                          transform=None):
+    """
+    Reads the _id ranges of a collection on parallel cursors, one thread per
+    range, and yields (range index, batch, last _id) as the batches arrive;
+    the batches of one range keep their order. `transform(index, batch)`, e.g.
+    flattening, runs on the reading thread. With `keyset`, each range is read
+    in _id order by keyset pagination, so its last _id can be checkpointed.
+    The first range to fail stops the others.
+    """
+    results = queue.Queue(maxsize=len(ranges) * 2) # Bounds the batches held in memory
+    stop = threading.Event()
+    done = object()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                results.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def read_range(index, after, before):
+        try:
+            if keyset:
+                batches = iter_mongo_keyset_batches(collection, batch_size, after=after, before=before)
+            else:
+                batches = iter_mongo_batches(collection, batch_size, projection=projection, query=mongo_id_range(after, before))
+            for batch in batches:
+                last_id = batch[-1].get('_id')
+                if not put((index, transform(index, batch) if transform else batch, last_id)):
+                    return
+            put(done)
+        except BaseException as e: # Also SystemExit and the like, or the consumer would wait forever
+            put(e)
+
+    threads = [threading.Thread(target=read_range, args=(index, after, before), daemon=True)
+               for index, (after, before) in enumerate(ranges)]
+    for thread in threads:
+        thread.start()
+    try:
+        running = len(threads)
+        while running:
+            item = results.get()
+            if item is done:
+                running -= 1
+            elif isinstance(item, BaseException):
+                raise item
+            else:
+                yield item
+    finally:
+        stop.set() # Also reached when the consumer stops early
+        for thread in threads:
+            thread.join()
+
+
+class DocumentFlattener:
+    """
+    Flattens MongoDB documents into DataFrame columns in a single pass.
+    Nested sub-documents become `parent_child` columns, lists are JSON-encoded
+    and ObjectIds are turned into strings as each value is visited. The set of
+    columns (in first-seen order) is kept across calls, so documents can be
+    flattened one batch at a time in a streaming pipeline. With `arrays`,
+    lists of sub-documents are handed to the caller instead of being encoded
+    (see DocumentNormalizer).
+    """
+
+    def __init__(self, sep='_', sanitize_names=True):
+        self.sep = sep
+        self.sanitize_names = sanitize_names
+        self.schema = {} # flattened field path -> output column name, in first-seen order
+        self._paths = {} # field path (keys joined by _PATH_SEP) -> its flattened path in `schema`
+        self._taken = set() # Column names in use, folded by _fold()
+        self._encode_json = json.JSONEncoder(default=_json_default).encode
+
+    def _walk(self, doc, prefix, index, columns, arrays=None):
+        for key, value in doc.items():
+            path = prefix + key if prefix else key
+            kind = type(value)
+            if kind is list:
+                if arrays is not None and all(isinstance(item, dict) for item in value):
+                    if value: # An empty array has no rows, whatever it would hold
+                        arrays.append((index, path.replace(_PATH_SEP, self.sep), value))
+                    continue
+                value = self._encode_json(value)
+            elif kind is ObjectId:
+                value = str(value)
+            elif isinstance(value, dict):
+                self._walk(value, path + _PATH_SEP, index, columns, arrays)
+                continue
+            column = columns.get(path)
+            if column is None:
+                column = columns[path] = [None] * index # Field was missing from the previous documents
+            elif len(column) < index:
+                column.extend([None] * (index - len(column)))
+            column.append(value)
+
+    def flatten(self, docs, dtype=None, arrays=None):
+        """
+        Flattens a batch of documents into a DataFrame holding the columns seen in this batch.
+        With dtype=object the values keep their Python types, e.g. ints next to missing values.
+        If `arrays` is a list, lists of sub-documents are left out of the columns and
+        appended to it as (row index, field path, list) instead; empty lists are dropped.
+        """
+        columns = {}
+        for index, doc in enumerate(docs):
+            self._walk(doc, '', index, columns, arrays)
+        for path, column in columns.items():
+            if len(column) < len(docs):
+                column.extend([None] * (len(docs) - len(column)))
+            if path not in self._paths:
+                self._add_column(path)
+        data = {self.schema[flat_path]: columns[path] for path, flat_path in self._paths.items() if path in columns}
+        return pd.DataFrame(data, dtype=dtype)
+
+    def _fold(self, name):
+        return name.lower() if self.sanitize_names else name # SQL column names are mostly case-insensitive
+
+    def _add_column(self, path):
+        """
+        Names the column of a field seen for the first time. A field whose
+        flattened path or column name is already taken by another one, e.g.
+        {'a': {'b': 1}} and {'a_b': 2}, or 'my field' and 'myfield' once
+        sanitized, gets a column of its own with a _2, _3, ... suffix.
+        """
+        flat_path = path.replace(_PATH_SEP, self.sep)
+        name = sanitize_sql_name(flat_path) if self.sanitize_names else flat_path
+        unique_path, unique_name, suffix = flat_path, name, 1
+        while unique_path in self.schema:
+            suffix += 1
+            unique_path, unique_name = f"{flat_path}_{suffix}", f"{name}_{suffix}"
+        while self._fold(unique_name) in self._taken:
+            suffix += 1
+            unique_name = f"{name}_{suffix}"
+        self._paths[path] = unique_path
+        self.schema[unique_path] = unique_name
+        self._taken.add(self._fold(unique_name))
+
+
+class DocumentNormalizer:
+    """
+    Splits MongoDB documents into a parent table and child tables. Each array
+    of sub-documents becomes a child table named `<table>_<field path>`,
+    with a row per array element. A child row starts with the key of its
+    parent row, `<table>_id` (the parent document's `_id`, JSON-encoded in
+    both tables if it is a sub-document) plus the
+    `<field>_index` positions of the arrays above it, followed by its own
+    position and the element's flattened fields; arrays nested in the
+    elements become grandchild tables the same way. Empty arrays add no rows;
+    other lists are JSON-encoded as DocumentFlattener does. One batch of documents yields the
+    rows of every table, so all tables load in the same pass.
+    """
+
+    def __init__(self, table, sep='_'):
+        self.table = table
+        self.sep = sep
+        self.key_column = f"{table}{sep}id"
+        self.keys = {table: ['_id']} # table -> columns of a row's key, in the table's own names
+        self.references = {} # child table -> (parent table, its key columns, the parent's key columns), parents first
+        self._flatteners = {}
+
+    def normalize(self, docs, dtype=None):
+        """Returns {table name: DataFrame} for a batch of documents: the parent table, then the child tables that got rows."""
+        tables = {}
+        self._normalize(self.table, docs, tables, dtype)
+        return tables
+
+    @staticmethod
+    def _document_id(doc):
+        value = doc.get('_id')
+        if isinstance(value, ObjectId):
+            return str(value)
+        if isinstance(value, (dict, list)):
+            return json.dumps(value, default=_json_default)
+        return value
+
+    def _row_key(self, table, doc):
+        if table == self.table:
+            return {self.key_column: self._document_id(doc)}
+        return {column: doc.get(column) for column in self.keys[table]}
+
+    def _normalize(self, table, docs, tables, dtype):
+        if table == self.table: # A sub-document _id is kept whole, as the JSON its child rows join on
+            docs = [{**doc, '_id': self._document_id(doc)} if isinstance(doc.get('_id'), (dict, list)) else doc
+                    for doc in docs]
+        flattener = self._flatteners.setdefault(table, DocumentFlattener(self.sep))
+        arrays = []
+        tables[table] = flattener.flatten(docs, dtype=dtype, arrays=arrays)
+        children = {}
+        for index, path, items in arrays:
+            field = sanitize_sql_name(path)
+            child = f"{table}{self.sep}{field}"
+            if child not in self.references:
+                parent_keys = list(self._row_key(table, {}))
+                self.keys[child] = parent_keys + [f"{field}{self.sep}index"]
+                self.references[child] = (table, parent_keys, self.keys[table])
+            parent_key = self._row_key(table, docs[index])
+            position_column = self.keys[child][-1]
+            rows = children.setdefault(child, [])
+            for position, item in enumerate(items):
+                row = dict(parent_key)
+                row[position_column] = position
+                row.update((key, value) for key, value in item.items() if key not in row)
+                rows.append(row)
+        for child, rows in children.items():
+            self._normalize(child, rows, tables, dtype)
+
+
+def mongo_projection(fields):
+    """Builds a find() projection that only returns the given (dotted) field paths."""
+    if not fields:
+        return None
+    projection = {field: 1 for field in fields}
+    if '_id' not in projection:
+        projection['_id'] = 0 # _id is returned unless explicitly excluded
+    return projection
+
+
+def mongo_collection_indexes(collection):
+    """
+    Returns the ascending/descending indexes of a collection as IndexSpecs on
+    the flattened column names, `_id` first. Text, geo and hashed indexes have
+    no SQL counterpart and are left out.
+    """
+    indexes = []
+    for name, info in sorted(collection.index_information().items(), key=lambda item: item[0] != '_id_'):
+        keys = info['key']
+        if not all(direction in (1, -1) for _, direction in keys):
+            continue
+        columns = tuple((sanitize_sql_name(field.replace('.', '_')), int(direction)) for field, direction in keys)
+        indexes.append(IndexSpec(columns, name == '_id_' or bool(info.get('unique'))))
+    return indexes
+
+
+def create_mongo_indexes(collection, indexes):
+    """
+    Builds `indexes` (IndexSpecs) on a loaded collection, all in one
+    createIndexes call so the server scans the data once. If that fails, each
+    index is built on its own, and a unique index that the data violates
+    (e.g. several NULLs, which SQL allows) is built as a non-unique one.
+    Returns the messages of the indexes that failed or lost their uniqueness.
+    """
+    indexes = [index for index in indexes if [column for column, _ in index.keys] != ['_id']]
+    if not indexes:
+        return []
+    try:
+        collection.create_indexes([IndexModel(list(index.keys), unique=index.unique) for index in indexes])
+        return []
+    except OperationFailure:
+        pass
+    errors = []
+    for index in indexes:
+        columns = ', '.join(column for column, _ in index.keys)
+        try:
+            collection.create_index(list(index.keys), unique=index.unique)
+        except OperationFailure as e:
+            if not index.unique:
+                errors.append(f"({columns}): {e}")
+                continue
+            try:
+                collection.create_index(list(index.keys))
+                errors.append(f"({columns}): built as a non-unique index, the data has duplicate keys")
+            except OperationFailure as e:
+                errors.append(f"({columns}): {e}")
+    return errors
+
+
+def ensure_mongo_unique_index(collection, field):
+    """
+    Makes sure `field` has a unique index, which upserts on it look their
+    documents up by. Raises a ValueError if one can't be built, e.g. because
+    documents of the collection share a value.
+    """
+    if field == '_id': # Always unique
+        return
+    for index in collection.index_information().values():
+        if index.get('unique') and [key for key, _ in index['key']] == [field]:
+            return
+    try:
+        collection.create_index(field, unique=True)
+    except OperationFailure as e:
+        raise ValueError(f"Cannot build a unique index on '{field}' in collection '{collection.name}': {e}. Remove its "
+                         f"documents with duplicate '{field}' values, or another index on '{field}', and try again.") from e
+
+
+def raw_bson_collection(collection):
+    """
+    Returns the collection with a codec that reads documents as RawBSONDocuments:
+    the server's bytes, kept as they are, which insert_many sends back unchanged.
+    """
+    return collection.with_options(codec_options=CodecOptions(document_class=RawBSONDocument))
+
+
+def mongo_collection_options(collection):
+    """Returns the options a collection was created with (capped, validator, collation, ...), without those of a view."""
+    options = dict(collection.options())
+    options.pop('viewOn', None)
+    options.pop('pipeline', None)
+    return options
+
+
+def replicate_mongo_indexes(source, target):
+    """
+    Builds every index of `source` but `_id`'s on `target`, from the index
+    specs the server reports, so names and options (unique, sparse, partial,
+    TTL, collation) and text, geo and hashed indexes are kept. All indexes
+    are built in one createIndexes call, so the server scans the data once; if
+    that fails, they are built one by one. Returns the number of indexes and
+    the messages of the ones that failed.
+    """
+    models = []
+    for spec in source.list_indexes():
+        spec = dict(spec)
+        if spec['name'] == '_id_':
+            continue
+        keys = list(spec.pop('key').items())
+        for option in ('v', 'ns', 'background'):
+            spec.pop(option, None)
+        models.append(IndexModel(keys, **spec))
+    if not models:
+        return 0, []
+    try:
+        target.create_indexes(models)
+        return len(models), []
+    except OperationFailure:
+        pass
+    errors = []
+    for model in models:
+        try:
+            target.create_indexes([model])
+        except OperationFailure as e:
+            errors.append(f"'{model.document['name']}': {e}")
+    return len(models), errors
+
+
+def sample_mongo_documents(collection, projection=None, sample_size=MONGO_SAMPLE_SIZE, sanitize_names=True):
+    """Returns a random sample of the collection, flattened into a DataFrame of object columns."""
+    pipeline = [{'$sample': {'size': sample_size}}]
+    if projection:
+        pipeline.append({'$project': projection})
+    return DocumentFlattener(sanitize_names=sanitize_names).flatten(list(collection.aggregate(pipeline)), dtype=object)
+
+
+def sample_mongo_tables(collection, table, sample_size=MONGO_SAMPLE_SIZE):
+    """Returns a random sample of the collection split into its parent and child tables (see DocumentNormalizer), as object columns."""
+    docs = list(collection.aggregate([{'$sample': {'size': sample_size}}]))
+    return DocumentNormalizer(table).normalize(docs, dtype=object)
+
+
+def sample_mongo_columns(collection, projection=None, sample_size=MONGO_SAMPLE_SIZE):
+    """Returns the flattened column names found in a random sample of the collection."""
+    return list(sample_mongo_documents(collection, projection, sample_size, sanitize_names=False).columns)
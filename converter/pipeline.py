@@ -0,0 +1,86 @@
+"""
+Staged pipelines that overlap reading, transforming and writing. Each stage
+runs on a thread of its own and hands its pages to the next stage through a
+bounded queue, so the source, the CPU and the target work at the same time
+and a transfer takes about as long as its slowest stage.
+"""
+import queue
+import threading
+
+PIPELINE_QUEUE_SIZE = 2 # Pages waiting between two stages; a full queue holds back the stage before it
+
+
+def iter_pipelined(source, *stages, max_pending=PIPELINE_QUEUE_SIZE):
+    """
+    Yields `stage_n(... stage_1(page))` for every page of `source`, in order.
+    `source` is iterated on a reader thread and every stage function runs on a
+    thread of its own, while the caller, typically the writer, consumes the
+    result of the last stage. At most `max_pending` pages wait between two
+    stages, so memory stays bounded and a slow writer slows the reader down
+    instead of piling up pages. The first stage to fail raises its error here,
+    even a BaseException such as SystemExit; a consumer that stops early stops
+    every stage, and the source is closed on the reader thread.
+    """
+    stop = threading.Event()
+    done = object()
+    queues = [queue.Queue(maxsize=max_pending) for _ in range(len(stages) + 1)]
+
+    def put(outbox, item):
+        while not stop.is_set():
+            try:
+                outbox.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def get(inbox):
+        while not stop.is_set():
+            try:
+                return inbox.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return done
+
+    def read():
+        try:
+            for page in source:
+                if not put(queues[0], page):
+                    return
+            put(queues[0], done)
+        except BaseException as e: # Also SystemExit and the like, or the consumer would wait forever
+            put(queues[0], e)
+        finally:
+            close = getattr(source, 'close', None)
+            if close:
+                close() # e.g. releases a server-side cursor
+
+    def transform(function, inbox, outbox):
+        try:
+            while True:
+                item = get(inbox)
+                if item is done or isinstance(item, BaseException):
+                    put(outbox, item)
+                    return
+                if not put(outbox, function(item)):
+                    return
+        except BaseException as e:
+            put(outbox, e)
+
+    threads = [threading.Thread(target=read, daemon=True)]
+    threads += [threading.Thread(target=transform, args=(function, queues[position], queues[position + 1]), daemon=True)
+                for position, function in enumerate(stages)]
+    for thread in threads:
+        thread.start()
+    try:
+        while True:
+            item = queues[-1].get()
+            if item is done:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set() # Also reached when the consumer stops early
+        for thread in threads:
+            thread.join()
@@ -0,0 +1,159 @@
+"""
+Data previews that load lazily: rows are read page by page on a background
+thread while the user scrolls, so a preview opens at once and browsing a large
+table or query result never blocks the GUI.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+
+import pandas as pd
+
+from .mongo import DocumentFlattener
+from .sql import iter_sql_chunks
+
+PREVIEW_PAGE_SIZE = 500 # Rows read per page while the preview is scrolled
+PREVIEW_MAX_ROWS = 1000000 # Rows a preview reads at most, pushed down to the server as LIMIT/TOP
+
+
+def limit_sql_query(query, sql_type, limit):
+    """Wraps a query so the server stops after `limit` rows."""
+    query = query.strip().rstrip(';')
+    if sql_type == "SQL Server":
+        return f"SELECT TOP {int(limit)} * FROM ({query}) AS preview_src"
+    return f"SELECT * FROM ({query}) AS preview_src LIMIT {int(limit)}"
+
+
+def iter_sql_preview_pages(settings, query, page_size=PREVIEW_PAGE_SIZE, max_rows=PREVIEW_MAX_ROWS):
+    """
+    Yields the result of a query as DataFrames of `page_size` rows, read from a
+    streaming cursor on a connection that stays checked out until the pages are
+    closed. The query is bounded on the server to one row more than `max_rows`,
+    which tells the pager whether the result was cut; a query that cannot be
+    wrapped in a subquery (e.g. a CTE on SQL Server) runs as it is.
+    """
+    bounded = limit_sql_query(query, settings.sql_type, max_rows + 1)
+    with closing(settings.connect()) as conn:
+        pages = iter_sql_chunks(conn, settings.sql_type, bounded, page_size)
+        try:
+            first = next(pages, None)
+        except Exception:
+            if settings.sql_type == "PostgreSQL":
+                conn.rollback() # A failed statement aborts the whole PG transaction
+            pages = iter_sql_chunks(conn, settings.sql_type, query, page_size)
+            first = next(pages, None)
+        with closing(pages):
+            if first is not None:
+                yield first
+                yield from pages
+
+
+def iter_mongo_preview_pages(collection, page_size=PREVIEW_PAGE_SIZE, max_rows=PREVIEW_MAX_ROWS):
+    """
+    Yields the first `max_rows` documents of a collection (and one more, which
+    tells the pager whether it was cut) as DataFrames of `page_size` rows,
+    flattened into the columns a conversion to SQL would create. Values keep
+    their Python types, e.g. ints next to missing values.
+    """
+    flattener = DocumentFlattener()
+    with closing(collection.find(limit=max_rows + 1, batch_size=page_size)) as cursor:
+        batch = []
+        for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= page_size:
+                yield flattener.flatten(batch, dtype=object)
+                batch = []
+        if batch:
+            yield flattener.flatten(batch, dtype=object)
+
+
+def format_cell(value):
+    """Returns the text shown for one value in the preview grid; missing values are blank."""
+    if value is None or value is pd.NaT or (isinstance(value, float) and value != value):
+        return ''
+    return str(value)
+
+
+class PreviewPager:
+    """
+    Holds the rows of a preview and loads more of them on demand. `open_pages`
+    is called once to start the DataFrame pages (see `iter_sql_preview_pages`
+    and `iter_mongo_preview_pages`); it and every page are run on a worker
+    thread of the pager's own, so the source is only ever used from one thread.
+    The rows are kept as plain tuples in the order of `columns`; columns that
+    first appear in later pages are appended, and the rows loaded before them
+    are shorter. The GUI reads the loaded rows and formats the few on screen.
+    """
+
+    def __init__(self, open_pages, max_rows=PREVIEW_MAX_ROWS):
+        self.max_rows = max_rows
+        self.columns = []
+        self.rows = []
+        self.exhausted = False # All rows are loaded, or the preview stopped at max_rows or at an error
+        self.truncated = False # The result has more rows than max_rows
+        self.error = None
+        self._open_pages = open_pages
+        self._pages = None
+        self._pending = None
+        self._closed = False
+        self._worker = ThreadPoolExecutor(max_workers=1)
+
+    @property
+    def loading(self):
+        return self._pending is not None and not self._pending.done()
+
+    def request_more(self, on_loaded):
+        """
+        Loads the next page in the background and then calls `on_loaded()` on the
+        worker thread. Returns False, without loading anything, while a page is
+        still loading, once every row is loaded, or after close().
+        """
+        if self._closed or self.exhausted or self.loading:
+            return False
+        self._pending = self._worker.submit(self._load, on_loaded)
+        return True
+
+    def _load(self, on_loaded):
+        try:
+            if self._pages is None:
+                self._pages = self._open_pages()
+            page = next(self._pages, None)
+            if page is None:
+                self._finish()
+            else:
+                self._add(page)
+        except Exception as e:
+            self.error = e
+            self._finish()
+        on_loaded()
+
+    def _add(self, page):
+        columns = list(page.columns)
+        if not self.columns:
+            self.columns = columns # May repeat a name, e.g. a join's two `id` columns
+        elif columns != self.columns:
+            self.columns = self.columns + [column for column in columns if column not in self.columns]
+            page = page.reindex(columns=self.columns)
+        rows = list(page.itertuples(index=False, name=None))
+        room = self.max_rows - len(self.rows)
+        if len(rows) >= room:
+            self.truncated = len(rows) > room or next(self._pages, None) is not None
+            self.rows.extend(rows[:room])
+            self._finish()
+        else:
+            self.rows.extend(rows)
+
+    def _finish(self):
+        self.exhausted = True
+        self._close_pages()
+
+    def _close_pages(self):
+        if self._pages is not None:
+            self._pages.close() # Hands the connection or cursor back
+            self._pages = None
+
+    def close(self):
+        """Stops loading and releases the source once the page being loaded, if any, is done."""
+        if not self._closed:
+            self._closed = True
+            self._worker.submit(self._close_pages)
+            self._worker.shutdown(wait=False)
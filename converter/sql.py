@@ -0,0 +1,1275 @@
+"""SQL-side helpers: connections, streaming reads and bulk writes for the four supported dialects."""
+import datetime
+import io
+import json
+import os
+import queue
+import sqlite3
+import threading
+import warnings
+from contextlib import closing
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import NamedTuple
+from urllib.parse import quote_plus
+from uuid import UUID, uuid4
+
+import pandas as pd
+
+PSYCOPG2_AVAILABLE = False
+try:
+    import psycopg2
+    PSYCOPG2_AVAILABLE = True
+except ImportError:
+    pass # Reported when a PostgreSQL connection is opened
+
+MYSQL_AVAILABLE = False
+try:
+    import mysql.connector
+    MYSQL_AVAILABLE = True
+except ImportError:
+    pass # Reported when a MySQL connection is opened
+
+PYODBC_AVAILABLE = False
+try:
+    import pyodbc
+    PYODBC_AVAILABLE = True
+except ImportError:
+    pass # Reported when a SQL Server connection is opened
+
+SQLALCHEMY_AVAILABLE = False
+try:
+    from sqlalchemy import Column, MetaData, Table, create_engine, inspect, text
+    from sqlalchemy import types as sa_types
+    from sqlalchemy.dialects.mssql import DATETIME2, DATETIMEOFFSET, NVARCHAR, VARBINARY
+    from sqlalchemy.dialects.mysql import DATETIME as MYSQL_DATETIME
+    from sqlalchemy.dialects.mysql import TIME as MYSQL_TIME
+    from sqlalchemy.dialects.mysql import insert as mysql_insert
+    from sqlalchemy.dialects.postgresql import insert as pg_insert
+    SQLALCHEMY_AVAILABLE = True
+except ImportError:
+    pass # Reported when an engine is created for a server target
+
+SQL_TYPES = ("SQLite", "PostgreSQL", "MySQL", "SQL Server")
+DEFAULT_PORTS = {"PostgreSQL": "5432", "MySQL": "3306"}
+SQL_FETCH_BATCH_SIZE = 10000 # Rows fetched from a SQL cursor per round trip
+MAX_PENDING_BATCHES = 2 # Batches buffered between the reader and the writer thread
+MYSQL_ROWS_PER_INSERT = 1000 # Rows per multi-row INSERT statement (bounded by max_allowed_packet)
+VARCHAR_LENGTHS = (64, 255, 1000, 4000) # Declared lengths of bounded text columns, at least twice the longest value seen
+MYSQL_VARCHAR_ROW_BYTES = 60000 # Share of MySQL's 65,535-byte row size limit given to VARCHAR columns
+SQL_POOL_SIZE = 4 # Connections kept open per database between operations
+SQL_POOL_MAX_OVERFLOW = 36 # Extra connections for parallel readers and writers, closed once returned
+
+
+def _require(available, package, purpose):
+    if not available:
+        raise RuntimeError(f"{purpose} requires the '{package}' package. Run 'pip install {package}' to enable it.")
+
+
+def quote_sql_identifier(identifier, sql_type):
+    """Quotes an SQL identifier correctly for the given DB type."""
+    if sql_type == "PostgreSQL":
+        return f'"{identifier}"'
+    elif sql_type == "SQL Server":
+        return f'[{identifier}]'
+    else:  # SQLite and default
+        return f'`{identifier}`'
+
+
+def detect_mssql_driver():
+    """Returns the newest installed Microsoft ODBC driver for SQL Server."""
+    _require(PYODBC_AVAILABLE, "pyodbc", "SQL Server support")
+    drivers = [d for d in pyodbc.drivers() if d.startswith('ODBC Driver') and 'for SQL Server' in d]
+    if not drivers:
+        raise ConnectionError("No suitable MS SQL Server ODBC driver found. Please install it from Microsoft's website.")
+    return drivers[-1] # Get the latest version
+
+
+def build_mssql_conn_str(driver, server, database, user, password):
+    """Builds a pyodbc connection string for SQL Server."""
+    base_conn_str = f'DRIVER={{{driver}}};SERVER={server};DATABASE={database};TrustServerCertificate=yes;'
+    if user:
+        return base_conn_str + f'UID={user};PWD={password};'
+    else: # Use Windows Authentication
+        return base_conn_str + 'Trusted_Connection=yes;'
+
+
+@dataclass
+class SQLSettings:
+    """
+    Connection settings for one SQL database. `connect()` hands out a
+    connection of its own on every call, so one settings object can serve a
+    whole pool of worker threads; the connections come from the database's
+    shared pool (see SQLConnectionPool) when SQLAlchemy is installed.
+    """
+    sql_type: str
+    sqlite_path: str = ''
+    host: str = 'localhost'
+    port: str = ''
+    dbname: str = ''
+    user: str = ''
+    password: str = ''
+    driver: str = '' # SQL Server ODBC driver, detected when empty
+
+    def __post_init__(self):
+        if self.sql_type not in SQL_TYPES:
+            raise ValueError(f"Unsupported SQL type '{self.sql_type}'. Choose one of: {', '.join(SQL_TYPES)}.")
+        self.port = str(self.port or DEFAULT_PORTS.get(self.sql_type, ''))
+
+    def connect(self):
+        """Returns a connection to the database. Closing it hands it back to the pool."""
+        if self.sql_type == "SQLite" and not self.sqlite_path:
+            raise ValueError("No SQLite database file was given.")
+        if SQLALCHEMY_AVAILABLE:
+            return sql_connections.connect(self)
+        return self.open_connection()
+
+    def require_driver(self):
+        """Raises RuntimeError if the DB-API driver of the database is not installed."""
+        if self.sql_type == "PostgreSQL":
+            _require(PSYCOPG2_AVAILABLE, "psycopg2-binary", "PostgreSQL support")
+        elif self.sql_type == "MySQL":
+            _require(MYSQL_AVAILABLE, "mysql-connector-python", "MySQL support")
+        elif self.sql_type == "SQL Server":
+            _require(PYODBC_AVAILABLE, "pyodbc", "SQL Server support")
+
+    def open_connection(self):
+        """Opens a new, unpooled connection to the database."""
+        self.require_driver()
+        if self.sql_type == "SQLite":
+            if not self.sqlite_path:
+                raise ValueError("No SQLite database file was given.")
+            return sqlite3.connect(self.sqlite_path, check_same_thread=False)
+        if self.sql_type == "PostgreSQL":
+            return psycopg2.connect(host=self.host, port=self.port, dbname=self.dbname,
+                                    user=self.user, password=self.password)
+        if self.sql_type == "MySQL":
+            return mysql.connector.connect(host=self.host, port=self.port, database=self.dbname,
+                                           user=self.user, password=self.password)
+        # SQL Server
+        if not self.driver:
+            self.driver = detect_mssql_driver()
+        return pyodbc.connect(build_mssql_conn_str(self.driver, self.host, self.dbname, self.user, self.password))
+
+    def engine(self):
+        """Returns the shared, pooled SQLAlchemy engine of a PostgreSQL, MySQL or SQL Server database."""
+        return sql_connections.engine(self)
+
+    def describe(self):
+        """Identifies the database without its credentials, e.g. 'PostgreSQL://db1:5432/shop'."""
+        if self.sql_type == "SQLite":
+            return f"SQLite:{os.path.abspath(self.sqlite_path)}"
+        return f"{self.sql_type}://{self.host}:{self.port}/{self.dbname}"
+
+    def sqlalchemy_uri(self):
+        """Returns the SQLAlchemy URI of a PostgreSQL, MySQL or SQL Server database."""
+        credentials = f"{quote_plus(self.user)}:{quote_plus(self.password)}@" if self.user else ''
+        if self.sql_type == "PostgreSQL":
+            return f"postgresql+psycopg2://{credentials}{self.host}:{self.port}/{self.dbname}"
+        if self.sql_type == "MySQL":
+            return f"mysql+mysqlconnector://{credentials}{self.host}:{self.port}/{self.dbname}"
+        if self.sql_type == "SQL Server":
+            if not self.driver:
+                self.driver = detect_mssql_driver()
+            driver_name = self.driver.replace(' ', '+')
+            if self.user:
+                return f"mssql+pyodbc://{credentials}{self.host}/{self.dbname}?driver={driver_name}&TrustServerCertificate=yes"
+            return f"mssql+pyodbc://{self.host}/{self.dbname}?driver={driver_name}&TrustServerCertificate=yes&trusted_connection=yes"
+        raise ValueError("SQLite databases are written through sqlite3 connections, not an engine URI.")
+
+
+class SQLConnectionPool:
+    """
+    Keeps one pooled SQLAlchemy engine per database for the lifetime of the
+    process, so repeated operations reuse open connections instead of paying
+    the connect and login handshake each time. A pooled connection is pinged
+    before it is handed out and replaced if the server dropped it. Every
+    caller, e.g. each worker thread, checks out a connection of its own.
+    Connections are opened by the driver settings of SQLSettings (unbuffered
+    MySQL cursors, the detected ODBC driver), and driver errors are raised
+    unchanged.
+    """
+
+    def __init__(self, pool_size=SQL_POOL_SIZE, max_overflow=SQL_POOL_MAX_OVERFLOW):
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self._engines = {}
+        self._lock = threading.Lock()
+
+    def _key(self, settings):
+        return settings.describe(), settings.user, settings.password
+
+    def engine(self, settings):
+        """Returns the engine of a database, creating it on first use."""
+        _require(SQLALCHEMY_AVAILABLE, "SQLAlchemy", f"Pooled {settings.sql_type} connections")
+        settings.require_driver()
+        key = self._key(settings)
+        with self._lock:
+            engine = self._engines.get(key)
+            if engine is None:
+                if settings.sql_type == "SQLite":
+                    uri = f"sqlite:///{os.path.abspath(settings.sqlite_path)}"
+                else:
+                    uri = settings.sqlalchemy_uri()
+                engine = create_bulk_engine(uri, settings.sql_type, creator=settings.open_connection,
+                                            pool_pre_ping=True, pool_size=self.pool_size,
+                                            max_overflow=self.max_overflow)
+                self._engines[key] = engine
+        return engine
+
+    def connect(self, settings):
+        """Checks out a DB-API connection of the database's pool; close() checks it back in."""
+        return self.engine(settings).pool.connect()
+
+    def dispose(self, settings=None):
+        """Closes the pooled connections of one database, or of all of them."""
+        with self._lock:
+            if settings is None:
+                engines = list(self._engines.values())
+                self._engines.clear()
+            else:
+                engine = self._engines.pop(self._key(settings), None)
+                engines = [engine] if engine else []
+        for engine in engines:
+            engine.dispose()
+
+
+sql_connections = SQLConnectionPool() # Shared by every operation of the process
+
+
+def list_sql_tables(conn, sql_type):
+    """Returns the names of the user tables of a database."""
+    cursor = conn.cursor()
+    try:
+        if sql_type == "SQLite":
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
+        elif sql_type == "PostgreSQL":
+            cursor.execute("SELECT table_name FROM information_schema.tables WHERE table_schema = 'public'")
+        elif sql_type == "MySQL":
+            cursor.execute("SHOW TABLES")
+        else: # SQL Server
+            cursor.execute("SELECT table_name FROM information_schema.tables WHERE table_type = 'BASE TABLE'")
+        return [row[0] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def param_placeholder(sql_type):
+    """Returns the DB-API parameter marker of the dialect's driver."""
+    return '%s' if sql_type in ("PostgreSQL", "MySQL") else '?'
+
+
+def primary_key_columns(conn, sql_type, table):
+    """Returns the primary key columns of a table in key order, or an empty list if it has none."""
+    cursor = conn.cursor()
+    try:
+        if sql_type == "SQLite":
+            cursor.execute(f"PRAGMA table_info({quote_sql_identifier(table, sql_type)})")
+            return [row[1] for row in sorted((row for row in cursor.fetchall() if row[5]), key=lambda row: row[5])]
+        schema = {"PostgreSQL": "current_schema()", "MySQL": "DATABASE()", "SQL Server": "SCHEMA_NAME()"}[sql_type]
+        cursor.execute(
+            "SELECT kcu.column_name FROM information_schema.table_constraints tc "
+            "JOIN information_schema.key_column_usage kcu ON kcu.constraint_name = tc.constraint_name "
+            "AND kcu.table_schema = tc.table_schema AND kcu.table_name = tc.table_name "
+            f"WHERE tc.constraint_type = 'PRIMARY KEY' AND tc.table_name = {param_placeholder(sql_type)} AND tc.table_schema = {schema} "
+            "ORDER BY kcu.ordinal_position", (table,))
+        return [row[0] for row in cursor.fetchall()]
+    except Exception:
+        if sql_type == "PostgreSQL":
+            conn.rollback()
+        return []
+    finally:
+        cursor.close()
+
+
+class IndexSpec(NamedTuple):
+    """An index to replicate on a target: its (column, 1 or -1 for descending) keys in order, and whether it is unique."""
+    keys: tuple
+    unique: bool = False
+
+
+def sql_table_indexes(engine, table):
+    """
+    Returns the primary key, unique constraints and indexes of a table as
+    IndexSpecs, primary key first. Expression indexes are left out.
+    """
+    inspector = inspect(engine)
+    indexes = []
+    primary_key = inspector.get_pk_constraint(table).get('constrained_columns')
+    if primary_key:
+        indexes.append(IndexSpec(tuple((column, 1) for column in primary_key), True))
+    with warnings.catch_warnings(): # SQLAlchemy warns about each expression index it skips
+        warnings.simplefilter('ignore')
+        found = [(constraint['column_names'], True, {}) for constraint in inspector.get_unique_constraints(table)]
+        found += [(index['column_names'], index['unique'], index.get('column_sorting') or {})
+                  for index in inspector.get_indexes(table)]
+    for columns, unique, sorting in found:
+        if not columns or None in columns:
+            continue
+        keys = tuple((column, -1 if 'desc' in sorting.get(column, ()) else 1) for column in columns)
+        if all(index.keys != keys for index in indexes): # MySQL and SQLite report unique constraints as indexes too
+            indexes.append(IndexSpec(keys, bool(unique)))
+    return indexes
+
+
+def _execute(cursor, query, params=None):
+    if params:
+        cursor.execute(query, params)
+    else: # Without parameters, so '%' in a query isn't taken for a placeholder
+        cursor.execute(query)
+
+
+def count_sql_rows(conn, sql_type, query, params=None):
+    """Returns the number of rows a query yields, or None if it cannot be counted."""
+    cursor = conn.cursor()
+    try:
+        _execute(cursor, f"SELECT COUNT(*) FROM ({query.rstrip().rstrip(';')}) AS row_count_src", params)
+        return cursor.fetchone()[0]
+    except Exception:
+        if sql_type == "PostgreSQL":
+            conn.rollback() # A failed statement aborts the whole PG transaction
+        return None
+    finally:
+        cursor.close()
+
+
+def iter_sql_row_batches(conn, sql_type, query, batch_size=SQL_FETCH_BATCH_SIZE, params=None):
+    """
+    Yields the result of a query (with its DB-API `params`, if any) as (column names, rows) pairs,
+    the rows being a list of at most `batch_size` tuples.
+    Rows are pulled with fetchmany() from a server-side cursor where the driver has one,
+    so memory use depends on the batch size and not on the size of the result.
+    """
+    if sql_type == "PostgreSQL":
+        cursor = conn.cursor(name=f"stream_{uuid4().hex}") # Named cursor = server-side cursor
+        cursor.itersize = batch_size
+    elif sql_type == "MySQL":
+        cursor = conn.cursor(buffered=False)
+    else: # SQLite and SQL Server cursors stream by default
+        cursor = conn.cursor()
+    try:
+        _execute(cursor, query, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            if not isinstance(rows[0], tuple): # e.g. pyodbc.Row
+                rows = [tuple(row) for row in rows]
+            # Named PG cursors only expose the description after the first fetch
+            yield [col[0] for col in cursor.description], rows
+    finally:
+        if sql_type == "MySQL" and conn.unread_result:
+            conn.consume_results() # Unbuffered cursors can't be closed with rows pending
+        cursor.close()
+
+
+def iter_sql_chunks(conn, sql_type, query, batch_size=SQL_FETCH_BATCH_SIZE, params=None):
+    """Yields the result of a query as DataFrames of at most `batch_size` rows (see iter_sql_row_batches)."""
+    with closing(iter_sql_row_batches(conn, sql_type, query, batch_size, params)) as batches:
+        for columns, rows in batches:
+            yield pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+
+
+def key_range_query(sql_type, table, key, after=None, before=None, top=''):
+    """
+    Returns the query and parameters that select the rows of a table with
+    `after` < key < `before`, either bound being left open when None.
+    """
+    key_sql = quote_sql_identifier(key, sql_type)
+    conditions, params = [], []
+    if after is not None:
+        conditions.append(f"{key_sql} > {param_placeholder(sql_type)}")
+        params.append(after)
+    if before is not None:
+        conditions.append(f"{key_sql} < {param_placeholder(sql_type)}")
+        params.append(before)
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    return f"SELECT {top}* FROM {quote_sql_identifier(table, sql_type)}{where}", tuple(params)
+
+
+def sql_key_bounds(conn, sql_type, table, key):
+    """
+    Returns the (lowest, highest) values of `key`, both None for an empty
+    table, or None when they can't be read.
+    """
+    key_sql = quote_sql_identifier(key, sql_type)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT MIN({key_sql}), MAX({key_sql}) FROM {quote_sql_identifier(table, sql_type)}")
+        return tuple(cursor.fetchone())
+    except Exception:
+        if sql_type == "PostgreSQL":
+            conn.rollback()
+        return None # e.g. the rowid of a WITHOUT ROWID table
+    finally:
+        cursor.close()
+
+
+def key_range_splits(conn, sql_type, table, key, parts):
+    """
+    Splits the values of an integer `key` (e.g. the primary key or SQLite's
+    rowid) into `parts` ranges of equal width and returns the boundaries
+    between them, or None when the key isn't an integer or the table is empty.
+    """
+    low, high = sql_key_bounds(conn, sql_type, table, key) or (None, None)
+    if not isinstance(low, int) or not isinstance(high, int):
+        return None
+    width = (high - low + 1) / parts
+    return sorted({low + int(width * part) for part in range(1, parts)} - {low})
+
+
+def iter_sql_keyset_chunks(conn, sql_type, table, key, after=None, batch_size=SQL_FETCH_BATCH_SIZE, before=None):
+    """
+    Yields a table in `key` order as (DataFrame, last key) pairs of at most
+    `batch_size` rows. Each page is read with its own `WHERE key > ? ORDER BY key`
+    query (keyset pagination), so a page costs the same wherever it is in the
+    table and a run can continue after any page. Starts after `after` when given,
+    and stops before the key `before`.
+    """
+    key_sql = quote_sql_identifier(key, sql_type)
+    top, limit = (f"TOP {batch_size} ", "") if sql_type == "SQL Server" else ("", f" LIMIT {batch_size}")
+    while True:
+        cursor = conn.cursor()
+        try:
+            query, params = key_range_query(sql_type, table, key, after, before, top=top)
+            _execute(cursor, f"{query} ORDER BY {key_sql}{limit}", params)
+            rows = cursor.fetchall()
+            columns = [col[0] for col in cursor.description]
+        finally:
+            cursor.close()
+        if not rows:
+            return
+        if not isinstance(rows[0], tuple): # e.g. pyodbc.Row
+            rows = [tuple(row) for row in rows]
+        after = rows[-1][columns.index(key)]
+        yield pd.DataFrame.from_records(rows, columns=columns, coerce_float=True), after
+        if len(rows) < batch_size:
+            return
+
+
+def estimate_table_sizes(conn, sql_type, tables):
+    """
+    Returns a rough size per table (bytes or rows, depending on the backend) taken from
+    the catalog, so the largest tables can be scheduled first. Unknown sizes are 0.
+    """
+    sizes = dict.fromkeys(tables, 0)
+    cursor = conn.cursor()
+    try:
+        if sql_type == "SQLite":
+            for table in tables:
+                try: # MAX(rowid) is an index lookup, unlike COUNT(*)
+                    cursor.execute(f'SELECT MAX(rowid) FROM "{table}"')
+                    sizes[table] = cursor.fetchone()[0] or 0
+                except sqlite3.Error:
+                    pass # WITHOUT ROWID tables
+        else:
+            if sql_type == "PostgreSQL":
+                cursor.execute("SELECT c.relname, pg_total_relation_size(c.oid) FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace WHERE n.nspname = 'public' AND c.relkind IN ('r', 'p')")
+            elif sql_type == "MySQL":
+                cursor.execute("SELECT table_name, data_length + index_length FROM information_schema.tables WHERE table_schema = DATABASE()")
+            else: # SQL Server
+                cursor.execute("SELECT t.name, SUM(p.rows) FROM sys.tables t JOIN sys.partitions p ON p.object_id = t.object_id AND p.index_id IN (0, 1) GROUP BY t.name")
+            for name, size in cursor.fetchall():
+                if name in sizes:
+                    sizes[name] = int(size or 0)
+    except Exception:
+        if sql_type == "PostgreSQL":
+            conn.rollback()
+    finally:
+        cursor.close()
+    return sizes
+
+
+def sanitize_sql_name(name):
+    """Keeps only the characters that are safe in an unquoted SQL identifier."""
+    return ''.join(e for e in name if e.isalnum() or e == '_')
+
+
+class ColumnType(NamedTuple):
+    """
+    A column type independent of the dialect: 'boolean', 'integer', 'bigint',
+    'float', 'datetime', 'varchar' (with its `length`), 'text', or 'unknown'
+    while only NULLs have been seen.
+    """
+    kind: str
+    length: int = 0
+
+
+TEXT_COLUMN = ColumnType('text')
+_NUMBER_KINDS = ('integer', 'bigint', 'float') # Each one holds the values of the previous ones
+
+
+def _integer_type(values):
+    return ColumnType('integer' if -2**31 <= values.min() and values.max() < 2**31 else 'bigint')
+
+
+def _varchar_type(max_length):
+    length = next((n for n in VARCHAR_LENGTHS if n >= max_length * 2), None)
+    return ColumnType('varchar', length) if length else TEXT_COLUMN
+
+
+def infer_column_type(series):
+    """Returns the narrowest ColumnType that holds the values of a column; a varchar's length is its longest value."""
+    if pd.api.types.is_bool_dtype(series):
+        return ColumnType('boolean')
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return ColumnType('datetime')
+    values = series.dropna()
+    if values.empty:
+        return ColumnType('unknown')
+    if pd.api.types.is_integer_dtype(values):
+        return _integer_type(values)
+    if pd.api.types.is_float_dtype(values):
+        return ColumnType('float')
+    kind = pd.api.types.infer_dtype(values, skipna=False) # Object columns: the Python types of the values
+    if kind == 'boolean':
+        return ColumnType('boolean')
+    if kind == 'integer':
+        return _integer_type(values)
+    if kind in ('floating', 'mixed-integer-float'):
+        return ColumnType('float')
+    if kind == 'datetime':
+        return ColumnType('datetime')
+    if kind == 'string':
+        return ColumnType('varchar', int(values.str.len().max()))
+    return TEXT_COLUMN
+
+
+def widen_column_type(known, seen):
+    """
+    Returns the type a column declared as `known` (None for a new column)
+    needs to also hold values of type `seen`. New varchar columns get room
+    for values twice as long as the longest one seen.
+    """
+    if seen.kind == 'varchar' and (known is None or known.kind in ('unknown', 'varchar')):
+        if known is not None and known.kind == 'varchar' and seen.length <= known.length:
+            return known
+        return _varchar_type(seen.length)
+    if known is None or known.kind == 'unknown':
+        return seen
+    if seen.kind in ('unknown', known.kind):
+        return known
+    if known.kind in _NUMBER_KINDS and seen.kind == 'boolean':
+        return known # Stored as 0/1
+    if known.kind in _NUMBER_KINDS and seen.kind in _NUMBER_KINDS:
+        return max(known, seen, key=lambda column_type: _NUMBER_KINDS.index(column_type.kind))
+    return TEXT_COLUMN
+
+
+def infer_sql_schema(df):
+    """Infers the ColumnType of every column of a sample, e.g. documents flattened with dtype=object."""
+    return {column: widen_column_type(None, infer_column_type(df[column])) for column in df.columns}
+
+
+def column_ddl(column_type, sql_type):
+    """Returns the SQL type of a ColumnType in the given dialect."""
+    kind = column_type.kind
+    if kind == 'boolean':
+        return {"SQL Server": "BIT", "SQLite": "INTEGER"}.get(sql_type, "BOOLEAN")
+    if kind == 'integer':
+        return {"MySQL": "INT", "SQL Server": "INT"}.get(sql_type, "INTEGER")
+    if kind == 'bigint':
+        return "INTEGER" if sql_type == "SQLite" else "BIGINT"
+    if kind == 'float':
+        return {"PostgreSQL": "DOUBLE PRECISION", "MySQL": "DOUBLE", "SQL Server": "FLOAT"}.get(sql_type, "REAL")
+    if kind == 'datetime':
+        return {"MySQL": "DATETIME(6)", "SQL Server": "DATETIME2"}.get(sql_type, "TIMESTAMP")
+    if kind == 'varchar' and sql_type == "MySQL": # PostgreSQL stores TEXT and VARCHAR alike
+        return f"VARCHAR({column_type.length})"
+    if kind == 'varchar' and sql_type == "SQL Server":
+        return f"NVARCHAR({column_type.length})"
+    return "NVARCHAR(MAX)" if sql_type == "SQL Server" else "TEXT"
+
+
+def sql_column_type(series, sql_type):
+    """Picks a column type for `series` in the given SQL dialect."""
+    return column_ddl(widen_column_type(None, infer_column_type(series)), sql_type)
+
+
+def _reflected_column_type(sa_type):
+    """Maps a column type reflected by SQLAlchemy back to a ColumnType."""
+    if isinstance(sa_type, sa_types.Boolean):
+        return ColumnType('boolean')
+    if isinstance(sa_type, sa_types.BigInteger):
+        return ColumnType('bigint')
+    if isinstance(sa_type, sa_types.Integer):
+        return ColumnType('integer')
+    if isinstance(sa_type, (sa_types.Float, sa_types.Numeric)):
+        return ColumnType('float')
+    if isinstance(sa_type, sa_types.DateTime):
+        return ColumnType('datetime')
+    if isinstance(sa_type, sa_types.String) and sa_type.length:
+        return ColumnType('varchar', sa_type.length)
+    return TEXT_COLUMN
+
+
+def _mysql_row_bytes(column_type):
+    """Bytes of MySQL's row size limit taken by a column: VARCHAR counts in full (4 bytes per utf8mb4 character)."""
+    return column_type.length * 4 + 2 if column_type is not None and column_type.kind == 'varchar' else 0
+
+
+# --- Bulk-load fast paths ---
+def _pg_copy_value(value):
+    """Formats a value for PostgreSQL's COPY text format."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        value = '\\x' + bytes(value).hex() # bytea hex format
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+def _pg_copy_insert(table, conn, keys, data_iter):
+    """DataFrame.to_sql insert method that loads rows with COPY ... FROM STDIN through psycopg2."""
+    buffer = io.StringIO()
+    for row in data_iter:
+        buffer.write('\t'.join(_pg_copy_value(v) for v in row))
+        buffer.write('\n')
+    buffer.seek(0)
+    columns = ', '.join(f'"{k}"' for k in keys)
+    table_name = f'"{table.schema}"."{table.name}"' if table.schema else f'"{table.name}"'
+    with conn.connection.cursor() as cursor: # Raw psycopg2 cursor of the SQLAlchemy connection
+        cursor.copy_expert(f"COPY {table_name} ({columns}) FROM STDIN", buffer)
+
+
+def _sql_upsert_insert(key):
+    """
+    Returns a DataFrame.to_sql insert method that updates the rows whose `key`
+    already exists and inserts the others: INSERT ... ON CONFLICT on SQLite and
+    PostgreSQL, INSERT ... ON DUPLICATE KEY UPDATE on MySQL and MERGE on SQL
+    Server. The target needs a unique index on `key`.
+    """
+    def upsert(table, conn, keys, data_iter):
+        updates = [col for col in keys if col != key]
+        if isinstance(conn, sqlite3.Cursor): # pandas' sqlite3 fallback passes a cursor
+            columns = ', '.join(f'"{col}"' for col in keys)
+            action = ("DO UPDATE SET " + ', '.join(f'"{col}" = excluded."{col}"' for col in updates)) if updates else "DO NOTHING"
+            conn.executemany(f'INSERT INTO "{table.name}" ({columns}) VALUES ({", ".join("?" * len(keys))}) '
+                             f'ON CONFLICT ("{key}") {action}', list(data_iter))
+            return
+        dialect = conn.dialect.name
+        if dialect == 'postgresql':
+            statement = pg_insert(table.table)
+            statement = statement.on_conflict_do_update(index_elements=[key], set_={col: statement.excluded[col] for col in updates}) \
+                if updates else statement.on_conflict_do_nothing(index_elements=[key])
+        elif dialect == 'mysql':
+            statement = mysql_insert(table.table)
+            statement = statement.on_duplicate_key_update({col: statement.inserted[col] for col in (updates or [key])})
+        else: # SQL Server
+            quote = conn.dialect.identifier_preparer.quote
+            columns = ', '.join(quote(col) for col in keys)
+            update = ("WHEN MATCHED THEN UPDATE SET " + ', '.join(f"target.{quote(col)} = source.{quote(col)}" for col in updates) + " ") if updates else ""
+            # Raw pyodbc cursor, to send the rows as one parameter array. Not used as a context manager,
+            # which would commit on exit: the page's transaction is committed by engine.begin()
+            cursor = conn.connection.cursor()
+            try:
+                cursor.fast_executemany = True
+                cursor.executemany(
+                    f"MERGE INTO {quote(table.name)} WITH (HOLDLOCK) AS target "
+                    f"USING (VALUES ({', '.join('?' * len(keys))})) AS source ({columns}) "
+                    f"ON target.{quote(key)} = source.{quote(key)} {update}"
+                    f"WHEN NOT MATCHED THEN INSERT ({columns}) VALUES ({', '.join(f'source.{quote(col)}' for col in keys)});",
+                    list(data_iter))
+            finally:
+                cursor.close()
+            return
+        conn.execute(statement, [dict(zip(keys, row)) for row in data_iter])
+    return upsert
+
+
+def bulk_insert_options(sql_type):
+    """Returns the DataFrame.to_sql (method, chunksize) arguments for the fastest load path of a dialect."""
+    if sql_type == "PostgreSQL":
+        return _pg_copy_insert, None
+    if sql_type == "MySQL":
+        return 'multi', MYSQL_ROWS_PER_INSERT
+    # SQL Server relies on the engine's fast_executemany, SQLite on executemany in one transaction
+    return None, None
+
+
+def create_bulk_engine(uri, sql_type, **kwargs):
+    """Creates a SQLAlchemy engine tuned for bulk loads into the given dialect."""
+    _require(SQLALCHEMY_AVAILABLE, "SQLAlchemy", f"Writing to {sql_type}")
+    if sql_type == "SQL Server":
+        kwargs.setdefault('fast_executemany', True) # Sends parameter arrays instead of one round trip per row
+    return create_engine(uri, **kwargs)
+
+
+def tune_sqlite_for_bulk_load(conn):
+    """Relaxes durability settings on a SQLite connection that is used to load a new database file."""
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA journal_mode = MEMORY")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA cache_size = -200000") # ~200 MB page cache
+    return conn
+
+
+class SQLBatchWriter:
+    """
+    Writes DataFrame pages to one SQL table, each page in its own transaction.
+    The table is declared with an explicit CREATE TABLE, typed from `schema`
+    (column -> ColumnType, e.g. inferred from a sample with infer_sql_schema)
+    and the first page. Columns that first appear in a later page are added
+    with ALTER TABLE instead of rewriting the rows that were already loaded,
+    and a column whose values outgrow its type is widened in place. With an
+    `upsert_key`, rows whose key is already in the table are updated instead
+    of inserted again.
+    """
+
+    def __init__(self, target, sql_type, table_name, if_exists='replace', upsert_key=None, schema=None):
+        self.target = target # sqlite3 connection for SQLite, SQLAlchemy engine otherwise
+        self.sql_type = sql_type
+        self.table_name = table_name
+        self.if_exists = if_exists
+        self.upsert_key = upsert_key
+        self.schema = dict(schema or {})
+        self.columns = None # Known target columns, None until the table exists
+        self.column_types = {} # Declared ColumnType of the columns, where known
+        self.rows_written = 0
+        self.method, self.chunksize = bulk_insert_options(sql_type)
+        self._key_indexed = False # Whether the unique index that upserts rely on is in place
+        self._row_bytes = 0 # MySQL row size taken by the declared VARCHAR columns
+
+    def _quote(self, identifier):
+        if self.sql_type == "SQLite":
+            return f'"{identifier}"'
+        return self.target.dialect.identifier_preparer.quote(identifier)
+
+    def resume(self, key_column=None, after=None):
+        """
+        Appends to the existing table instead of creating it, for a transfer that
+        continues from a checkpoint. Rows with `key_column` > `after` were written
+        after the checkpoint was saved, so they are deleted to avoid duplicates.
+        """
+        if self.sql_type == "SQLite": # Columns take any value, so their types aren't tracked
+            self.columns = {row[1] for row in self.target.execute(f"PRAGMA table_info({self._quote(self.table_name)})")}
+        else:
+            inspector = inspect(self.target)
+            columns = inspector.get_columns(self.table_name) if inspector.has_table(self.table_name) else []
+            self.columns = {col['name'] for col in columns}
+            self.column_types = {col['name']: _reflected_column_type(col['type']) for col in columns}
+            self._row_bytes = sum(map(_mysql_row_bytes, self.column_types.values()))
+        if not self.columns: # The table was never created
+            self.columns = None
+            return
+        self.if_exists = 'append'
+        if after is not None:
+            self.delete_key_range(key_column, after)
+
+    def delete_key_range(self, key_column, after=None, before=None):
+        """Deletes the rows with after < key_column <= before (None meaning open) from a resumed table."""
+        if self.columns is None or key_column not in self.columns:
+            return
+        conditions, params = [], {}
+        if after is not None:
+            conditions.append(f"{self._quote(key_column)} > :after")
+            params['after'] = after
+        if before is not None:
+            conditions.append(f"{self._quote(key_column)} <= :before")
+            params['before'] = before
+        statement = f"DELETE FROM {self._quote(self.table_name)}" + (f" WHERE {' AND '.join(conditions)}" if conditions else "")
+        if self.sql_type == "SQLite":
+            with self.target: # sqlite3 also takes :name parameters
+                self.target.execute(statement, params)
+        else:
+            with self.target.begin() as conn:
+                conn.execute(text(statement), params)
+
+    def _page_type(self, series):
+        """The ColumnType of a page's values. Whole floats count as integers, as pandas reads [1, None] as [1.0, NaN]."""
+        if pd.api.types.is_float_dtype(series):
+            values = series.dropna()
+            if not values.empty and (values % 1 == 0).all() and values.abs().max() < 2**53:
+                return _integer_type(values)
+        return infer_column_type(series)
+
+    def _declare(self, column, column_type):
+        """Records the type of a column and returns its DDL. VARCHARs beyond MySQL's row size limit become TEXT."""
+        if column_type.kind == 'unknown': # Only NULLs so far
+            column_type = TEXT_COLUMN
+        if self.sql_type == "MySQL":
+            self._row_bytes -= _mysql_row_bytes(self.column_types.get(column))
+            if self._row_bytes + _mysql_row_bytes(column_type) > MYSQL_VARCHAR_ROW_BYTES:
+                column_type = TEXT_COLUMN
+            self._row_bytes += _mysql_row_bytes(column_type)
+        self.column_types[column] = column_type
+        return column_ddl(column_type, self.sql_type)
+
+    def _create_table_statements(self, df):
+        """Declares the sampled columns and the ones of the first page, typed to hold both."""
+        names = list(df.columns) + [col for col in self.schema if col not in df.columns]
+        declared = []
+        for col in names:
+            known = self.schema.get(col)
+            column_type = widen_column_type(known, self._page_type(df[col])) if col in df.columns else known
+            declared.append(f"{self._quote(col)} {self._declare(col, column_type)}")
+        self.columns = set(names)
+        table = self._quote(self.table_name)
+        statements = [f"DROP TABLE IF EXISTS {table}"] if self.if_exists == 'replace' else []
+        statements.append(f"CREATE TABLE {table} ({', '.join(declared)})")
+        return statements
+
+    def _alter_table_statements(self, df):
+        """Adds the columns that are new in this page, and widens the ones whose values no longer fit."""
+        table = self._quote(self.table_name)
+        add = "ADD" if self.sql_type == "SQL Server" else "ADD COLUMN"
+        statements = []
+        for col in df.columns:
+            if col not in self.columns:
+                known = self.schema.get(col)
+                ddl = self._declare(col, widen_column_type(known, self._page_type(df[col])))
+                statements.append(f"ALTER TABLE {table} {add} {self._quote(col)} {ddl}")
+                self.columns.add(col)
+                continue
+            known = self.column_types.get(col)
+            if known is None:
+                continue
+            wider = widen_column_type(known, self._page_type(df[col]))
+            if wider == known:
+                continue
+            ddl = self._declare(col, wider)
+            if self.sql_type == "PostgreSQL":
+                statements.append(f"ALTER TABLE {table} ALTER COLUMN {self._quote(col)} TYPE {ddl} USING {self._quote(col)}::{ddl}")
+            elif self.sql_type == "MySQL":
+                statements.append(f"ALTER TABLE {table} MODIFY {self._quote(col)} {ddl}")
+            elif self.sql_type == "SQL Server":
+                statements.append(f"ALTER TABLE {table} ALTER COLUMN {self._quote(col)} {ddl}")
+            # SQLite columns take any value
+        return statements
+
+    def _cast_to_column_types(self, df):
+        integer_columns = [col for col in df.columns if pd.api.types.is_float_dtype(df[col])
+                           and self.column_types.get(col, TEXT_COLUMN).kind in ('integer', 'bigint')]
+        return df.astype(dict.fromkeys(integer_columns, 'Int64')) if integer_columns else df
+
+    def _has_unique_key(self):
+        if self.sql_type in ("SQLite", "PostgreSQL"):
+            return False # CREATE UNIQUE INDEX IF NOT EXISTS is a no-op then
+        inspector = inspect(self.target)
+        if inspector.get_pk_constraint(self.table_name).get('constrained_columns') == [self.upsert_key]:
+            return True
+        return any(index['unique'] and index['column_names'] == [self.upsert_key]
+                   for index in inspector.get_indexes(self.table_name))
+
+    def _unique_key_statements(self, key_type):
+        """Statements that add the unique index on the upsert key, unless the table already has one."""
+        self._key_indexed = True
+        table, key = self._quote(self.table_name), self._quote(self.upsert_key)
+        index = self._quote(f"ux_{self.table_name}_{self.upsert_key}"[:60])
+        if self.sql_type in ("SQLite", "PostgreSQL"):
+            return [f"CREATE UNIQUE INDEX IF NOT EXISTS {index} ON {table} ({key})"]
+        if self._has_unique_key():
+            return []
+        statements = []
+        if 'TEXT' in key_type.upper() or 'MAX' in key_type.upper(): # Unbounded text columns can't be indexed
+            if self.sql_type == "MySQL":
+                statements.append(f"ALTER TABLE {table} MODIFY {key} VARCHAR(255)")
+            else: # SQL Server
+                statements.append(f"ALTER TABLE {table} ALTER COLUMN {key} NVARCHAR(450)")
+        statements.append(f"CREATE UNIQUE INDEX {index} ON {table} ({key})")
+        return statements
+
+    def _existing_key_type(self):
+        if self.sql_type in ("SQLite", "PostgreSQL"):
+            return ''
+        return next((str(col['type']) for col in inspect(self.target).get_columns(self.table_name)
+                     if col['name'] == self.upsert_key), '')
+
+    def _index_statement(self, index):
+        columns = [column for column, _ in index.keys]
+        unique = index.unique
+        parts = []
+        for column, direction in index.keys:
+            column_type = self.column_types.get(column, TEXT_COLUMN)
+            part = self._quote(column)
+            if self.sql_type == "SQL Server" and column_type.kind == 'text':
+                raise ValueError("NVARCHAR(MAX) columns can't be indexed on SQL Server")
+            if self.sql_type == "MySQL" and (column_type.kind == 'text' or _mysql_row_bytes(column_type) > 3072):
+                part += "(191)" # MySQL indexes a prefix of long text, which can't enforce uniqueness
+                unique = False
+            parts.append(part + (" DESC" if direction < 0 else ""))
+        prefix = "ux" if unique else "ix"
+        name = self._quote(f"{prefix}_{self.table_name}_{'_'.join(columns)}"[:60])
+        exists = "IF NOT EXISTS " if self.sql_type in ("SQLite", "PostgreSQL") else ""
+        statement = f"CREATE {'UNIQUE ' if unique else ''}INDEX {exists}{name} ON {self._quote(self.table_name)} ({', '.join(parts)})"
+        if unique and self.sql_type == "SQL Server": # Like the other databases, allow any number of NULLs
+            statement += " WHERE " + " AND ".join(f"{self._quote(column)} IS NOT NULL" for column in columns)
+        return statement
+
+    def build_indexes(self, indexes):
+        """
+        Creates `indexes` (IndexSpecs) on the loaded table, each in its own
+        transaction; indexes on columns that were never loaded are skipped.
+        Call it once the bulk load is done, as loading into an indexed table is
+        much slower. A unique index that the data violates is built as a plain
+        one. Returns the error messages of the indexes that failed or fell back.
+        """
+        errors = []
+        for index in indexes:
+            columns = [column for column, _ in index.keys]
+            if self.columns is None or not self.columns.issuperset(columns):
+                continue
+            try:
+                self._execute(self._index_statement(index))
+            except Exception as e:
+                if not index.unique:
+                    errors.append(f"({', '.join(columns)}): {e}")
+                    continue
+                try:
+                    self._execute(self._index_statement(index._replace(unique=False)))
+                    errors.append(f"({', '.join(columns)}): built as a non-unique index: {e}")
+                except Exception as e:
+                    errors.append(f"({', '.join(columns)}): {e}")
+        return errors
+
+    def add_foreign_key(self, columns, parent_table, parent_columns):
+        """
+        Declares `columns` of the loaded table as a foreign key to `parent_columns`
+        of `parent_table`, which need a primary key or unique index. Like the
+        indexes, add it once the bulk load is done. It's skipped on SQLite, which
+        can't add constraints to an existing table, and on SQL Server, where the
+        unique indexes built here are filtered and can't back a foreign key.
+        """
+        if self.sql_type in ("SQLite", "SQL Server") or self.columns is None or not self.columns.issuperset(columns):
+            return
+        name = self._quote(f"fk_{self.table_name}_{'_'.join(columns)}"[:60])
+        self._execute(f"ALTER TABLE {self._quote(self.table_name)} ADD CONSTRAINT {name} "
+                      f"FOREIGN KEY ({', '.join(map(self._quote, columns))}) "
+                      f"REFERENCES {self._quote(parent_table)} ({', '.join(map(self._quote, parent_columns))})")
+
+    def _execute(self, statement):
+        if self.sql_type == "SQLite":
+            with self.target:
+                self.target.execute(statement)
+        else:
+            with self.target.begin() as conn:
+                conn.execute(text(statement))
+
+    def write(self, df):
+        """Writes one page and returns the total number of rows written so far."""
+        if df.empty:
+            return self.rows_written
+        method, chunksize = self.method, self.chunksize
+        if self.columns is None and self.if_exists == 'append':
+            self.resume() # Appends to the table if it already exists
+        key_statements = []
+        if self.columns is None:
+            statements = self._create_table_statements(df)
+            if self.upsert_key: # A new table has nothing to update: load it, then index its key
+                key_type = self.column_types.get(self.upsert_key, TEXT_COLUMN)
+                key_statements = self._unique_key_statements(column_ddl(key_type, self.sql_type))
+        else:
+            statements = self._alter_table_statements(df)
+            if self.upsert_key:
+                if not self._key_indexed:
+                    statements += self._unique_key_statements(self._existing_key_type())
+                method, chunksize = _sql_upsert_insert(self.upsert_key), None
+        df = self._cast_to_column_types(df)
+
+        if self.sql_type == "SQLite":
+            with self.target: # Commits the page, or rolls it back on error
+                for statement in statements:
+                    self.target.execute(statement)
+                df.to_sql(self.table_name, self.target, if_exists='append', index=False, method=method)
+                for statement in key_statements:
+                    self.target.execute(statement)
+        else:
+            with self.target.begin() as conn:
+                for statement in statements:
+                    conn.execute(text(statement))
+                df.to_sql(self.table_name, conn, if_exists='append', index=False,
+                          method=method, chunksize=chunksize)
+                for statement in key_statements:
+                    conn.execute(text(statement))
+        self.rows_written += len(df)
+        return self.rows_written
+
+
+class SingleWriterQueue:
+    """
+    Funnels DataFrame pages from many reader threads into one writer thread, for
+    targets such as SQLite that only allow one writer at a time. `make_writer` is
+    called on the writer thread to create the SQLBatchWriter of each table. A
+    BaseException such as SystemExit stops every table: write() and close()
+    raise it.
+    """
+
+    def __init__(self, make_writer, max_pending=MAX_PENDING_BATCHES):
+        self._make_writer = make_writer
+        self._queue = queue.Queue(maxsize=max_pending)
+        self.writers = {} # table name -> SQLBatchWriter
+        self.errors = {} # table name -> first write error
+        self._fatal = None # BaseException that stopped the writer thread
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            table_name, df = item
+            if self._fatal or table_name in self.errors:
+                continue # The table already failed, drop its remaining pages
+            try:
+                if table_name not in self.writers:
+                    self.writers[table_name] = self._make_writer(table_name)
+                self.writers[table_name].write(df)
+            except Exception as e:
+                self.errors[table_name] = e
+            except BaseException as e: # Also SystemExit and the like; pages are still taken, so no reader blocks on the queue
+                self._fatal = e
+
+    def write(self, table_name, df):
+        """Queues a page for writing, blocking while the queue is full."""
+        if self._fatal:
+            raise self._fatal
+        if table_name in self.errors:
+            raise self.errors[table_name]
+        self._queue.put((table_name, df))
+
+    def close(self):
+        """Waits until every queued page has been written."""
+        self._queue.put(None)
+        self._thread.join()
+        if self._fatal:
+            raise self._fatal
+
+
+def list_target_tables(target, sql_type):
+    """Returns the table names of a write target (sqlite3 connection or SQLAlchemy engine)."""
+    if sql_type == "SQLite":
+        return list_sql_tables(target, sql_type)
+    return inspect(target).get_table_names()
+
+
+# --- Direct SQL-to-SQL copies ---
+def _text_type(sql_type):
+    if sql_type == "SQL Server":
+        return NVARCHAR() # NVARCHAR(MAX)
+    if sql_type == "MySQL":
+        return sa_types.Text(2**32 - 1) # LONGTEXT
+    return sa_types.Text()
+
+
+def _binary_type(sql_type):
+    if sql_type == "SQL Server":
+        return VARBINARY('max')
+    if sql_type == "MySQL":
+        return sa_types.LargeBinary(2**32 - 1) # LONGBLOB
+    return sa_types.LargeBinary()
+
+
+def _datetime_type(sql_type, timezone=False):
+    if sql_type == "SQL Server":
+        return DATETIMEOFFSET() if timezone else DATETIME2()
+    if sql_type == "MySQL":
+        return MYSQL_DATETIME(fsp=6)
+    return sa_types.DateTime(timezone=timezone)
+
+
+def portable_column_type(sa_type, sql_type, wide_integers=False):
+    """
+    Returns the SQLAlchemy type that holds the values of a reflected column
+    (e.g. from inspect().get_columns()) in the given target dialect. Types
+    the target lacks fall back to the nearest one: JSON, arrays and unknown
+    types become text, and NUMERIC without a precision becomes a double,
+    except on PostgreSQL. `wide_integers` makes every integer column a
+    BIGINT, for SQLite sources, whose INTEGER columns hold 64-bit values.
+    """
+    try:
+        generic = sa_type.as_generic()
+    except NotImplementedError: # e.g. SQLite columns declared without a type
+        return _text_type(sql_type)
+    if isinstance(generic, sa_types.Boolean):
+        return sa_types.Boolean()
+    if isinstance(generic, sa_types.Integer):
+        return sa_types.BigInteger() if wide_integers or isinstance(generic, sa_types.BigInteger) else type(generic)()
+    if isinstance(generic, sa_types.Float):
+        return sa_types.Float(53)
+    if isinstance(generic, sa_types.Numeric):
+        if generic.precision and (generic.precision <= 38 or sql_type == "PostgreSQL"):
+            return sa_types.Numeric(generic.precision, generic.scale)
+        return sa_types.Numeric() if sql_type == "PostgreSQL" else sa_types.Float(53)
+    if isinstance(generic, sa_types.DateTime):
+        return _datetime_type(sql_type, bool(generic.timezone))
+    if isinstance(generic, sa_types.Date):
+        return sa_types.Date()
+    if isinstance(generic, sa_types.Time):
+        return MYSQL_TIME(fsp=6) if sql_type == "MySQL" else sa_types.Time()
+    if isinstance(generic, sa_types.LargeBinary):
+        return _binary_type(sql_type)
+    if isinstance(generic, sa_types.Uuid):
+        return sa_types.Uuid() if sql_type in ("PostgreSQL", "SQL Server") else sa_types.String(36)
+    if isinstance(generic, sa_types.JSON) and sql_type != "SQL Server":
+        return sa_types.JSON()
+    if isinstance(generic, sa_types.Enum):
+        length = max(map(len, generic.enums), default=0)
+        return sa_types.String(length) if length else _text_type(sql_type)
+    if isinstance(generic, sa_types.String) and not isinstance(generic, sa_types.Text) and generic.length:
+        if sql_type == "SQL Server":
+            return sa_types.Unicode(generic.length) if generic.length <= 4000 else NVARCHAR()
+        return sa_types.String(generic.length)
+    return _text_type(sql_type)
+
+
+def table_column_types(engine, table, sql_type):
+    """Returns {column: SQLAlchemy type} for copying a table into the given target dialect (see portable_column_type)."""
+    wide_integers = engine.dialect.name == 'sqlite'
+    return {col['name']: portable_column_type(col['type'], sql_type, wide_integers) for col in inspect(engine).get_columns(table)}
+
+
+def _value_column_type(value, sql_type):
+    """The SQLAlchemy type for a column of a query result, from one of its values."""
+    if isinstance(value, bool):
+        return sa_types.Boolean()
+    if isinstance(value, int):
+        return sa_types.BigInteger()
+    if isinstance(value, float):
+        return sa_types.Float(53)
+    if isinstance(value, Decimal):
+        return sa_types.Numeric(38, 10)
+    if isinstance(value, datetime.datetime):
+        return _datetime_type(sql_type, value.tzinfo is not None)
+    if isinstance(value, datetime.date):
+        return sa_types.Date()
+    if isinstance(value, datetime.time):
+        return MYSQL_TIME(fsp=6) if sql_type == "MySQL" else sa_types.Time()
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return _binary_type(sql_type)
+    return _text_type(sql_type)
+
+
+def row_column_types(columns, rows, sql_type):
+    """
+    Returns {column: SQLAlchemy type} for a query result that has no table to
+    reflect, from the first non-NULL value of each column in `rows`.
+    Integers are declared as BIGINT and strings as text, as later rows may
+    hold larger values.
+    """
+    types = {}
+    for position, column in enumerate(columns):
+        value = next((row[position] for row in rows if row[position] is not None), None)
+        types[column] = _value_column_type(value, sql_type)
+    return types
+
+
+def _driver_value(value, sql_type):
+    """Converts a value read from one driver into one the target's driver accepts."""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    if isinstance(value, (UUID, datetime.timedelta)):
+        return str(value)
+    if isinstance(value, (memoryview, bytearray)):
+        return bytes(value)
+    if sql_type == "SQLite" and isinstance(value, (Decimal, datetime.date, datetime.time)):
+        return str(value) # sqlite3 has no Decimal adapter, and its date adapters are deprecated
+    return value
+
+
+class SQLRowWriter:
+    """
+    Writes pages of row tuples, as read by iter_sql_row_batches, to one SQL
+    table through the bulk path of the target: COPY ... FROM STDIN on
+    PostgreSQL, multi-row INSERTs on MySQL, fast_executemany on SQL Server
+    and executemany on SQLite. No DataFrame is built on the way. Each page is
+    committed on its own. `prepare()` and `send()` split a write in two, so a
+    pipeline can convert the next page while one is sent.
+    """
+
+    def __init__(self, settings, table_name):
+        self.settings = settings
+        self.sql_type = settings.sql_type
+        self.table_name = table_name
+        self.columns = None # Set by create()
+        self.rows_written = 0
+        self._statement = None
+        self._converted = {} # Column position -> whether its values need _driver_value, decided at the first non-NULL one
+        self._conn = None
+
+    def create(self, column_types):
+        """Replaces the table with one of `column_types` ({column: SQLAlchemy type}, in order)."""
+        _require(SQLALCHEMY_AVAILABLE, "SQLAlchemy", f"Copying tables to {self.sql_type}")
+        row_bytes = 0
+        columns = []
+        for name, column_type in column_types.items():
+            if self.sql_type == "MySQL" and isinstance(column_type, sa_types.String) and column_type.length:
+                row_bytes += column_type.length * 4 + 2
+                if row_bytes > MYSQL_VARCHAR_ROW_BYTES: # VARCHARs beyond MySQL's row size limit become TEXT
+                    column_type = _text_type(self.sql_type)
+            columns.append(Column(name, column_type))
+        table = Table(self.table_name, MetaData(), *columns)
+        new_database = self.sql_type == "SQLite" and not os.path.exists(self.settings.sqlite_path)
+        engine = self.settings.engine()
+        table.drop(engine, checkfirst=True)
+        table.create(engine)
+        self.columns = list(column_types)
+        quoted = ', '.join(quote_sql_identifier(column, self.sql_type) for column in self.columns)
+        target = quote_sql_identifier(self.table_name, self.sql_type)
+        if self.sql_type == "PostgreSQL":
+            self._statement = f"COPY {target} ({quoted}) FROM STDIN"
+        else:
+            markers = ', '.join([param_placeholder(self.sql_type)] * len(self.columns))
+            self._statement = f"INSERT INTO {target} ({quoted}) VALUES ({markers})"
+        if self.sql_type == "SQLite": # A connection of its own, tuned for the load if the copy creates the database
+            self._conn = self.settings.open_connection()
+            if new_database:
+                tune_sqlite_for_bulk_load(self._conn)
+        else:
+            self._conn = self.settings.connect()
+
+    def prepare(self, rows):
+        """Converts a page for the target's driver. Returns the (payload, row count) that send() takes."""
+        for position in range(len(self.columns)):
+            if position not in self._converted:
+                value = next((row[position] for row in rows if row[position] is not None), None)
+                if value is not None:
+                    self._converted[position] = _driver_value(value, self.sql_type) is not value
+        positions = [position for position, converted in self._converted.items() if converted]
+        if positions:
+            rows = [list(row) for row in rows]
+            for row in rows:
+                for position in positions:
+                    row[position] = _driver_value(row[position], self.sql_type)
+        if self.sql_type == "PostgreSQL":
+            buffer = io.StringIO()
+            for row in rows:
+                buffer.write('\t'.join(_pg_copy_value(v) for v in row))
+                buffer.write('\n')
+            buffer.seek(0)
+            return buffer, len(rows)
+        return rows, len(rows)
+
+    def send(self, prepared):
+        """Writes a page converted by prepare() in one transaction. Returns the total number of rows written so far."""
+        payload, count = prepared
+        if not count:
+            return self.rows_written
+        cursor = self._conn.cursor()
+        try:
+            if self.sql_type == "PostgreSQL":
+                cursor.copy_expert(self._statement, payload)
+            elif self.sql_type == "MySQL": # mysql-connector sends executemany() INSERTs as multi-row statements
+                for start in range(0, count, MYSQL_ROWS_PER_INSERT):
+                    cursor.executemany(self._statement, payload[start:start + MYSQL_ROWS_PER_INSERT])
+            else:
+                if self.sql_type == "SQL Server":
+                    cursor.fast_executemany = True # Sends the page as one parameter array
+                cursor.executemany(self._statement, payload)
+            self._conn.commit()
+        except Exception:
+            self._conn.rollback()
+            raise
+        finally:
+            cursor.close()
+        self.rows_written += count
+        return self.rows_written
+
+    def write(self, rows):
+        """Writes one page of row tuples. Returns the total number of rows written so far."""
+        return self.send(self.prepare(rows))
+
+    def close(self):
+        """Releases the target connection."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -1,14 +1,21 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
-import sqlite3
 import customtkinter as ctk
-import json
+import importlib.util
 import os, sys
+from contextlib import closing
+from dataclasses import replace
 from pymongo import MongoClient, mongo_client
 import threading
 from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
-import pandas as pd
 from pathlib import Path
+from converter import engine
+from converter.engine import DEFAULT_PARALLEL_WORKERS, MAX_PARALLEL_WORKERS, Reporter
+from converter.export import EXPORT_FORMATS
+from converter.imports import IMPORT_FORMATS
+from converter.mongo import connect_mongo
+from converter.preview import PreviewPager, format_cell, iter_mongo_preview_pages, iter_sql_preview_pages
+from converter.sql import SQL_TYPES, SQLSettings, detect_mssql_driver, list_sql_tables, quote_sql_identifier, sql_connections
  
 # --- Modern GUI Settings ---
 try:
@@ -27,13 +34,180 @@ except ImportError:
 PYODBC_AVAILABLE = False
 try:
     import pyodbc
-    from sqlalchemy import create_engine, inspect
+    if importlib.util.find_spec("sqlalchemy") is None: # SQL Server is reached through SQLAlchemy
+        raise ImportError("sqlalchemy")
     PYODBC_AVAILABLE = True
 except ImportError:
     pass # Will be handled in the UI
 
 ctk.set_appearance_mode("System")  # "System", "Dark", "Light"
 ctk.set_default_color_theme("blue") # "blue", "green", "dark-blue"
+
+PREVIEW_PREFETCH_ROWS = 200 # Load the next preview page once the view gets this close to the last loaded row
+CSV_FILE_TYPES = [("CSV files", "*.csv"), ("Gzip-compressed CSV", "*.csv.gz"), ("Zstandard-compressed CSV", "*.csv.zst")]
+
+
+def export_file_types(source):
+    """Returns the save dialog's file types for the export formats of a 'sql' or 'mongo' source, CSV first."""
+    file_types = list(CSV_FILE_TYPES)
+    for fmt in EXPORT_FORMATS[1:]:
+        if getattr(fmt, f'export_{source}') is not None:
+            file_types.append((f"{fmt.name} files", " ".join(f"*{extension}" for extension in fmt.extensions)))
+    return file_types
+
+
+IMPORT_FILE_TYPES = [("Data files", " ".join(f"*{extension}" for fmt in IMPORT_FORMATS for extension in fmt.extensions))]
+IMPORT_FILE_TYPES += [(f"{fmt.name} files", " ".join(f"*{extension}" for extension in fmt.extensions)) for fmt in IMPORT_FORMATS]
+
+
+class GuiReporter(Reporter):
+    """Routes the log, progress and questions of an engine operation to the app's widgets and dialogs."""
+
+    def __init__(self, app):
+        super().__init__()
+        self.app = app
+
+    def log(self, message):
+        self.app.log(message)
+
+    def progress(self, percent):
+        self.app.root.after(0, lambda: self.app._update_progress(percent))
+
+    def confirm(self, title, question):
+        return self.app._ask_in_main_thread(lambda: messagebox.askyesno(title, question))
+
+    def notify(self, title, message):
+        self.app.root.after(0, lambda: messagebox.showinfo(title, message))
+
+
+class PreviewGrid:
+    """
+    A window that browses the rows of a PreviewPager. The Treeview only holds as
+    many items as fit on screen; scrolling refills their values from the loaded
+    rows, so a million-row preview costs no more to draw than a ten-row one.
+    The next page is loaded in the background when the view nears the last
+    loaded row.
+    """
+
+    def __init__(self, root, pager, title):
+        self.root = root
+        self.pager = pager
+        self.offset = 0 # Index of the row in the first item
+        self.closed = False
+
+        self.win = ctk.CTkToplevel(root)
+        self.win.title(title)
+        self.win.geometry("700x400")
+        self.win.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.status = ctk.CTkLabel(self.win, text="", anchor="w")
+        self.status.pack(side="bottom", fill="x", padx=10, pady=(0, 5))
+        frame = ctk.CTkFrame(self.win)
+        frame.pack(padx=10, pady=10, fill="both", expand=True)
+
+        self.tree = ttk.Treeview(frame, show="headings", selectmode="none")
+        self.row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+
+        # The vertical scrollbar follows the rows, not the few items of the tree
+        self.vsb = ttk.Scrollbar(frame, orient="vertical", command=self._on_scrollbar)
+        hsb = ttk.Scrollbar(frame, orient="horizontal", command=self.tree.xview)
+        self.tree.configure(xscrollcommand=hsb.set)
+
+        self.vsb.pack(side="right", fill="y")
+        hsb.pack(side="bottom", fill="x")
+        self.tree.pack(side="left", fill="both", expand=True)
+
+        self.tree.bind("<Configure>", lambda event: self._resize(event.height))
+        self.tree.bind("<MouseWheel>", lambda event: self._scroll_to(self.offset - 3 * (1 if event.delta > 0 else -1)))
+        self.tree.bind("<Button-4>", lambda event: self._scroll_to(self.offset - 3)) # Linux wheel up
+        self.tree.bind("<Button-5>", lambda event: self._scroll_to(self.offset + 3)) # Linux wheel down
+        for key, step in (("<Prior>", -1), ("<Next>", 1)):
+            self.tree.bind(key, lambda event, step=step: self._scroll_to(self.offset + step * self._visible_rows()))
+        self.tree.bind("<Home>", lambda event: self._scroll_to(0))
+        self.tree.bind("<End>", lambda event: self._scroll_to(len(self.pager.rows)))
+        self.tree.focus_set()
+        self.refresh()
+
+    def _visible_rows(self):
+        return max(1, len(self.tree.get_children()))
+
+    def _set_columns(self):
+        columns = list(self.pager.columns)
+        ids = [f"c{position}" for position in range(len(columns))] # Column names may repeat, e.g. in a join
+        self.tree.configure(columns=ids)
+        for column_id, name in zip(ids, columns):
+            self.tree.heading(column_id, text=name)
+            self.tree.column(column_id, width=100, anchor="w", stretch=False)
+
+    def _resize(self, height):
+        wanted = max(1, height // self.row_height - 1) # One row's height goes to the headings
+        items = self.tree.get_children()
+        if len(items) > wanted:
+            self.tree.delete(*items[wanted:])
+        for _ in range(wanted - len(items)):
+            self.tree.insert("", "end", values=())
+        self._render()
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self._scroll_to(int(float(amount) * len(self.pager.rows)))
+        elif unit == "pages":
+            self._scroll_to(self.offset + int(amount) * self._visible_rows())
+        else:
+            self._scroll_to(self.offset + int(amount))
+
+    def _scroll_to(self, offset):
+        self.offset = offset
+        self._render()
+        self._load_ahead()
+
+    def _render(self):
+        """Shows the rows from `offset` on in the items of the tree, formatting only those rows."""
+        rows = self.pager.rows
+        total = len(rows)
+        items = self.tree.get_children()
+        self.offset = max(0, min(self.offset, total - len(items)))
+        for position, item in enumerate(items):
+            index = self.offset + position
+            self.tree.item(item, values=[format_cell(value) for value in rows[index]] if index < total else ())
+        if total:
+            self.vsb.set(self.offset / total, min(1.0, (self.offset + len(items)) / total))
+        else:
+            self.vsb.set(0.0, 1.0)
+
+    def _load_ahead(self):
+        pager = self.pager
+        if self.offset + self._visible_rows() + PREVIEW_PREFETCH_ROWS >= len(pager.rows):
+            if pager.request_more(lambda: self.root.after(0, self.refresh)):
+                self._update_status()
+
+    def _update_status(self):
+        pager = self.pager
+        text = f"{len(pager.rows):,} rows loaded"
+        if pager.truncated:
+            text += f", stopped at the first {pager.max_rows:,} rows"
+        elif pager.exhausted:
+            text += " (all rows)"
+        if pager.error is not None:
+            text += f". Could not load more rows: {pager.error}"
+        elif pager.loading:
+            text += ", loading more..."
+        self.status.configure(text=text)
+
+    def refresh(self):
+        """Picks up the rows (and columns) loaded since the last call; runs in the main thread."""
+        if self.closed:
+            return
+        if len(self.tree["columns"]) != len(self.pager.columns):
+            self._set_columns()
+        self._render()
+        self._update_status()
+        self._load_ahead()
+
+    def close(self):
+        self.closed = True
+        self.pager.close()
+        self.win.destroy()
  
  
 class SQLNoSQLConverterApp:
@@ -68,7 +242,6 @@ class SQLNoSQLConverterApp:
         self.pg_dbname = tk.StringVar(value="postgres")
         self.pg_user = tk.StringVar(value="postgres")
         self.pg_password = tk.StringVar()
-        self.pg_conn = None # To store active PG connection
 
         # MS SQL Server
         self.mssql_server = tk.StringVar(value="localhost")
@@ -76,7 +249,6 @@ class SQLNoSQLConverterApp:
         self.mssql_user = tk.StringVar()
         self.mssql_password = tk.StringVar()
         self.mssql_driver = "" # To store the detected driver
-        self.mssql_conn = None # To store active MS SQL connection
 
         # MySQL
         self.mysql_host = tk.StringVar(value="localhost")
@@ -84,7 +256,7 @@ class SQLNoSQLConverterApp:
         self.mysql_dbname = tk.StringVar()
         self.mysql_user = tk.StringVar(value="root")
         self.mysql_password = tk.StringVar()
-        self.mysql_conn = None # To store active MySQL connection
+        self.connected_sql = {} # SQL type -> settings of the last successful connection (connections come from the shared pool)
 
         # MongoDB
         self.mongo_uri = tk.StringVar(value="mongodb://localhost:27017/")
@@ -92,6 +264,24 @@ class SQLNoSQLConverterApp:
         self.mongo_client = None
         self.use_custom_query = tk.BooleanVar(value=False)
         self.custom_collection_name = tk.StringVar()
+        self.relaxed_write_concern = tk.BooleanVar(value=False)
+        self.native_datetimes = tk.BooleanVar(value=False)
+        self.normalize_arrays = tk.BooleanVar(value=False) # Arrays of sub-documents become child tables
+        self.mongo_export_fields = tk.StringVar() # Comma-separated field paths for exports
+
+        # Parallelism for the full-database conversions
+        self.parallel_workers = tk.StringVar(value=str(DEFAULT_PARALLEL_WORKERS))
+
+        # Incremental sync of the selected table/collection
+        self.incremental_sync = tk.BooleanVar(value=False)
+        self.sync_watermark = tk.StringVar() # e.g. updated_at; empty = primary key / _id
+
+        # Target of the direct SQL-to-SQL copies
+        self.sql_target_type = tk.StringVar(value="SQLite")
+
+        # Target of the direct MongoDB-to-MongoDB copies
+        self.mongo_target_uri = tk.StringVar()
+        self.mongo_target_db = tk.StringVar() # Empty = the source database's name
 
         self.create_widgets()
         self.create_menu()
@@ -191,7 +381,7 @@ class SQLNoSQLConverterApp:
         self.custom_query_text = ctk.CTkTextbox(self.custom_query_frame, wrap=tk.WORD, height=150)
         self.custom_query_text.grid(row=0, column=1, padx=10, pady=5, sticky="ew")
 
-        ctk.CTkLabel(self.custom_query_frame, text="Target Collection Name:").grid(row=1, column=0, padx=10, pady=5, sticky="w")
+        ctk.CTkLabel(self.custom_query_frame, text="Target Collection/Table Name:").grid(row=1, column=0, padx=10, pady=5, sticky="w")
         self.entry_custom_collection = ctk.CTkEntry(self.custom_query_frame, textvariable=self.custom_collection_name)
         self.entry_custom_collection.grid(row=1, column=1, padx=10, pady=5, sticky="ew")
 
@@ -217,6 +407,17 @@ class SQLNoSQLConverterApp:
         self.combo_mongo_collections.grid(row=3, column=1, padx=5, pady=5, sticky="ew")
         ctk.CTkButton(mongo_frame, text="Preview Data", command=self.preview_mongo_data).grid(row=3, column=2, padx=10, pady=5)
 
+        ctk.CTkCheckBox(mongo_frame, text="Relaxed write concern for bulk loads (w=1, no journal wait)",
+                        variable=self.relaxed_write_concern).grid(row=4, column=0, columnspan=3, padx=10, pady=(5, 0), sticky="w")
+        ctk.CTkCheckBox(mongo_frame, text="Store SQL dates as native BSON dates (instead of ISO strings)",
+                        variable=self.native_datetimes).grid(row=5, column=0, columnspan=3, padx=10, pady=(5, 0), sticky="w")
+        ctk.CTkCheckBox(mongo_frame, text="Normalize arrays of sub-documents into child tables (MongoDB to SQL)",
+                        variable=self.normalize_arrays).grid(row=6, column=0, columnspan=3, padx=10, pady=(5, 0), sticky="w")
+
+        ctk.CTkLabel(mongo_frame, text="Export Fields:").grid(row=7, column=0, padx=10, pady=(5, 10), sticky="w")
+        ctk.CTkEntry(mongo_frame, textvariable=self.mongo_export_fields).grid(row=7, column=1, padx=5, pady=(5, 10), sticky="ew")
+        ctk.CTkLabel(mongo_frame, text="(optional, e.g. name, address.city)").grid(row=7, column=2, padx=10, pady=(5, 10), sticky="w")
+
         # --- Conversion Buttons Frame ---
         conversion_frame = ctk.CTkFrame(self.main_frame)
         conversion_frame.grid(row=4, column=0, padx=10, pady=10, sticky="ew")
@@ -230,16 +431,60 @@ class SQLNoSQLConverterApp:
         self.btn_entire_db_to_mongo.grid(row=1, column=0, padx=5, pady=(5, 10), sticky="nsew")
         self.btn_entire_mongo_to_sql = ctk.CTkButton(conversion_frame, text="Convert Entire MongoDB to SQL", command=self.convert_entire_mongo_to_sql)
         self.btn_entire_mongo_to_sql.grid(row=1, column=1, padx=5, pady=(5, 10), sticky="nsew")
+
+        workers_frame = ctk.CTkFrame(conversion_frame, fg_color="transparent")
+        workers_frame.grid(row=2, column=0, columnspan=2, padx=5, pady=(0, 10), sticky="w")
+        ctk.CTkLabel(workers_frame, text="Parallel Workers (entire DB / key ranges of one table or collection):").grid(row=0, column=0, padx=5, sticky="w")
+        self.combo_parallel_workers = ctk.CTkComboBox(workers_frame, variable=self.parallel_workers, width=80,
+                                                      values=[str(n) for n in range(1, MAX_PARALLEL_WORKERS + 1)])
+        self.combo_parallel_workers.grid(row=0, column=1, padx=5, sticky="w")
+
+        sync_frame = ctk.CTkFrame(conversion_frame, fg_color="transparent")
+        sync_frame.grid(row=3, column=0, columnspan=2, padx=5, pady=(0, 10), sticky="w")
+        ctk.CTkCheckBox(sync_frame, text="Incremental sync (selected table/collection: upsert changes since the last sync)",
+                        variable=self.incremental_sync).grid(row=0, column=0, columnspan=3, padx=5, sticky="w")
+        ctk.CTkLabel(sync_frame, text="Watermark Column/Field:").grid(row=1, column=0, padx=5, pady=(5, 0), sticky="w")
+        ctk.CTkEntry(sync_frame, textvariable=self.sync_watermark, width=160).grid(row=1, column=1, padx=5, pady=(5, 0), sticky="w")
+        ctk.CTkLabel(sync_frame, text="(optional, e.g. updated_at; default: primary key / _id)").grid(row=1, column=2, padx=5, pady=(5, 0), sticky="w")
+
+        sql_copy_frame = ctk.CTkFrame(conversion_frame, fg_color="transparent")
+        sql_copy_frame.grid(row=4, column=0, columnspan=2, padx=5, pady=(0, 10), sticky="ew")
+        sql_copy_frame.grid_columnconfigure((2, 3), weight=1)
+        ctk.CTkLabel(sql_copy_frame, text="Copy to SQL Database:").grid(row=0, column=0, padx=5, sticky="w")
+        ctk.CTkComboBox(sql_copy_frame, variable=self.sql_target_type, values=list(SQL_TYPES), state="readonly",
+                        width=120).grid(row=0, column=1, padx=5, sticky="w")
+        self.btn_sql_to_sql = ctk.CTkButton(sql_copy_frame, text="Copy SQL Source to Target", command=self.copy_sql_to_sql)
+        self.btn_sql_to_sql.grid(row=0, column=2, padx=5, sticky="ew")
+        self.btn_sql_db_to_sql = ctk.CTkButton(sql_copy_frame, text="Copy Entire SQL DB to Target", command=self.copy_sql_db_to_sql)
+        self.btn_sql_db_to_sql.grid(row=0, column=3, padx=5, sticky="ew")
+        ctk.CTkLabel(sql_copy_frame, text="(a server target uses its last connection made above; a SQLite target is picked as a file)").grid(
+            row=1, column=0, columnspan=4, padx=5, pady=(5, 0), sticky="w")
+
+        mongo_copy_frame = ctk.CTkFrame(conversion_frame, fg_color="transparent")
+        mongo_copy_frame.grid(row=5, column=0, columnspan=2, padx=5, pady=(0, 10), sticky="ew")
+        mongo_copy_frame.grid_columnconfigure(1, weight=1)
+        ctk.CTkLabel(mongo_copy_frame, text="Copy to MongoDB URI:").grid(row=0, column=0, padx=5, sticky="w")
+        ctk.CTkEntry(mongo_copy_frame, textvariable=self.mongo_target_uri).grid(row=0, column=1, padx=5, sticky="ew")
+        ctk.CTkLabel(mongo_copy_frame, text="Database (empty: same name):").grid(row=0, column=2, padx=5, sticky="w")
+        ctk.CTkEntry(mongo_copy_frame, textvariable=self.mongo_target_db, width=140).grid(row=0, column=3, padx=5, sticky="w")
+        self.btn_mongo_to_mongo = ctk.CTkButton(mongo_copy_frame, text="Copy Collection to Target", command=self.copy_mongo_to_mongo)
+        self.btn_mongo_to_mongo.grid(row=1, column=0, columnspan=2, padx=5, pady=(5, 0), sticky="ew")
+        self.btn_mongo_db_to_mongo = ctk.CTkButton(mongo_copy_frame, text="Copy Entire MongoDB to Target", command=self.copy_mongo_db_to_mongo)
+        self.btn_mongo_db_to_mongo.grid(row=1, column=2, columnspan=2, padx=5, pady=(5, 0), sticky="ew")
         
         # --- Export Frame ---
         self.export_frame = ctk.CTkFrame(self.main_frame)
         self.export_frame.grid(row=3, column=0, padx=10, pady=10, sticky="ew")
         self.export_frame.grid_columnconfigure((0, 1), weight=1)
-        ctk.CTkLabel(self.export_frame, text="Export to CSV", font=ctk.CTkFont(size=14, weight="bold")).grid(row=0, column=0, columnspan=2, padx=10, pady=(10,5), sticky="w")
-        self.btn_export_sql_csv = ctk.CTkButton(self.export_frame, text="Export SQL Source to CSV", command=self.export_sql_to_csv)
-        self.btn_export_sql_csv.grid(row=1, column=0, padx=5, pady=10, sticky="ew")
-        self.btn_export_mongo_csv = ctk.CTkButton(self.export_frame, text="Export NoSQL Source to CSV", command=self.export_mongo_to_csv)
-        self.btn_export_mongo_csv.grid(row=1, column=1, padx=5, pady=10, sticky="ew")
+        ctk.CTkLabel(self.export_frame, text="Export and Import Files", font=ctk.CTkFont(size=14, weight="bold")).grid(row=0, column=0, columnspan=2, padx=10, pady=(10,5), sticky="w")
+        self.btn_export_sql = ctk.CTkButton(self.export_frame, text="Export SQL Source to File", command=self.export_sql_to_file)
+        self.btn_export_sql.grid(row=1, column=0, padx=5, pady=10, sticky="ew")
+        self.btn_export_mongo = ctk.CTkButton(self.export_frame, text="Export NoSQL Source to File", command=self.export_mongo_to_file)
+        self.btn_export_mongo.grid(row=1, column=1, padx=5, pady=10, sticky="ew")
+        self.btn_import_sql = ctk.CTkButton(self.export_frame, text="Import Files into SQL", command=self.import_files_to_sql)
+        self.btn_import_sql.grid(row=2, column=0, padx=5, pady=(0, 10), sticky="ew")
+        self.btn_import_mongo = ctk.CTkButton(self.export_frame, text="Import Files into NoSQL", command=self.import_files_to_mongo)
+        self.btn_import_mongo.grid(row=2, column=1, padx=5, pady=(0, 10), sticky="ew")
 
         # --- Progress Bar ---
         self.progress_frame = ctk.CTkFrame(self.main_frame, fg_color="transparent")
@@ -353,11 +598,8 @@ class SQLNoSQLConverterApp:
         self.sqlite_path.set(path)
         self.log(f"Selected SQLite DB: {path}")
         try:
-            conn = sqlite3.connect(path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-            tables = [row[0] for row in cursor.fetchall()]
-            conn.close()
+            with closing(SQLSettings("SQLite", sqlite_path=path).connect()) as conn:
+                tables = list_sql_tables(conn, "SQLite")
 
             if tables:
                 self.combo_sql_tables.configure(values=tables)
@@ -375,21 +617,12 @@ class SQLNoSQLConverterApp:
         """Connects to PostgreSQL and loads schema tables."""
         try:
             self.log("Connecting to PostgreSQL...")
-            conn = psycopg2.connect(
-                host=self.pg_host.get(),
-                port=self.pg_port.get(),
-                dbname=self.pg_dbname.get(),
-                user=self.pg_user.get(),
-                password=self.pg_password.get()
-            )
-            self.pg_conn = conn # Store the connection
-            self.log("✅ PostgreSQL connection successful.")
-            
-            cursor = conn.cursor()
-            # Query to get tables from the public schema
-            cursor.execute("SELECT table_name FROM information_schema.tables WHERE table_schema = 'public'")
-            tables = [row[0] for row in cursor.fetchall()]
-            cursor.close()
+            settings = self._sql_settings()
+            with closing(settings.connect()) as conn:
+                self.connected_sql["PostgreSQL"] = settings # Remember the working settings
+                self.log("✅ PostgreSQL connection successful.")
+
+                tables = list_sql_tables(conn, "PostgreSQL") # Tables of the public schema
 
             if tables:
                 self.combo_sql_tables.configure(values=tables)
@@ -400,8 +633,8 @@ class SQLNoSQLConverterApp:
                 self.combo_sql_tables.set("")
                 self.log("No tables found in the public schema.")
 
-        except psycopg2.Error as e:
-            self.pg_conn = None
+        except (psycopg2.Error, RuntimeError) as e:
+            self.connected_sql.pop("PostgreSQL", None)
             messagebox.showerror("PostgreSQL Connection Error", f"Could not connect to PostgreSQL.\nError: {e}")
             self.log(f"ERROR: PostgreSQL connection failed. Reason: {e}")
 
@@ -409,41 +642,28 @@ class SQLNoSQLConverterApp:
         """Connects to MS SQL Server and loads schema tables."""
         try:
             self.log("Connecting to MS SQL Server...")
-            server = self.mssql_server.get()
             dbname = self.mssql_dbname.get()
-            user = self.mssql_user.get()
-            password = self.mssql_password.get()
 
             # Find the best available ODBC driver
-            drivers = [d for d in pyodbc.drivers() if d.startswith('ODBC Driver') and 'for SQL Server' in d]
-            if not drivers:
-                raise ConnectionError("No suitable MS SQL Server ODBC driver found. Please install it from Microsoft's website.")
-            driver = drivers[-1] # Get the latest version
+            driver = detect_mssql_driver()
             self.mssql_driver = driver # Store the driver for later use
             self.log(f"Using ODBC Driver: {driver}")
 
-            def build_conn_str(database):
-                base_conn_str = f'DRIVER={{{driver}}};SERVER={server};DATABASE={database};TrustServerCertificate=yes;'
-                if user:
-                    return base_conn_str + f'UID={user};PWD={password};'
-                else: # Use Windows Authentication
-                    return base_conn_str + 'Trusted_Connection=yes;'
-
             try:
                 # First, try connecting to the specified database
-                conn_str = build_conn_str(dbname)
-                conn = pyodbc.connect(conn_str)
-                self.mssql_conn = conn
+                settings = self._sql_settings()
+                conn = settings.connect()
+                self.connected_sql["SQL Server"] = settings
                 self.log(f"✅ MS SQL Server connection successful to database '{dbname}'.")
             except pyodbc.Error as e:
                 # If it fails (e.g., DB doesn't exist or no access), try connecting to 'master'
                 if '4060' in str(e): # Error 4060 is "Cannot open database"
                     self.log(f"Could not connect to '{dbname}'. Trying to connect to 'master' database instead to verify login...")
                     try:
-                        conn_str_master = build_conn_str('master')
-                        conn = pyodbc.connect(conn_str_master)
+                        settings = replace(self._sql_settings(), dbname='master')
+                        conn = settings.connect()
                         # If this succeeds, the issue is DB-specific. The user can still convert from other DBs.
-                        self.mssql_conn = conn
+                        self.connected_sql["SQL Server"] = settings
                         self.log("✅ MS SQL Server connection successful to 'master' DB.")
                         messagebox.showwarning("Database Access Issue", f"Successfully connected to the SQL Server instance, but could not access the database '{dbname}'.\n\nPlease check that the database exists and that your user has permission to access it. You can still use the app to convert data *to* this server.")
                     except pyodbc.Error as master_e:
@@ -451,10 +671,8 @@ class SQLNoSQLConverterApp:
                 else:
                     raise e # Re-raise the original error if it's not a DB access issue
 
-            cursor = conn.cursor()
-            cursor.execute("SELECT table_name FROM information_schema.tables WHERE table_type = 'BASE TABLE'")
-            tables = [row[0] for row in cursor.fetchall()]
-            cursor.close()
+            with closing(conn):
+                tables = list_sql_tables(conn, "SQL Server")
 
             if tables:
                 self.combo_sql_tables.configure(values=tables)
@@ -465,11 +683,63 @@ class SQLNoSQLConverterApp:
                 self.combo_sql_tables.set("")
                 self.log(f"No tables found in database '{dbname}'.")
 
-        except (pyodbc.Error, ConnectionError) as e:
-            self.mssql_conn = None
+        except (pyodbc.Error, ConnectionError, RuntimeError) as e:
+            self.connected_sql.pop("SQL Server", None)
             messagebox.showerror("MS SQL Server Connection Error", f"Could not connect to SQL Server.\nError: {e}")
             self.log(f"ERROR: MS SQL Server connection failed. Reason: {e}")
 
+    def _sql_settings(self):
+        """Returns the connection settings of the selected SQL database, as entered in the UI."""
+        sql_type = self.sql_type.get()
+        if sql_type == "SQLite":
+            return SQLSettings(sql_type, sqlite_path=self.sqlite_path.get())
+        if sql_type == "PostgreSQL":
+            return SQLSettings(sql_type, host=self.pg_host.get(), port=self.pg_port.get(), dbname=self.pg_dbname.get(),
+                               user=self.pg_user.get(), password=self.pg_password.get())
+        if sql_type == "MySQL":
+            return SQLSettings(sql_type, host=self.mysql_host.get(), port=self.mysql_port.get(), dbname=self.mysql_dbname.get(),
+                               user=self.mysql_user.get(), password=self.mysql_password.get())
+        # SQL Server
+        return SQLSettings(sql_type, host=self.mssql_server.get(), dbname=self.mssql_dbname.get(),
+                           user=self.mssql_user.get(), password=self.mssql_password.get(), driver=self.mssql_driver)
+
+    def _check_sql_connection(self, destination=False):
+        """Warns and returns False if the selected SQL database is not ready to be used."""
+        sql_type = self.sql_type.get()
+        purpose = " to use it as a destination" if destination else " first"
+        if sql_type == "SQLite" and not destination and not self.sqlite_path.get():
+            messagebox.showwarning("Input Missing", "Please select a SQLite database file.")
+            return False
+        if sql_type != "SQLite" and sql_type not in self.connected_sql:
+            messagebox.showwarning("Not Connected", f"Please connect to {sql_type}{purpose}.")
+            return False
+        return True
+
+    def _check_mongo_connection(self):
+        """Warns and returns False if MongoDB is not connected."""
+        if not self.mongo_client:
+            messagebox.showwarning("Not Connected", "Please connect to MongoDB first.")
+            return False
+        return True
+
+    def _refresh_sql_tables(self):
+        """Reloads the table list of the selected server database."""
+        refresh = {
+            "PostgreSQL": self.connect_and_load_postgres_tables,
+            "MySQL": self.connect_and_load_mysql_tables,
+            "SQL Server": self.connect_and_load_mssql_tables,
+        }.get(self.sql_type.get())
+        if refresh:
+            refresh()
+
+    def _get_parallel_workers(self):
+        """Returns the configured number of parallel workers, clamped to a sane range."""
+        try:
+            workers = int(self.parallel_workers.get())
+        except ValueError:
+            workers = DEFAULT_PARALLEL_WORKERS
+        return max(1, min(workers, MAX_PARALLEL_WORKERS))
+
     def connect_and_load_mysql_tables(self):
         """Connects to MySQL and loads schema tables."""
         try:
@@ -479,20 +749,12 @@ class SQLNoSQLConverterApp:
                 return
 
             self.log("Connecting to MySQL...")
-            conn = mysql.connector.connect(
-                host=self.mysql_host.get(),
-                port=self.mysql_port.get(),
-                database=db_name,
-                user=self.mysql_user.get(),
-                password=self.mysql_password.get()
-            )
-            self.mysql_conn = conn # Store the connection
-            self.log("✅ MySQL connection successful.")
-
-            cursor = conn.cursor()
-            cursor.execute("SHOW TABLES")
-            tables = [row[0] for row in cursor.fetchall()]
-            cursor.close()
+            settings = self._sql_settings()
+            with closing(settings.connect()) as conn:
+                self.connected_sql["MySQL"] = settings # Remember the working settings
+                self.log("✅ MySQL connection successful.")
+
+                tables = list_sql_tables(conn, "MySQL")
 
             if tables:
                 self.combo_sql_tables.configure(values=tables)
@@ -503,8 +765,8 @@ class SQLNoSQLConverterApp:
                 self.combo_sql_tables.set("")
                 self.log(f"No tables found in database '{db_name}'.")
 
-        except mysql.connector.Error as e:
-            self.mysql_conn = None
+        except (mysql.connector.Error, RuntimeError) as e:
+            self.connected_sql.pop("MySQL", None)
             messagebox.showerror("MySQL Connection Error", f"Could not connect to MySQL.\nError: {e}")
             self.log(f"ERROR: MySQL connection failed. Reason: {e}")
 
@@ -554,39 +816,21 @@ class SQLNoSQLConverterApp:
         threading.Thread(target=_connect, daemon=True).start()
 
 
-    def _show_preview_window(self, df, title):
-        """Creates a Toplevel window to display a DataFrame in a Treeview."""
-        if df.empty:
-            messagebox.showinfo("Preview", "The selected table or collection is empty.")
-            return
-
-        preview_win = ctk.CTkToplevel(self.root)
-        preview_win.title(title)
-        preview_win.geometry("700x400")
-
-        frame = ctk.CTkFrame(preview_win)
-        frame.pack(padx=10, pady=10, fill="both", expand=True)
-
-        cols = list(df.columns)
-        tree = ttk.Treeview(frame, columns=cols, show="headings")
-
-        for col in cols:
-            tree.heading(col, text=col)
-            tree.column(col, width=100, anchor="w")
-
-        for index, row in df.iterrows():
-            # Convert any non-string/numeric types to string for display
-            values = [str(v) for v in row]
-            tree.insert("", "end", values=values)
+    def _show_preview_window(self, pager, title, log_context):
+        """Loads the first page of a preview in the background, then browses it in a PreviewGrid window."""
+        def _on_first_page():
+            if pager.error is not None:
+                pager.close()
+                messagebox.showerror("Preview Error", f"Could not fetch data for preview.\nError: {pager.error}")
+                self.log(f"ERROR during {log_context} preview: {pager.error}")
+            elif not pager.rows:
+                pager.close()
+                messagebox.showinfo("Preview", "The selected table or collection is empty.")
+            else:
+                PreviewGrid(self.root, pager, title)
 
-        # Scrollbars
-        vsb = ttk.Scrollbar(frame, orient="vertical", command=tree.yview)
-        hsb = ttk.Scrollbar(frame, orient="horizontal", command=tree.xview)
-        tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
-
-        vsb.pack(side="right", fill="y")
-        hsb.pack(side="bottom", fill="x")
-        tree.pack(side="left", fill="both", expand=True)
+        self.log(f"{title}: loading the first rows...")
+        pager.request_more(lambda: self.root.after(0, _on_first_page))
 
     def toggle_custom_query_widgets(self):
         """Enables or disables custom query widgets based on the checkbox state."""
@@ -600,36 +844,20 @@ class SQLNoSQLConverterApp:
 
     def _quote_sql_identifier(self, identifier):
         """Quotes an SQL identifier correctly based on the selected DB type."""
-        sql_type = self.sql_type.get()
-        if sql_type == "PostgreSQL":
-            return f'"{identifier}"'
-        elif sql_type == "SQL Server":
-            return f'[{identifier}]'
-        else:  # SQLite and default
-            return f'`{identifier}`'
+        return quote_sql_identifier(identifier, self.sql_type.get())
 
 
     def preview_sql_data(self):
-        """Shows a preview of the first 10 rows of the selected SQL table/query."""
+        """Browses the rows of the selected SQL table/query, loading them page by page."""
         sql_type = self.sql_type.get()
-        conn = None
 
         if sql_type == "SQLite":
             if not self.sqlite_path.get():
                 messagebox.showwarning("Input Missing", "Please select a SQLite DB to preview.")
                 return
-        elif sql_type == "PostgreSQL":
-            if not self.pg_conn or self.pg_conn.closed:
-                messagebox.showwarning("Not Connected", "Please connect to PostgreSQL first.")
-                return
-        elif sql_type == "MySQL":
-            if not self.mysql_conn or not self.mysql_conn.is_connected():
-                messagebox.showwarning("Not Connected", "Please connect to MySQL first.")
-                return
-        elif sql_type == "SQL Server":
-            if not self.mssql_conn:
-                messagebox.showwarning("Not Connected", "Please connect to SQL Server first.")
-                return
+        elif sql_type not in self.connected_sql:
+            messagebox.showwarning("Not Connected", f"Please connect to {sql_type} first.")
+            return
 
         try:
             query = ""
@@ -646,32 +874,19 @@ class SQLNoSQLConverterApp:
                     messagebox.showwarning("Input Missing", "Please select a table to preview.")
                     return
                 
-                if sql_type == "SQL Server": # MS SQL uses TOP N
-                    query = f"SELECT TOP 10 * FROM {self._quote_sql_identifier(table_name)}"
-                else: # SQLite, MySQL, and PostgreSQL use LIMIT N
-                    query = f"SELECT * FROM {self._quote_sql_identifier(table_name)} LIMIT 10"
+                query = f"SELECT * FROM {self._quote_sql_identifier(table_name)}" # Bounded by the preview
                 title_name = table_name
 
-            if sql_type == "SQLite":
-                conn = sqlite3.connect(self.sqlite_path.get())
-            elif sql_type == "PostgreSQL":
-                conn = self.pg_conn
-            elif sql_type == "MySQL":
-                conn = self.mysql_conn
-            else: # SQL Server
-                conn = self.mssql_conn
-
-            df = pd.read_sql(query, conn)
-            if sql_type == "SQLite":
-                conn.close()  # Close SQLite connection, keep PG connection open
-
-            self._show_preview_window(df, f"Preview of '{title_name}'")
+            settings = self.connected_sql.get(sql_type) or self._sql_settings()
+            # The pages are read on a connection checked out of the pool until the preview is closed
+            pager = PreviewPager(lambda: iter_sql_preview_pages(settings, query))
+            self._show_preview_window(pager, f"Preview of '{title_name}'", "SQL")
         except Exception as e:
             messagebox.showerror("Preview Error", f"Could not fetch data for preview.\nError: {e}")
             self.log(f"ERROR during SQL preview: {e}")
 
     def preview_mongo_data(self):
-        """Shows a preview of the first 10 documents of the selected MongoDB collection."""
+        """Browses the documents of the selected MongoDB collection, flattened and loaded page by page."""
         collection_name = self.combo_mongo_collections.get()
         if not self.mongo_client:
             messagebox.showwarning("Not Connected", "Please connect to MongoDB first.")
@@ -681,11 +896,10 @@ class SQLNoSQLConverterApp:
             return
 
         try:
-            db = self.mongo_client[self.mongo_db_name.get()]
-            cursor = db[collection_name].find().limit(10)
-            # Normalize nested JSON for better preview
-            df = pd.json_normalize(list(cursor))
-            self._show_preview_window(df, f"Preview of '{collection_name}'")
+            collection = self.mongo_client[self.mongo_db_name.get()][collection_name]
+            # Documents are read and flattened in the background, page by page
+            pager = PreviewPager(lambda: iter_mongo_preview_pages(collection))
+            self._show_preview_window(pager, f"Preview of '{collection_name}'", "MongoDB")
         except Exception as e:
             messagebox.showerror("Preview Error", f"Could not fetch data for preview.\nError: {e}")
             self.log(f"ERROR during MongoDB preview: {e}")
@@ -712,8 +926,14 @@ class SQLNoSQLConverterApp:
         self.btn_entire_db_to_mongo.configure(state=state)
         self.btn_mongo_to_sql.configure(state=state)
         self.btn_entire_mongo_to_sql.configure(state=state)
-        self.btn_export_sql_csv.configure(state=state)
-        self.btn_export_mongo_csv.configure(state=state)
+        self.btn_sql_to_sql.configure(state=state)
+        self.btn_sql_db_to_sql.configure(state=state)
+        self.btn_mongo_to_mongo.configure(state=state)
+        self.btn_mongo_db_to_mongo.configure(state=state)
+        self.btn_export_sql.configure(state=state)
+        self.btn_export_mongo.configure(state=state)
+        self.btn_import_sql.configure(state=state)
+        self.btn_import_mongo.configure(state=state)
         # Also toggle other interactive widgets to prevent changes during conversion
         self.entry_sqlite_path.configure(state="disabled" if not enabled else "normal")
         self.combo_sql_tables.configure(state="disabled" if not enabled else "readonly")
@@ -722,734 +942,348 @@ class SQLNoSQLConverterApp:
         self.combo_mongo_collections.configure(state="disabled" if not enabled else "readonly")
 
 
-    def _run_conversion_in_thread(self, target_func):
+    def _ask_in_main_thread(self, ask):
+        """Runs a dialog function in the main thread and blocks the calling worker thread until it returns."""
+        answered = threading.Event()
+        answer = []
+        def run():
+            answer.append(ask())
+            answered.set()
+        self.root.after(0, run)
+        answered.wait() # Wait for the user to answer
+        return answer[0]
+
+    def _run_conversion_in_thread(self, work, error_title, action, log_context):
         """
-        Runs the given conversion function in a separate thread to keep the UI responsive.
+        Runs an engine operation in a separate thread to keep the UI responsive.
+        `work` receives the GuiReporter of the operation; errors are shown and logged.
         """
         self._toggle_buttons(False)
-        self.root.after(0, self._start_progress)
-        thread = threading.Thread(target=target_func, daemon=True)
-        thread.start()
+        self._start_progress()
 
-    def convert_sql_to_mongo(self):
-        """Starts the SQLite to MongoDB conversion in a new thread."""
-        self._run_conversion_in_thread(self._worker_sql_to_mongo)
+        def run():
+            try:
+                work(GuiReporter(self))
+            except Exception as e: # Error handling
+                message = f"An error occurred during {action}: {e}" # `e` is cleared when the except block ends
+                self.root.after(0, lambda: messagebox.showerror(error_title, message))
+                self.log(f"ERROR during {log_context}: {e}")
+            finally: # Always re-enable buttons
+                self.root.after(0, self._stop_progress)
+                self.root.after(0, lambda: self._toggle_buttons(True))
 
-    def _worker_sql_to_mongo(self):
-        """The actual worker for SQLite to MongoDB conversion."""
-        sql_type = self.sql_type.get()
-        use_custom = self.use_custom_query.get()
-        conn = None
+        threading.Thread(target=run, daemon=True).start()
+
+    def _selected_sql_source(self, custom_query_message, table_message):
+        """Returns (table, query) for the selected table or custom query, or None after warning about missing input."""
+        if self.use_custom_query.get():
+            query = self.custom_query_text.get("1.0", tk.END).strip()
+            if not query:
+                messagebox.showwarning("Input Missing", custom_query_message)
+                return None
+            return None, query
+        table_name = self.combo_sql_tables.get()
+        if not table_name:
+            messagebox.showwarning("Input Missing", table_message)
+            return None
+        return table_name, None
 
-        if sql_type == "SQLite" and not self.sqlite_path.get():
-            self.root.after(0, lambda: messagebox.showwarning("Input Missing", "Please select a SQLite database file."))
-            self.root.after(0, lambda: self._toggle_buttons(True))
-            return
-        elif sql_type == "PostgreSQL" and (not self.pg_conn or self.pg_conn.closed):
-            self.root.after(0, lambda: messagebox.showwarning("Not Connected", "Please connect to PostgreSQL first."))
-            self.root.after(0, lambda: self._toggle_buttons(True))
+    def convert_sql_to_mongo(self):
+        """Starts the SQL to MongoDB conversion in a new thread."""
+        if not self._check_sql_connection() or not self._check_mongo_connection():
             return
-        elif sql_type == "MySQL" and (not self.mysql_conn or not self.mysql_conn.is_connected()):
-            self.root.after(0, lambda: messagebox.showwarning("Not Connected", "Please connect to MySQL first."))
-            self.root.after(0, lambda: self._toggle_buttons(True))
+        source = self._selected_sql_source("Custom query and target collection name are required.", "Please select a table to convert.")
+        if source is None:
             return
-        elif sql_type == "SQL Server" and not self.mssql_conn:
-            self.root.after(0, lambda: messagebox.showwarning("Not Connected", "Please connect to SQL Server first."))
-            self.root.after(0, lambda: self._toggle_buttons(True))
+        table_name, query = source
+        collection_name = self.custom_collection_name.get().strip() if query else table_name
+        if not collection_name:
+            messagebox.showwarning("Input Missing", "Custom query and target collection name are required.")
             return
 
-        if not self.mongo_client:
-            self.root.after(0, lambda: messagebox.showwarning("Not Connected", "Please connect to MongoDB first."))
-            self.root.after(0, lambda: self._toggle_buttons(True))
+        incremental = self.incremental_sync.get()
+        if incremental and query:
+            messagebox.showwarning("Incremental Sync", "Incremental sync works on a table, not on a custom query.")
             return
 
-        db_name = self.mongo_db_name.get()
-        
-        try: # Main logic
-            query = ""
-            if use_custom:
-                query = self.custom_query_text.get("1.0", tk.END).strip()
-                collection_name = self.custom_collection_name.get().strip()
-                if not query or not collection_name:
-                    self.root.after(0, lambda: messagebox.showwarning("Input Missing", "Custom query and target collection name are required."))
-                    raise ValueError("Custom query or collection name missing.")
+        sql = self._sql_settings()
+        mongo_db = self.mongo_client[self.mongo_db_name.get()]
+        relaxed_writes = self.relaxed_write_concern.get()
+        native_datetimes = self.native_datetimes.get()
+        watermark = self.sync_watermark.get().strip() or None
+        workers = self._get_parallel_workers()
+
+        def work(reporter):
+            if incremental:
+                inserted = engine.sync_sql_to_mongo(sql, mongo_db, reporter, table_name, watermark=watermark,
+                                                    relaxed_writes=relaxed_writes, native_datetimes=native_datetimes)
             else:
-                table_name = self.combo_sql_tables.get()
-                if not table_name:
-                    self.root.after(0, lambda: messagebox.showwarning("Input Missing", "Please select a table to convert."))
-                    raise ValueError("Table name missing.")
-                query = f"SELECT * FROM {self._quote_sql_identifier(table_name)}"
-                collection_name = table_name
-
-            self.log(f"Starting conversion: {sql_type} to MongoDB collection '{collection_name}'...")
-
-            # 1. Read data from SQLite
-            self.root.after(0, lambda: self._update_progress(25))
-            if sql_type == "SQLite":
-                conn = sqlite3.connect(self.sqlite_path.get())
-            elif sql_type == "PostgreSQL":
-                conn = self.pg_conn
-            elif sql_type == "MySQL":
-                conn = self.mysql_conn
-            else: # SQL Server
-                conn = self.mssql_conn
-
-            df = pd.read_sql(query, conn)
-            if sql_type == "SQLite": # Only close SQLite connection, others are persistent
-                conn.close()
-            self.log(f"Read {len(df)} rows from {sql_type}.")
-
-            # 2. Convert DataFrame to list of dictionaries (records)
-            self.root.after(0, lambda: self._update_progress(50))
-            data_to_insert = df.to_dict(orient='records')
-
-            # Convert datetime objects to ISO format strings to prevent encoding errors
-            for record in data_to_insert:
-                for key, value in record.items():
-                    if hasattr(value, 'isoformat'):
-                        record[key] = value.isoformat()
-
-            if not data_to_insert:
-                self.log("Warning: Source is empty. Nothing to convert.")
-                self.root.after(0, lambda: messagebox.showinfo("Complete", "The source table/query is empty. No data was converted."))
+                inserted = engine.sql_to_mongo(sql, mongo_db, reporter, table=table_name, query=query, collection=collection_name,
+                                               relaxed_writes=relaxed_writes, native_datetimes=native_datetimes, workers=workers)
+            if inserted is None:
                 return
-
-            # 3. Insert data into MongoDB
-            db = self.mongo_client[db_name]
-            collection = db[collection_name]
-
-            # Ask for overwrite confirmation in the main thread
-            overwrite = False
-            if collection_name in db.list_collection_names():
-                # Use a blocking mechanism to get user input from the main thread
-                confirm_event = threading.Event()
-                user_choice = tk.BooleanVar()
-                def ask():
-                    user_choice.set(messagebox.askyesno("Confirm Overwrite", f"Collection '{collection_name}' already exists. Overwrite it?"))
-                    confirm_event.set()
-                self.root.after(0, ask)
-                confirm_event.wait() # Wait for the user to click yes/no
-                overwrite = user_choice.get()
-
-                if overwrite:
-                    collection.drop()
-                    self.log(f"Dropped existing collection '{collection_name}'.")
-                else:
-                    self.log("Conversion cancelled by user.")
-                    return
-
-            self.root.after(0, lambda: self._update_progress(75))
-            result = collection.insert_many(data_to_insert)
-            self.log(f"Successfully inserted {len(result.inserted_ids)} documents into '{collection_name}'.")
-            self.root.after(0, lambda: messagebox.showinfo("Success", f"Successfully converted {len(df)} records to MongoDB collection '{collection_name}'."))
-
-            # Refresh collections list
-            self.root.after(0, lambda: self._update_progress(100))
             # After conversion, refresh the list and select the newly created collection
             def refresh_and_select():
                 self.connect_and_load_mongo()
                 self.combo_mongo_collections.set(collection_name)
             self.root.after(100, refresh_and_select) # Use a small delay to ensure connection is established
 
-        except Exception as e: # Error handling
-            self.root.after(0, lambda: messagebox.showerror("Conversion Error", f"An error occurred during conversion: {e}"))
-            self.log(f"ERROR during SQL to NoSQL conversion: {e}")
-        finally: # Always re-enable buttons
-            self.root.after(0, self._stop_progress)
-            self.root.after(0, lambda: self._toggle_buttons(True))
-            
+        self._run_conversion_in_thread(work, "Conversion Error", "conversion", "SQL to NoSQL conversion")
+
     def convert_entire_db_to_mongo(self):
         """Starts the full DB to MongoDB conversion in a new thread."""
-        self._run_conversion_in_thread(self._worker_convert_entire_db_to_mongo)
-
-    def _worker_convert_entire_db_to_mongo(self):
-        """The actual worker for converting all tables in an SQL DB to MongoDB."""
-        sql_type = self.sql_type.get()
-        # Initialize conn here to be used throughout the function
-        conn = None
-
-        # --- Connection and Input Validation ---
-        if sql_type == "SQLite" and not self.sqlite_path.get():
-            self.root.after(0, lambda: messagebox.showwarning("Input Missing", "Please select a SQLite database file."))
-            return
-        if sql_type == "PostgreSQL" and (not self.pg_conn or self.pg_conn.closed):
-            self.root.after(0, lambda: messagebox.showwarning("Not Connected", "Please connect to PostgreSQL first."))
-            return
-        if sql_type == "MySQL" and (not self.mysql_conn or not self.mysql_conn.is_connected()):
-            self.root.after(0, lambda: messagebox.showwarning("Not Connected", "Please connect to MySQL first."))
-            return
-        if sql_type == "SQL Server" and not self.mssql_conn:
-            self.root.after(0, lambda: messagebox.showwarning("Not Connected", "Please connect to SQL Server first."))
-            return
-        if not self.mongo_client:
-            self.root.after(0, lambda: messagebox.showwarning("Not Connected", "Please connect to MongoDB first."))
+        if not self._check_sql_connection() or not self._check_mongo_connection():
             return
 
-        try:
-            # --- Establish connection and get all tables ---
-            tables_to_convert = []
-            if sql_type == "SQLite":
-                conn = sqlite3.connect(self.sqlite_path.get())
-                cursor = conn.cursor()
-                cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-                tables_to_convert = [row[0] for row in cursor.fetchall()]
-            elif sql_type == "PostgreSQL":
-                conn = self.pg_conn
-                cursor = conn.cursor()
-                cursor.execute("SELECT table_name FROM information_schema.tables WHERE table_schema = 'public'")
-                tables_to_convert = [row[0] for row in cursor.fetchall()]
-            elif sql_type == "MySQL":
-                conn = self.mysql_conn
-                cursor = conn.cursor()
-                cursor.execute("SHOW TABLES")
-                tables_to_convert = [row[0] for row in cursor.fetchall()]
-            else: # SQL Server
-                conn = self.mssql_conn
-                cursor = conn.cursor()
-                cursor.execute("SELECT table_name FROM information_schema.tables WHERE table_type = 'BASE TABLE'")
-                tables_to_convert = [row[0] for row in cursor.fetchall()]
-            cursor.close()
-
-            if not tables_to_convert:
-                self.root.after(0, lambda: messagebox.showinfo("No Tables", "No tables found in the selected SQL database to convert."))
-                return
+        sql = self._sql_settings()
+        mongo_db = self.mongo_client[self.mongo_db_name.get()]
+        workers = self._get_parallel_workers()
+        relaxed_writes = self.relaxed_write_concern.get()
+        native_datetimes = self.native_datetimes.get()
 
-            # --- Ask for overwrite strategy once ---
-            confirm_event = threading.Event()
-            user_choice = tk.StringVar()
-            def ask_strategy():
-                result = messagebox.askquestion("Confirm Overwrite Strategy", "For collections that already exist in MongoDB, do you want to Overwrite them?\n\n- 'Yes' to Overwrite existing collections.\n- 'No' to Skip existing collections.", type=messagebox.YESNO)
-                user_choice.set(result)
-                confirm_event.set()
-            self.root.after(0, ask_strategy)
-            confirm_event.wait()
-            strategy = user_choice.get() # 'yes' or 'no'
-
-            self.log(f"Starting full database conversion ({len(tables_to_convert)} tables) with strategy: {'Overwrite' if strategy == 'yes' else 'Skip'}.")
-
-            # --- Initialize MongoDB connection and counters ---
-            mongo_db = self.mongo_client[self.mongo_db_name.get()]
-            existing_collections = mongo_db.list_collection_names()
-            
-            converted_count = 0
-            skipped_count = 0
-
-            # --- Loop through each table and convert ---
-            for i, table_name in enumerate(tables_to_convert):
-                progress = (i / len(tables_to_convert)) * 100
-                self.root.after(0, lambda p=progress: self._update_progress(p))
-
-                if table_name in existing_collections and strategy == 'no':
-                    self.log(f"Skipping table '{table_name}' as it already exists in MongoDB.")
-                    skipped_count += 1
-                    continue
-
-                self.log(f"Converting table '{table_name}' ({i+1}/{len(tables_to_convert)})...")
-
-                # Read data from SQL table
-                query = f"SELECT * FROM {self._quote_sql_identifier(table_name)}"
-                df = pd.read_sql(query, conn)
-
-                # Convert to list of dicts and handle datetime
-                data_to_insert = df.to_dict(orient='records')
-                for record in data_to_insert:
-                    for key, value in record.items():
-                        if hasattr(value, 'isoformat'):
-                            record[key] = value.isoformat()
-
-                if not data_to_insert:
-                    self.log(f"Table '{table_name}' is empty. Skipping.")
-                    continue
-
-                # Insert into MongoDB
-                collection = mongo_db[table_name]
-                if table_name in existing_collections and strategy == 'yes':
-                    collection.drop()
-                
-                collection.insert_many(data_to_insert)
-                self.log(f"✅ Successfully inserted {len(data_to_insert)} documents into '{table_name}'.")
-                converted_count += 1
-
-            # --- Finalization ---
-            self.root.after(0, lambda: self._update_progress(100))
-            self.log("Full database conversion finished.")
-            self.root.after(0, lambda: messagebox.showinfo("Conversion Complete", f"Finished converting database.\n\n- Converted: {converted_count} tables\n- Skipped: {skipped_count} tables"))
+        def work(reporter):
+            engine.sql_db_to_mongo(sql, mongo_db, reporter, workers=workers,
+                                   relaxed_writes=relaxed_writes, native_datetimes=native_datetimes)
             self.root.after(100, self.connect_and_load_mongo) # Refresh collection list
 
-        except Exception as e:
-            self.root.after(0, lambda: messagebox.showerror("Conversion Error", f"An error occurred during full DB conversion: {e}"))
-            self.log(f"ERROR during full DB conversion: {e}")
-        finally:
-            # Close the connection only if it's SQLite, as others are persistent
-            if sql_type == "SQLite" and conn:
-                conn.close()
-            self.root.after(0, self._stop_progress)
-            self.root.after(0, lambda: self._toggle_buttons(True))
+        self._run_conversion_in_thread(work, "Conversion Error", "full DB conversion", "full DB conversion")
 
     def convert_entire_mongo_to_sql(self):
         """Starts the full MongoDB to SQL conversion in a new thread."""
-        self._run_conversion_in_thread(self._worker_convert_entire_mongo_to_sql)
+        if not self._check_mongo_connection() or not self._check_sql_connection(destination=True):
+            return
 
-    def _worker_convert_entire_mongo_to_sql(self):
-        """The actual worker for converting an entire MongoDB database to SQL."""
-        sql_type = self.sql_type.get()
-        db_name = self.mongo_db_name.get()
+        sql = self._sql_settings()
+        mongo_db = self.mongo_client[self.mongo_db_name.get()]
+        workers = self._get_parallel_workers()
+        normalize = self.normalize_arrays.get()
 
-        # --- Input Validation ---
-        if not self.mongo_client:
-            self.root.after(0, lambda: messagebox.showwarning("Not Connected", "Please connect to MongoDB first."))
-            return
-        if sql_type == "PostgreSQL" and (not self.pg_conn or self.pg_conn.closed):
-            self.root.after(0, lambda: messagebox.showwarning("Not Connected", "Please connect to PostgreSQL to use it as a destination."))
-            return
-        if sql_type == "MySQL" and (not self.mysql_conn or not self.mysql_conn.is_connected()):
-            self.root.after(0, lambda: messagebox.showwarning("Not Connected", "Please connect to MySQL to use it as a destination."))
-            return
-        if sql_type == "SQL Server" and not self.mssql_conn:
-            self.root.after(0, lambda: messagebox.showwarning("Not Connected", "Please connect to SQL Server to use it as a destination."))
-            return
+        def work(reporter):
+            engine.mongo_db_to_sql(mongo_db, sql, reporter, workers=workers, normalize=normalize)
+            if sql.sql_type != "SQLite":
+                self.root.after(100, self._refresh_sql_tables)
 
-        output_db_path = None
-        engine = None
-        try:
-            # --- Get all collections from MongoDB ---
-            mongo_db = self.mongo_client[db_name]
-            collections_to_convert = mongo_db.list_collection_names()
+        self._run_conversion_in_thread(work, "Conversion Error", "full MongoDB conversion", "full MongoDB conversion")
 
-            if not collections_to_convert:
-                self.root.after(0, lambda: messagebox.showinfo("No Collections", f"No collections found in MongoDB database '{db_name}' to convert."))
-                return
+    def convert_mongo_to_sql(self):
+        """Starts the MongoDB to SQL conversion in a new thread."""
+        collection_name = self.combo_mongo_collections.get()
+        if not collection_name:
+            messagebox.showwarning("Input Missing", "Please select a MongoDB collection.")
+            return
+        if not self._check_sql_connection(destination=True) or not self._check_mongo_connection():
+            return
 
-            # --- Ask for overwrite strategy ---
-            confirm_event = threading.Event()
-            user_choice = tk.StringVar()
-            def ask_strategy():
-                msg = f"This will convert {len(collections_to_convert)} collections to {sql_type} tables. For tables that already exist, do you want to Overwrite them?\n\n- 'Yes' to Overwrite existing tables.\n- 'No' to Skip existing tables."
-                result = messagebox.askquestion("Confirm Overwrite Strategy", msg, type=messagebox.YESNO)
-                user_choice.set(result)
-                confirm_event.set()
-            self.root.after(0, ask_strategy)
-            confirm_event.wait()
-            strategy = user_choice.get() # 'yes' or 'no'
-
-            self.log(f"Starting full MongoDB conversion ({len(collections_to_convert)} collections) with strategy: {'Overwrite' if strategy == 'yes' else 'Skip'}.")
-
-            # --- Setup SQL Engine/Connection ---
-            if sql_type == "SQLite":
-                output_db_path = Path(f"{db_name}_from_mongo.db")
-                if output_db_path.exists() and strategy == 'yes':
-                    self.log(f"Deleting existing SQLite DB file: {output_db_path}")
-                    output_db_path.unlink()
-                conn = sqlite3.connect(output_db_path)
+        sql = self._sql_settings()
+        mongo_db = self.mongo_client[self.mongo_db_name.get()]
+        output_db_path = Path(f"{collection_name}_from_mongo.db") # SQLite targets only
+        incremental = self.incremental_sync.get()
+        watermark = self.sync_watermark.get().strip() or '_id'
+        workers = self._get_parallel_workers()
+        normalize = self.normalize_arrays.get()
+
+        def work(reporter):
+            if incremental:
+                rows_written = engine.sync_mongo_to_sql(mongo_db, sql, reporter, collection_name, watermark=watermark,
+                                                        output=output_db_path)
             else:
-                if sql_type == "PostgreSQL":
-                    uri = f"postgresql+psycopg2://{self.pg_user.get()}:{self.pg_password.get()}@{self.pg_host.get()}:{self.pg_port.get()}/{self.pg_dbname.get()}" # pragma: allowlist secret
-                elif sql_type == "MySQL":
-                    uri = f"mysql+mysqlconnector://{self.mysql_user.get()}:{self.mysql_password.get()}@{self.mysql_host.get()}:{self.mysql_port.get()}/{self.mysql_dbname.get()}" # pragma: allowlist secret
-                else: # SQL Server
-                    server = self.mssql_server.get()
-                    dbname = self.mssql_dbname.get()
-                    driver_name = self.mssql_driver.replace(' ', '+')
-                    user = self.mssql_user.get()
-                    password = self.mssql_password.get()
-                    if user:
-                        uri = f"mssql+pyodbc://{user}:{password}@{server}/{dbname}?driver={driver_name}&TrustServerCertificate=yes" # pragma: allowlist secret
-                    else:
-                        uri = f"mssql+pyodbc://{server}/{dbname}?driver={driver_name}&TrustServerCertificate=yes&trusted_connection=yes" # pragma: allowlist secret
-                engine = create_engine(uri)
-                conn = engine.connect()
-
-            converted_count = 0
-            skipped_count = 0
-
-            # --- Get existing tables from SQL DB for skip logic ---
-            existing_sql_tables = []
-            if strategy == 'no':
-                if sql_type == "SQLite":
-                    # For SQLite, we need to inspect the file directly
-                    if output_db_path.exists():
-                        temp_conn_sqlite = sqlite3.connect(output_db_path)
-                        cursor = temp_conn_sqlite.cursor()
-                        cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-                        existing_sql_tables = [row[0] for row in cursor.fetchall()]
-                        temp_conn_sqlite.close()
-                elif engine: # For other DBs, use the created engine
-                    inspector = inspect(engine)
-                    existing_sql_tables = inspector.get_table_names()
-                self.log(f"Found existing SQL tables for skip check: {existing_sql_tables}")
-
-            # --- Loop through each collection and convert ---
-            for i, coll_name in enumerate(collections_to_convert):
-                progress = (i / len(collections_to_convert)) * 100
-                self.root.after(0, lambda p=progress: self._update_progress(p))
-
-                table_name_sql = ''.join(e for e in coll_name if e.isalnum() or e == '_')
-                self.log(f"Processing collection '{coll_name}' ({i+1}/{len(collections_to_convert)})...")
-
-                if strategy == 'no' and table_name_sql in existing_sql_tables:
-                    self.log(f"Skipping collection '{coll_name}' as table '{table_name_sql}' already exists in SQL database.")
-                    skipped_count += 1
-                    continue
-
-                # Read data from MongoDB
-                cursor = mongo_db[coll_name].find()
-                data = list(cursor)
-
-                if not data:
-                    self.log(f"Collection '{coll_name}' is empty. Skipping.")
-                    continue
-
-                # Convert to DataFrame and sanitize
-                df = pd.json_normalize(data, sep='_')
-                if '_id' in df.columns: df['_id'] = df['_id'].astype(str)
-                sanitized_columns = {col: ''.join(e for e in col if e.isalnum() or e == '_') for col in df.columns}
-                df.rename(columns=sanitized_columns, inplace=True)
-                for col in df.columns:
-                    if df[col].apply(lambda x: isinstance(x, list)).any():
-                        df[col] = df[col].apply(lambda x: json.dumps(x) if isinstance(x, list) else x)
-
-                # Write to SQL
-                # Pass the engine directly to to_sql, not the connection object.
-                # This allows pandas to manage the connection with the correct authentication context.
-                target_conn = engine if sql_type != "SQLite" else conn
-                df.to_sql(table_name_sql, target_conn, if_exists= 'replace' if strategy == 'yes' else 'append', index=False)
-                self.log(f"✅ Successfully wrote {len(df)} documents to table '{table_name_sql}'.")
-                converted_count += 1
-
-            # --- Finalization ---
-            self.root.after(0, lambda: self._update_progress(100))
-            self.log("Full MongoDB to SQL conversion finished.")
-            self.root.after(0, lambda: messagebox.showinfo("Conversion Complete", f"Finished converting database.\n\n- Converted: {converted_count} collections\n- Skipped: {skipped_count} collections"))
-            if sql_type != "SQLite":
-                self.root.after(100, getattr(self, f"connect_and_load_{sql_type.lower().replace(' ', '')}_tables"))
+                rows_written = engine.mongo_to_sql(mongo_db, sql, reporter, collection_name, output=output_db_path,
+                                                   workers=workers, normalize=normalize)
+            if rows_written is None:
+                return
+            if sql.sql_type != "SQLite":
+                self.root.after(0, self._refresh_sql_tables)
+            elif incremental:
+                return # The file is kept between syncs
+            elif reporter.confirm("Open Folder", "Do you want to open the folder containing the new database file?"):
+                self.root.after(0, lambda: os.startfile(output_db_path.resolve().parent))
+
+        self._run_conversion_in_thread(work, "Conversion Error", "conversion", "NoSQL to SQL conversion")
+
+    def _sql_copy_target(self, default_name):
+        """Returns the settings of the SQL-to-SQL copy target, or None after warning or a cancelled file dialog."""
+        target_type = self.sql_target_type.get()
+        if target_type == "SQLite":
+            target_path = filedialog.asksaveasfilename(title="Select the target SQLite database", defaultextension=".db",
+                                                       filetypes=[("SQLite databases", "*.db *.sqlite *.sqlite3"), ("All files", "*.*")],
+                                                       initialfile=f"{default_name}.db", confirmoverwrite=False)
+            if not target_path:
+                self.log("Copy cancelled by user.")
+                return None
+            return SQLSettings(target_type, sqlite_path=target_path)
+        if target_type not in self.connected_sql:
+            messagebox.showwarning("Not Connected", f"Please connect to {target_type} to use it as the copy target.")
+            return None
+        return self.connected_sql[target_type]
+
+    def copy_sql_to_sql(self):
+        """Copies the selected table or custom query result into the target SQL database in a new thread."""
+        if not self._check_sql_connection():
+            return
+        source = self._selected_sql_source("Custom query and target table name are required.", "Please select a table to copy.")
+        if source is None:
+            return
+        table_name, query = source
+        target_table = self.custom_collection_name.get().strip() if query else table_name
+        if not target_table:
+            messagebox.showwarning("Input Missing", "Custom query and target table name are required.")
+            return
+        target = self._sql_copy_target(target_table)
+        if target is None:
+            return
 
-        except Exception as e:
-            self.root.after(0, lambda: messagebox.showerror("Conversion Error", f"An error occurred during full MongoDB conversion: {e}"))
-            self.log(f"ERROR during full MongoDB conversion: {e}")
-        finally:
-            # The engine's connection is closed, but for SQLite we close the direct connection.
-            if sql_type == "SQLite" and 'conn' in locals() and conn:
-                conn.close()
-            self.root.after(0, self._stop_progress)
-            self.root.after(0, lambda: self._toggle_buttons(True))
+        sql = self._sql_settings()
+        self._run_conversion_in_thread(
+            lambda reporter: engine.sql_to_sql(sql, target, reporter, table=table_name, query=query, target_table=target_table),
+            "Copy Error", "copy", "SQL to SQL copy")
 
-    def convert_mongo_to_sql(self):
-        """Starts the MongoDB to SQLite conversion in a new thread."""
-        self._run_conversion_in_thread(self._worker_mongo_to_sql)
+    def copy_sql_db_to_sql(self):
+        """Copies every table of the selected SQL database into the target SQL database in a new thread."""
+        if not self._check_sql_connection():
+            return
+        sql = self._sql_settings()
+        target = self._sql_copy_target(Path(sql.sqlite_path).stem + "_copy" if sql.sql_type == "SQLite" else sql.dbname)
+        if target is None:
+            return
 
-    def _worker_mongo_to_sql(self):
-        """The actual worker for MongoDB to SQLite conversion."""
-        sql_type = self.sql_type.get()
+        workers = self._get_parallel_workers()
+        self._run_conversion_in_thread(
+            lambda reporter: engine.sql_db_to_sql(sql, target, reporter, workers=workers),
+            "Copy Error", "full DB copy", "full SQL DB copy")
+
+    def _mongo_copy_target(self):
+        """Returns the (URI, database name) of the MongoDB copy target, or None after warning about missing input."""
+        uri = self.mongo_target_uri.get().strip()
+        if not uri:
+            messagebox.showwarning("Input Missing", "Please enter the URI of the target MongoDB server.")
+            return None
+        return uri, self.mongo_target_db.get().strip() or self.mongo_db_name.get()
+
+    def copy_mongo_to_mongo(self):
+        """Copies the selected collection into the target MongoDB database in a new thread."""
         collection_name = self.combo_mongo_collections.get()
-        db_name = self.mongo_db_name.get()
-
+        if not self._check_mongo_connection():
+            return
         if not collection_name:
-            self.root.after(0, lambda: messagebox.showwarning("Input Missing", "Please select a MongoDB collection."))
-            self.root.after(0, lambda: self._toggle_buttons(True))
-            return # Added return here
-        
-        if sql_type == "PostgreSQL" and (not self.pg_conn or self.pg_conn.closed): # Changed from elif to if
-            self.root.after(0, lambda: messagebox.showwarning("Not Connected", "Please connect to PostgreSQL to use it as a destination."))
-            self.root.after(0, lambda: self._toggle_buttons(True))
-            return # Added return here
-        if sql_type == "MySQL" and (not self.mysql_conn or not self.mysql_conn.is_connected()):
-            self.root.after(0, lambda: messagebox.showwarning("Not Connected", "Please connect to MySQL to use it as a destination."))
-            self.root.after(0, lambda: self._toggle_buttons(True))
-            return # Added return here
-        if sql_type == "SQL Server" and not self.mssql_conn: # Changed from elif to if
-            self.root.after(0, lambda: messagebox.showwarning("Not Connected", "Please connect to SQL Server to use it as a destination."))
-            self.root.after(0, lambda: self._toggle_buttons(True))
+            messagebox.showwarning("Input Missing", "Please select a MongoDB collection to copy.")
             return
-
-        if not self.mongo_client:
-            self.root.after(0, lambda: messagebox.showwarning("Not Connected", "Please connect to MongoDB first."))
-            self.root.after(0, lambda: self._toggle_buttons(True))
+        target = self._mongo_copy_target()
+        if target is None:
             return
 
-        # Define output SQLite DB path
-        output_db_path = None
-        if sql_type == "SQLite":
-            output_db_path = Path(f"{collection_name}_from_mongo.db")
-            if output_db_path.exists():
-                confirm_event = threading.Event()
-                user_choice = tk.BooleanVar()
-                def ask():
-                    user_choice.set(messagebox.askyesno("Confirm Overwrite", f"Database file '{output_db_path}' already exists. Overwrite it?"))
-                    confirm_event.set()
-                self.root.after(0, ask)
-                confirm_event.wait()
-                if not user_choice.get():
-                    self.log("Conversion cancelled by user.")
-                    self.root.after(0, self._stop_progress)
-                    self.root.after(0, lambda: self._toggle_buttons(True))
-                    return
+        mongo_db = self.mongo_client[self.mongo_db_name.get()]
+        workers = self._get_parallel_workers()
+        relaxed_writes = self.relaxed_write_concern.get()
+        uri, db_name = target
 
-        try: # Main logic
-            self.log(f"Starting conversion: MongoDB collection '{collection_name}' to {sql_type} table...")
+        def work(reporter):
+            reporter.log(f"Connecting to the target MongoDB at {uri}...")
+            with closing(connect_mongo(uri)) as target_client:
+                engine.mongo_to_mongo(mongo_db, target_client[db_name], reporter, collection_name, workers=workers,
+                                      relaxed_writes=relaxed_writes)
 
-            # 1. Read data from MongoDB
-            self.root.after(0, lambda: self._update_progress(25))
-            db = self.mongo_client[db_name]
-            collection = db[collection_name]
-            cursor = collection.find()
-            data = list(cursor)
+        self._run_conversion_in_thread(work, "Copy Error", "copy", "MongoDB to MongoDB copy")
 
-            if not data:
-                self.log("Warning: Collection is empty. Nothing to convert.")
-                self.root.after(0, lambda: messagebox.showinfo("Complete", "The MongoDB collection is empty. No data was converted."))
-                return
-
-            self.log(f"Read {len(data)} documents from collection '{collection_name}'.")
-
-            # 2. Convert to Pandas DataFrame using json_normalize for nested data
-            self.root.after(0, lambda: self._update_progress(50))
-            df = pd.json_normalize(data, sep='_')
-
-            if '_id' in df.columns:
-                df['_id'] = df['_id'].astype(str) # Convert ObjectId to string
-                self.log("Converted MongoDB '_id' field to string.")
-
-            # Sanitize column names for SQL (e.g., remove spaces, special chars)
-            sanitized_columns = {col: ''.join(e for e in col if e.isalnum() or e == '_') for col in df.columns}
-            df.rename(columns=sanitized_columns, inplace=True)
-            self.log(f"Sanitized column names for SQL compatibility.")
-
-            # Convert any remaining complex types (list) to JSON strings
-            self.root.after(0, lambda: self._update_progress(75))
-            for col in df.columns:
-                if df[col].apply(lambda x: isinstance(x, list)).any():
-                    self.log(f"Converting list data in column '{col}' to JSON strings.")
-                    # Custom JSON encoder to handle date/time objects within lists
-                    def json_converter(o):
-                        if hasattr(o, 'isoformat'):
-                            return o.isoformat()
-                        raise TypeError(f"Object of type {o.__class__.__name__} is not JSON serializable")
-                    df[col] = df[col].apply(lambda x: json.dumps(x, default=json_converter) if isinstance(x, list) else x)
-                    df[col] = df[col].apply(lambda x: json.dumps(x) if isinstance(x, list) else x)
-
-            # 3. Write data to SQLite
-            self.root.after(0, lambda: self._update_progress(90))
-            # Use the collection name as the table name, ensuring it's a valid SQL identifier
-            table_name_sql = ''.join(e for e in collection_name if e.isalnum() or e == '_')
-
-            if sql_type == "SQLite":
-                conn = sqlite3.connect(output_db_path)
-                df.to_sql(table_name_sql, conn, if_exists='replace', index=False)
-                conn.close()
-                self.log(f"Successfully wrote {len(df)} rows to table '{table_name_sql}' in '{output_db_path}'.")
-                self.root.after(0, lambda: messagebox.showinfo("Success", f"Successfully converted {len(df)} records to SQLite table '{table_name_sql}' in the file:\n{output_db_path.resolve()}"))
-
-                # Ask to open the folder containing the new DB
-                self.root.after(0, lambda: self._update_progress(100))
-                
-                confirm_event_open = threading.Event()
-                open_choice = tk.BooleanVar()
-                def ask_open():
-                    open_choice.set(messagebox.askyesno("Open Folder", "Do you want to open the folder containing the new database file?"))
-                    confirm_event_open.set()
-                self.root.after(0, ask_open)
-                confirm_event_open.wait()
-                if open_choice.get():
-                    self.root.after(0, lambda: os.startfile(output_db_path.parent))
-            
-            else: # PostgreSQL or SQL Server
-                if sql_type == "PostgreSQL":
-                    uri = f"postgresql+psycopg2://{self.pg_user.get()}:{self.pg_password.get()}@{self.pg_host.get()}:{self.pg_port.get()}/{self.pg_dbname.get()}" # pragma: allowlist secret
-                elif sql_type == "MySQL":
-                    uri = f"mysql+mysqlconnector://{self.mysql_user.get()}:{self.mysql_password.get()}@{self.mysql_host.get()}:{self.mysql_port.get()}/{self.mysql_dbname.get()}" # pragma: allowlist secret
-                else: # SQL Server
-                    server = self.mssql_server.get()
-                    dbname = self.mssql_dbname.get()
-                    driver_name = self.mssql_driver.replace(' ', '+')
-                    user = self.mssql_user.get()
-                    password = self.mssql_password.get()
-                    if user:
-                        uri = f"mssql+pyodbc://{user}:{password}@{server}/{dbname}?driver={driver_name}&TrustServerCertificate=yes" # pragma: allowlist secret
-                    else:
-                        uri = f"mssql+pyodbc://{server}/{dbname}?driver={driver_name}&TrustServerCertificate=yes&trusted_connection=yes" # pragma: allowlist secret
-                engine = create_engine(uri)
-                df.to_sql(table_name_sql, engine, if_exists='replace', index=False)
-                self.log(f"Successfully wrote {len(df)} rows to {sql_type} table '{table_name_sql}'.")
-                self.root.after(0, lambda: messagebox.showinfo("Success", f"Successfully converted {len(df)} records to {sql_type} table '{table_name_sql}'."))
-                if sql_type == "PostgreSQL": self.root.after(0, self.connect_and_load_postgres_tables) # Refresh table list
-                if sql_type == "MySQL": self.root.after(0, self.connect_and_load_mysql_tables) # Refresh table list
-                if sql_type == "SQL Server": self.root.after(0, self.connect_and_load_mssql_tables) # Refresh table list
-
-        except Exception as e: # Error handling
-            self.root.after(0, lambda: messagebox.showerror("Conversion Error", f"An error occurred during conversion: {e}"))
-            self.log(f"ERROR during NoSQL to SQL conversion: {e}")
-        finally: # Always re-enable buttons
-            self.root.after(0, self._stop_progress)
-            self.root.after(0, lambda: self._toggle_buttons(True))
-            
-    def export_sql_to_csv(self):
-        """Starts the SQL to CSV export in a new thread."""
-        self._run_conversion_in_thread(self._worker_export_sql_to_csv)
-
-    def _worker_export_sql_to_csv(self):
-        """The actual worker for exporting SQL data to a CSV file."""
-        sql_type = self.sql_type.get()
-        use_custom = self.use_custom_query.get()
-        conn = None
-
-        # --- Input Validation ---
-        if sql_type == "SQLite" and not self.sqlite_path.get():
-            self.root.after(0, lambda: messagebox.showwarning("Input Missing", "Please select a SQLite database file."))
-            return # Added return here
-        if sql_type == "PostgreSQL" and (not self.pg_conn or self.pg_conn.closed): # Changed from elif to if
-            self.root.after(0, lambda: messagebox.showwarning("Not Connected", "Please connect to PostgreSQL first."))
-            return # Added return here
-        if sql_type == "MySQL" and (not self.mysql_conn or not self.mysql_conn.is_connected()):
-            self.root.after(0, lambda: messagebox.showwarning("Not Connected", "Please connect to MySQL first."))
+    def copy_mongo_db_to_mongo(self):
+        """Copies every collection of the selected MongoDB database into the target database in a new thread."""
+        if not self._check_mongo_connection():
             return
-        if sql_type == "SQL Server" and not self.mssql_conn: # Changed from elif to if
-            self.root.after(0, lambda: messagebox.showwarning("Not Connected", "Please connect to SQL Server first."))
+        target = self._mongo_copy_target()
+        if target is None:
             return
 
-        try:
-            # --- Get Query ---
-            query = ""
-            source_name = ""
-            if use_custom:
-                query = self.custom_query_text.get("1.0", tk.END).strip()
-                if not query:
-                    raise ValueError("Custom query is empty.")
-                source_name = "custom_query"
-            else:
-                table_name = self.combo_sql_tables.get()
-                if not table_name:
-                    raise ValueError("No table selected.")
-                query = f"SELECT * FROM {self._quote_sql_identifier(table_name)}"
-                source_name = table_name
-
-            # --- Ask for output file path ---
-            confirm_event = threading.Event()
-            file_path_var = tk.StringVar()
-            def ask_path():
-                path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")], initialfile=f"{source_name}.csv")
-                file_path_var.set(path)
-                confirm_event.set()
-            self.root.after(0, ask_path)
-            confirm_event.wait()
-            output_csv_path = file_path_var.get()
-
-            if not output_csv_path:
-                self.log("Export cancelled by user.")
-                return
+        mongo_db = self.mongo_client[self.mongo_db_name.get()]
+        workers = self._get_parallel_workers()
+        relaxed_writes = self.relaxed_write_concern.get()
+        uri, db_name = target
 
-            self.log(f"Starting export: {sql_type} source to {output_csv_path}...")
-            self.root.after(0, lambda: self._update_progress(25))
-
-            # --- Read Data ---
-            if sql_type == "SQLite":
-                conn = sqlite3.connect(self.sqlite_path.get())
-            elif sql_type == "PostgreSQL":
-                conn = self.pg_conn
-            elif sql_type == "MySQL":
-                conn = self.mysql_conn
-            else: # SQL Server
-                conn = self.mssql_conn
-            df = pd.read_sql(query, conn)
-            if sql_type == "SQLite":
-                conn.close()
-            self.log(f"Read {len(df)} rows from {sql_type}.")
-            self.root.after(0, lambda: self._update_progress(60))
-
-            # --- Write to CSV ---
-            df.to_csv(output_csv_path, index=False, encoding='utf-8-sig')
-            self.log(f"✅ Successfully exported {len(df)} rows to {output_csv_path}.")
-            self.root.after(0, lambda: self._update_progress(100))
-            self.root.after(0, lambda: messagebox.showinfo("Success", f"Data successfully exported to:\n{output_csv_path}"))
+        def work(reporter):
+            reporter.log(f"Connecting to the target MongoDB at {uri}...")
+            with closing(connect_mongo(uri)) as target_client:
+                engine.mongo_db_to_mongo(mongo_db, target_client[db_name], reporter, workers=workers,
+                                         relaxed_writes=relaxed_writes)
 
-        except Exception as e:
-            self.root.after(0, lambda: messagebox.showerror("Export Error", f"An error occurred during export: {e}"))
-            self.log(f"ERROR during SQL to CSV export: {e}")
+        self._run_conversion_in_thread(work, "Copy Error", "full MongoDB copy", "full MongoDB copy")
 
+    def export_sql_to_file(self):
+        """Asks for the output file (CSV, Parquet or Arrow) and starts the SQL export in a new thread."""
+        if not self._check_sql_connection():
+            return
+        source = self._selected_sql_source("Please enter a custom query to export.", "Please select a table to export.")
+        if source is None:
+            return
+        table_name, query = source
 
-        # --- Finalization ---
-        self.root.after(0, self._stop_progress)
-        self.root.after(0, lambda: self._toggle_buttons(True))
+        output_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=export_file_types('sql'),
+                                                   initialfile=f"{table_name or 'custom_query'}.csv")
+        if not output_path:
+            self.log("Export cancelled by user.")
+            return
 
-    def export_mongo_to_csv(self):
-        """Starts the MongoDB to CSV export in a new thread."""
-        # This is very similar to the beginning of _worker_mongo_to_sql
-        # We can reuse the same logic for fetching and normalizing data
-        # The only difference is the final output step.
-        # For simplicity, we'll create a dedicated worker.
-        self._run_conversion_in_thread(self._worker_export_mongo_to_csv)
+        sql = self._sql_settings()
+        self._run_conversion_in_thread(
+            lambda reporter: engine.export_sql_to_file(sql, reporter, output_path, table=table_name, query=query),
+            "Export Error", "export", "SQL export")
 
-    def _worker_export_mongo_to_csv(self):
-        """The actual worker for exporting MongoDB data to a CSV file."""
+    def export_mongo_to_file(self):
+        """Asks for the output file (CSV, JSON Lines or BSON) and starts the MongoDB export in a new thread."""
         collection_name = self.combo_mongo_collections.get()
-        db_name = self.mongo_db_name.get()
-
-        # --- Input Validation ---
-        if not self.mongo_client:
-            self.root.after(0, lambda: messagebox.showwarning("Not Connected", "Please connect to MongoDB first."))
-        elif not collection_name:
-            self.root.after(0, lambda: messagebox.showwarning("Input Missing", "Please select a MongoDB collection to export."))
-        else:
-            try:
-                # --- Ask for output file path in main thread ---
-                confirm_event = threading.Event()
-                file_path_var = tk.StringVar()
-                def ask_path():
-                    path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")], initialfile=f"{collection_name}.csv")
-                    file_path_var.set(path)
-                    confirm_event.set()
-                self.root.after(0, ask_path)
-                confirm_event.wait()
-                output_csv_path = file_path_var.get()
-
-                if not output_csv_path:
-                    self.log("Export cancelled by user.")
-                    return
-
-                self.log(f"Starting export: MongoDB collection '{collection_name}' to {output_csv_path}...")
-                self.root.after(0, lambda: self._update_progress(25))
+        if not self._check_mongo_connection():
+            return
+        if not collection_name:
+            messagebox.showwarning("Input Missing", "Please select a MongoDB collection to export.")
+            return
 
-                # --- Read Data from MongoDB ---
-                db = self.mongo_client[db_name]
-                cursor = db[collection_name].find()
-                data = list(cursor)
+        output_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=export_file_types('mongo'),
+                                                   initialfile=f"{collection_name}.csv")
+        if not output_path:
+            self.log("Export cancelled by user.")
+            return
 
-                if not data:
-                    self.log("Warning: Collection is empty. Nothing to export.")
-                    self.root.after(0, lambda: messagebox.showinfo("Complete", "The MongoDB collection is empty. No data was exported."))
-                    return
+        mongo_db = self.mongo_client[self.mongo_db_name.get()]
+        fields = [f.strip() for f in self.mongo_export_fields.get().split(',') if f.strip()]
+        workers = self._get_parallel_workers()
+        self._run_conversion_in_thread(
+            lambda reporter: engine.export_mongo_to_file(mongo_db, reporter, collection_name, output_path, fields=fields,
+                                                         workers=workers),
+            "Export Error", "export", "MongoDB export")
+
+    def import_files_to_sql(self):
+        """Asks for the files to load and imports them into the selected SQL database in a new thread."""
+        if not self._check_sql_connection():
+            return
+        paths = filedialog.askopenfilenames(title="Select files to import", filetypes=IMPORT_FILE_TYPES)
+        if not paths:
+            self.log("Import cancelled by user.")
+            return
 
-                self.log(f"Read {len(data)} documents from collection '{collection_name}'.")
-                self.root.after(0, lambda: self._update_progress(50))
-
-                # --- Normalize data and write to CSV ---
-                df = pd.json_normalize(data, sep='_')
-                if '_id' in df.columns:
-                    df['_id'] = df['_id'].astype(str) # Convert ObjectId to string
-
-                for col in df.columns:
-                    if df[col].apply(lambda x: isinstance(x, list)).any():
-                        def json_converter(o):
-                            if hasattr(o, 'isoformat'):
-                                return o.isoformat()
-                            raise TypeError(f"Object of type {o.__class__.__name__} is not JSON serializable")
-                        df[col] = df[col].apply(lambda x: json.dumps(x) if isinstance(x, list) else x)
-                
-                self.root.after(0, lambda: self._update_progress(75))
-                df.to_csv(output_csv_path, index=False, encoding='utf-8-sig')
-                self.log(f"✅ Successfully exported {len(df)} rows to {output_csv_path}.")
-                self.root.after(0, lambda: self._update_progress(100))
-                self.root.after(0, lambda: messagebox.showinfo("Success", f"Data successfully exported to:\n{output_csv_path}"))
+        sql = self._sql_settings()
+        workers = self._get_parallel_workers()
+        self._run_conversion_in_thread(
+            lambda reporter: engine.import_files_to_sql(sql, reporter, list(paths), workers=workers),
+            "Import Error", "import", "file import into SQL")
 
-            except Exception as e:
-                self.root.after(0, lambda: messagebox.showerror("Export Error", f"An error occurred during export: {e}"))
-                self.log(f"ERROR during MongoDB to CSV export: {e}")
+    def import_files_to_mongo(self):
+        """Asks for the files to load and imports them into the selected MongoDB database in a new thread."""
+        if not self._check_mongo_connection():
+            return
+        paths = filedialog.askopenfilenames(title="Select files to import", filetypes=IMPORT_FILE_TYPES)
+        if not paths:
+            self.log("Import cancelled by user.")
+            return
 
-        # --- Finalization ---
-        self.root.after(0, self._stop_progress)
-        self.root.after(0, lambda: self._toggle_buttons(True))
+        mongo_db = self.mongo_client[self.mongo_db_name.get()]
+        relaxed_writes = self.relaxed_write_concern.get()
+        native_datetimes = self.native_datetimes.get()
+        workers = self._get_parallel_workers()
+        self._run_conversion_in_thread(
+            lambda reporter: engine.import_files_to_mongo(mongo_db, reporter, list(paths), workers=workers,
+                                                          relaxed_writes=relaxed_writes, native_datetimes=native_datetimes),
+            "Import Error", "import", "file import into MongoDB")
 
 
 if __name__ == "__main__":
     app_root = ctk.CTk()
     app = SQLNoSQLConverterApp(app_root)
     app_root.mainloop()
+    sql_connections.dispose() # Close the pooled SQL connections
@@ -0,0 +1,25 @@
+import pytest
+
+from converter.engine import Reporter
+
+
+@pytest.fixture(autouse=True)
+def _work_in_tmp_path(tmp_path, monkeypatch):
+    """Runs each test in a directory of its own, where operations put their default output and state files."""
+    monkeypatch.chdir(tmp_path)
+
+
+@pytest.fixture
+def reporter():
+    """Answers every question with yes, like the CLI's --yes."""
+    return Reporter(assume_yes=True)
+
+
+@pytest.fixture
+def mongo_client(monkeypatch):
+    """An in-memory MongoDB, for the operations that read or write collections."""
+    mongomock = pytest.importorskip('mongomock')
+    builder = mongomock.collection.BulkOperationBuilder
+    add_update = builder.add_update # Newer pymongo passes the sort of UpdateOne, which mongomock doesn't take
+    monkeypatch.setattr(builder, 'add_update', lambda self, *args, sort=None, **kwargs: add_update(self, *args, **kwargs))
+    return mongomock.MongoClient()
@@ -0,0 +1,47 @@
+import datetime
+import os
+from decimal import Decimal
+
+from bson import ObjectId
+
+from converter.checkpoint import CheckpointStore
+
+
+def test_save_get_and_clear(tmp_path):
+    path = tmp_path / 'checkpoints.json'
+    store = CheckpointStore(str(path))
+    assert store.get('job') is None
+    store.save('job', 42, 1000)
+    assert store.get('job') == (42, 1000)
+    store.save('job', 84, 2000)
+    assert store.get('job') == (84, 2000)
+    store.clear('job')
+    assert store.get('job') is None
+    assert not os.path.exists(path) # Removed once no transfer is unfinished
+
+
+def test_jobs_are_kept_apart(tmp_path):
+    store = CheckpointStore(str(tmp_path / 'checkpoints.json'))
+    store.save('a', 1, 10)
+    store.save('b', 'x', 20)
+    store.clear('a')
+    assert store.get('a') is None
+    assert store.get('b') == ('x', 20)
+
+
+def test_keys_keep_their_type(tmp_path):
+    store = CheckpointStore(str(tmp_path / 'checkpoints.json'))
+    oid = ObjectId()
+    when = datetime.datetime(2024, 5, 1, 12, 30)
+    store.save('oid', oid, 1)
+    store.save('date', when, 1)
+    store.save('ranges', {'splits': [10, 20], 'last': [5, None, 25]}, 3)
+    assert store.get('oid') == (oid, 1)
+    assert store.get('date')[0].replace(tzinfo=None) == when
+    assert store.get('ranges') == ({'splits': [10, 20], 'last': [5, None, 25]}, 3)
+
+
+def test_unencodable_keys_are_stored_as_text(tmp_path):
+    store = CheckpointStore(str(tmp_path / 'checkpoints.json'))
+    store.save('job', Decimal('1.50'), 7)
+    assert store.get('job') == ('1.50', 7)
@@ -0,0 +1,355 @@
+import datetime
+import gzip
+import io
+import json
+import sqlite3
+from contextlib import closing
+from decimal import Decimal
+
+import pytest
+from pymongo import MongoClient
+
+from converter import engine
+from converter.cli import _job_from_args, build_parser
+from converter.engine import (Reporter, _check_distinct_mongo_target, _checkpointable_key, _key_ranges,
+                              export_mongo_to_file, export_sql_to_file, import_files_to_mongo, import_files_to_sql,
+                              mongo_to_mongo, mongo_to_sql, sql_db_to_mongo, sql_to_mongo, sql_to_sql,
+                              sync_mongo_to_sql, sync_sql_to_mongo)
+from converter.mongo import MONGO_FETCH_BATCH_SIZE
+from converter.sql import SQLBatchWriter, SQLSettings
+
+
+def _sqlite_db(path, table_ddl, rows=()):
+    """Creates a SQLite database with one table, e.g. 'orders (id INTEGER PRIMARY KEY)', and returns its settings."""
+    with closing(sqlite3.connect(path)) as conn, conn:
+        conn.execute(f"CREATE TABLE {table_ddl}")
+        if rows:
+            conn.executemany(f"INSERT INTO {table_ddl.split()[0]} VALUES ({', '.join('?' * len(rows[0]))})", rows)
+    return SQLSettings('SQLite', sqlite_path=str(path))
+
+
+def _rows(path, query):
+    with closing(sqlite3.connect(path)) as conn:
+        return conn.execute(query).fetchall()
+
+
+def test_sql_table_to_mongo(tmp_path, reporter, mongo_client):
+    sql = _sqlite_db(tmp_path / 'shop.db', 'orders (id INTEGER PRIMARY KEY, name TEXT, total REAL)',
+                     [(i, f'order {i}', i * 1.5) for i in range(1, 251)])
+    db = mongo_client['shop']
+    assert sql_to_mongo(sql, db, reporter, table='orders') == 250
+    assert db['orders'].count_documents({}) == 250
+    assert db['orders'].find_one({'id': 7}, projection={'_id': 0}) == {'id': 7, 'name': 'order 7', 'total': 10.5}
+
+
+def test_sql_database_to_mongo_overwrites_collections(tmp_path, reporter, mongo_client):
+    sql = _sqlite_db(tmp_path / 'shop.db', 'orders (id INTEGER PRIMARY KEY, name TEXT)', [(1, 'a'), (2, 'b')])
+    with closing(sqlite3.connect(sql.sqlite_path)) as conn, conn:
+        conn.execute("CREATE TABLE returns (id INTEGER PRIMARY KEY)")
+    db = mongo_client['shop']
+    db['orders'].insert_one({'id': 9, 'name': 'old'})
+    db['returns'].insert_one({'id': 9})
+    summary = sql_db_to_mongo(sql, db, reporter, workers=2)
+    assert summary.converted == 1 and not summary.failed
+    assert sorted(doc['id'] for doc in db['orders'].find()) == [1, 2]
+    assert db['returns'].count_documents({}) == 0 # The table is empty now
+
+
+def test_mongo_collection_to_sqlite(tmp_path, reporter, mongo_client):
+    db = mongo_client['shop']
+    db['orders'].insert_many([{'_id': i, 'customer': {'name': f'c{i}'}, 'tags': ['a']} for i in range(1, 101)])
+    output = tmp_path / 'orders.db'
+    assert mongo_to_sql(db, SQLSettings('SQLite'), reporter, 'orders', output=str(output)) == 100
+    assert _rows(output, "SELECT COUNT(*) FROM orders") == [(100,)]
+    assert _rows(output, "SELECT _id, customer_name, tags FROM orders WHERE _id = 3") == [(3, 'c3', '["a"]')]
+
+
+def test_mongo_to_sql_resumes_from_its_checkpoint(tmp_path, reporter, mongo_client, monkeypatch):
+    db = mongo_client['shop']
+    total = MONGO_FETCH_BATCH_SIZE * 2 + 10
+    db['events'].insert_many([{'_id': i, 'n': i} for i in range(total)])
+    write = SQLBatchWriter.write
+
+    def fail_on_the_third_page(self, df):
+        if self.rows_written == MONGO_FETCH_BATCH_SIZE * 2:
+            raise RuntimeError("connection lost")
+        return write(self, df)
+
+    output = str(tmp_path / 'events.db')
+    monkeypatch.setattr(SQLBatchWriter, 'write', fail_on_the_third_page)
+    with pytest.raises(RuntimeError):
+        mongo_to_sql(db, SQLSettings('SQLite'), reporter, 'events', output=output)
+    monkeypatch.setattr(SQLBatchWriter, 'write', write)
+    mongo_to_sql(db, SQLSettings('SQLite'), reporter, 'events', output=output)
+    assert _rows(output, "SELECT COUNT(*), COUNT(DISTINCT _id) FROM events") == [(total, total)]
+
+
+def test_sync_sql_to_mongo_upserts_changed_rows(tmp_path, reporter, mongo_client):
+    path = tmp_path / 'shop.db'
+    sql = _sqlite_db(path, 'items (id INTEGER PRIMARY KEY, name TEXT, updated INTEGER)', [(1, 'a', 1), (2, 'b', 1)])
+    db = mongo_client['shop']
+    assert sync_sql_to_mongo(sql, db, reporter, 'items', watermark='updated') == 2
+    with closing(sqlite3.connect(path)) as conn, conn:
+        conn.execute("UPDATE items SET name = 'B', updated = 2 WHERE id = 2")
+        conn.execute("INSERT INTO items VALUES (3, 'c', 2)")
+    sync_sql_to_mongo(sql, db, reporter, 'items', watermark='updated')
+    docs = db['items'].find(projection={'_id': 0}).sort('id')
+    assert [(doc['id'], doc['name']) for doc in docs] == [(1, 'a'), (2, 'B'), (3, 'c')]
+
+
+def test_sync_sql_to_mongo_needs_unique_keys(tmp_path, reporter, mongo_client):
+    sql = _sqlite_db(tmp_path / 'shop.db', 'items (id INTEGER PRIMARY KEY, name TEXT)', [(1, 'a')])
+    db = mongo_client['shop']
+    db['items'].insert_many([{'id': 1, 'name': 'a'}, {'id': 1, 'name': 'copy'}])
+    with pytest.raises(ValueError, match="unique index on 'id'"):
+        sync_sql_to_mongo(sql, db, reporter, 'items')
+    assert sync_sql_to_mongo(sql, mongo_client['other'], reporter, 'items') == 1
+    assert any(index.get('unique') for index in mongo_client['other']['items'].index_information().values())
+
+
+def test_sync_mongo_to_sql_upserts_changed_documents(tmp_path, reporter, mongo_client):
+    db = mongo_client['shop']
+    db['items'].insert_many([{'_id': 1, 'name': 'a', 'updated': 1}, {'_id': 2, 'name': 'b', 'updated': 1}])
+    output = str(tmp_path / 'items.db')
+    assert sync_mongo_to_sql(db, SQLSettings('SQLite'), reporter, 'items', watermark='updated', output=output) == 2
+    db['items'].update_one({'_id': 2}, {'$set': {'name': 'B', 'updated': 2}})
+    db['items'].insert_one({'_id': 3, 'name': 'c', 'updated': 2})
+    sync_mongo_to_sql(db, SQLSettings('SQLite'), reporter, 'items', watermark='updated', output=output)
+    assert _rows(output, "SELECT _id, name FROM items ORDER BY _id") == [(1, 'a'), (2, 'B'), (3, 'c')]
+
+
+def test_key_ranges():
+    assert _key_ranges([25, 50]) == [(None, 25), (24, 50), (49, None)]
+    assert _key_ranges([25, 50], [10, None, 70]) == [(10, 25), (24, 50), (70, None)]
+
+
+def test_table_is_read_in_parallel_key_ranges(tmp_path, reporter, mongo_client):
+    sql = _sqlite_db(tmp_path / 'shop.db', 'orders (id INTEGER PRIMARY KEY, name TEXT)',
+                     [(i, f'order {i}') for i in range(1, 1001)])
+    db = mongo_client['shop']
+    assert sql_to_mongo(sql, db, reporter, table='orders', workers=4) == 1000
+    assert sorted(doc['id'] for doc in db['orders'].find()) == list(range(1, 1001))
+
+
+def test_collection_is_read_in_parallel_id_ranges(tmp_path, reporter, mongo_client):
+    db = mongo_client['shop']
+    db['orders'].insert_many([{'_id': i, 'n': i} for i in range(1000)])
+    output = tmp_path / 'orders.db'
+    assert mongo_to_sql(db, SQLSettings('SQLite'), reporter, 'orders', output=str(output), workers=4) == 1000
+    assert _rows(output, "SELECT COUNT(*), COUNT(DISTINCT _id), SUM(n) FROM orders") == [(1000, 1000, sum(range(1000)))]
+
+
+def test_mongo_to_sql_declares_sampled_column_types(tmp_path, reporter, mongo_client):
+    db = mongo_client['shop']
+    db['orders'].insert_many([{'_id': 1, 'qty': 2, 'price': 1.5, 'paid': True},
+                              {'_id': 2, 'qty': None, 'note': 'late'}])
+    output = tmp_path / 'orders.db'
+    mongo_to_sql(db, SQLSettings('SQLite'), reporter, 'orders', output=str(output))
+    columns = {name: declared for _, name, declared, *_ in _rows(output, "PRAGMA table_info(orders)")}
+    assert columns == {'_id': 'INTEGER', 'qty': 'INTEGER', 'price': 'REAL', 'paid': 'INTEGER', 'note': 'TEXT'}
+    assert _rows(output, "SELECT qty, note FROM orders ORDER BY _id") == [(2, None), (None, 'late')]
+
+
+def test_sql_indexes_are_built_on_the_collection(tmp_path, reporter, mongo_client):
+    path = tmp_path / 'shop.db'
+    sql = _sqlite_db(path, 'orders (id INTEGER PRIMARY KEY, sku TEXT, placed INTEGER)', [(1, 'a', 5), (2, 'b', 6)])
+    with closing(sqlite3.connect(path)) as conn, conn:
+        conn.execute("CREATE UNIQUE INDEX ux_sku ON orders (sku)")
+        conn.execute("CREATE INDEX ix_placed ON orders (placed)")
+    db = mongo_client['shop']
+    sql_to_mongo(sql, db, reporter, table='orders')
+    keys = {tuple(info['key']): bool(info.get('unique')) for info in db['orders'].index_information().values()}
+    assert keys == {(('_id', 1),): False, (('id', 1),): True, (('sku', 1),): True, (('placed', 1),): False}
+
+
+def test_collection_indexes_are_built_on_the_table(tmp_path, reporter, mongo_client):
+    db = mongo_client['shop']
+    db['orders'].insert_many([{'_id': i, 'customer': {'email': f'{i}@x'}, 'placed': i % 3} for i in range(10)])
+    db['orders'].create_index('customer.email', unique=True)
+    db['orders'].create_index([('placed', -1)])
+    output = tmp_path / 'orders.db'
+    mongo_to_sql(db, SQLSettings('SQLite'), reporter, 'orders', output=str(output))
+    indexes = {name: unique for _, name, unique, *_ in _rows(output, "PRAGMA index_list(orders)")}
+    assert indexes == {'ux_orders__id': 1, 'ux_orders_customer_email': 1, 'ix_orders_placed': 0}
+
+
+def test_sql_exports_follow_the_extension(tmp_path, reporter):
+    feather = pytest.importorskip('pyarrow.feather')
+    parquet = pytest.importorskip('pyarrow.parquet')
+    sql = _sqlite_db(tmp_path / 'shop.db', 'orders (id INTEGER PRIMARY KEY, name TEXT)', [(1, 'a'), (2, None)])
+    for name in ('orders.parquet', 'orders.arrow', 'orders.csv.gz'):
+        assert export_sql_to_file(sql, reporter, str(tmp_path / name), table='orders') == 2
+    expected = {'id': [1, 2], 'name': ['a', None]}
+    assert parquet.read_table(tmp_path / 'orders.parquet').to_pydict() == expected
+    assert feather.read_table(tmp_path / 'orders.arrow').to_pydict() == expected
+    with gzip.open(tmp_path / 'orders.csv.gz', 'rt', encoding='utf-8-sig') as f:
+        assert f.read().splitlines() == ['id,name', '1,a', '2,']
+
+
+def test_mongo_export_to_json_lines(tmp_path, reporter, mongo_client):
+    db = mongo_client['shop']
+    db['orders'].insert_many([{'_id': 1, 'items': [{'sku': 'a'}]}, {'_id': 2, 'note': 'x'}])
+    output = tmp_path / 'orders.jsonl'
+    assert export_mongo_to_file(db, reporter, 'orders', str(output)) == 2
+    with open(output, encoding='utf-8') as f:
+        assert [json.loads(line) for line in f] == [{'_id': 1, 'items': [{'sku': 'a'}]}, {'_id': 2, 'note': 'x'}]
+
+
+def test_sql_export_import_round_trip(tmp_path, reporter):
+    rows = [(i, f'name {i}', i / 4) for i in range(1, 101)]
+    sql = _sqlite_db(tmp_path / 'shop.db', 'orders (id INTEGER PRIMARY KEY, name TEXT, score REAL)', rows)
+    paths = [str(tmp_path / name) for name in ('orders.csv.gz', 'orders.parquet', 'orders.arrow')]
+    for path in paths:
+        export_sql_to_file(sql, reporter, path, table='orders')
+    output = tmp_path / 'copy.db'
+    for path, table in zip(paths, ('from_csv', 'from_parquet', 'from_arrow')):
+        summary = import_files_to_sql(SQLSettings('SQLite'), reporter, [path], table=table, output=str(output))
+        assert summary.converted == 1 and not summary.failed
+        assert _rows(output, f"SELECT id, name, score FROM {table} ORDER BY id") == rows
+
+
+def test_mongo_export_import_round_trip(tmp_path, reporter, mongo_client):
+    db = mongo_client['shop']
+    docs = [{'_id': i, 'name': f'n{i}', 'items': [{'sku': 'a', 'qty': i}]} for i in range(50)]
+    db['orders'].insert_many(docs)
+    path = str(tmp_path / 'orders.jsonl')
+    export_mongo_to_file(db, reporter, 'orders', path)
+    summary = import_files_to_mongo(mongo_client['backup'], reporter, [path])
+    assert summary.converted == 1 and not summary.failed
+    assert list(mongo_client['backup']['orders'].find().sort('_id')) == docs
+
+
+def test_jsonl_import_into_sql_flattens_documents(tmp_path, reporter):
+    path = tmp_path / 'events.jsonl'
+    path.write_text('{"id": 1, "user": {"name": "a"}}\n{"id": 2, "user": {"name": "b"}, "tags": [1]}\n', encoding='utf-8')
+    output = tmp_path / 'events.db'
+    import_files_to_sql(SQLSettings('SQLite'), reporter, [str(path)], output=str(output))
+    assert _rows(output, "SELECT id, user_name, tags FROM events ORDER BY id") == [(1, 'a', None), (2, 'b', '[1]')]
+
+
+def test_import_into_an_existing_sqlite_database_keeps_its_settings(tmp_path, reporter):
+    output = tmp_path / 'events.db'
+    with closing(sqlite3.connect(output)) as conn:
+        conn.execute("PRAGMA journal_mode = WAL")
+    path = tmp_path / 'events.csv'
+    path.write_text('id,name\n1,a\n', encoding='utf-8')
+    import_files_to_sql(SQLSettings('SQLite'), reporter, [str(path)], output=str(output))
+    assert _rows(output, "PRAGMA journal_mode") == [('wal',)]
+    assert _rows(output, "SELECT id, name FROM events") == [(1, 'a')]
+
+
+def test_sqlite_table_copy_keeps_rows_types_and_indexes(tmp_path, reporter):
+    path = tmp_path / 'shop.db'
+    rows = [(i, f'sku{i}', i * 0.5, b'\x00\x01', '2024-05-01') for i in range(1, 301)]
+    sql = _sqlite_db(path, 'orders (id INTEGER PRIMARY KEY, sku VARCHAR(20) NOT NULL, price REAL, data BLOB, placed DATE)',
+                     rows)
+    with closing(sqlite3.connect(path)) as conn, conn:
+        conn.execute("CREATE UNIQUE INDEX ux_sku ON orders (sku)")
+    target_path = tmp_path / 'copy.db'
+    target = SQLSettings('SQLite', sqlite_path=str(target_path))
+    assert sql_to_sql(sql, target, reporter, table='orders') == 300
+    assert _rows(target_path, "SELECT * FROM orders ORDER BY id") == rows
+    columns = {name: declared for _, name, declared, *_ in _rows(target_path, "PRAGMA table_info(orders)")}
+    assert columns == {'id': 'BIGINT', 'sku': 'VARCHAR(20)', 'price': 'FLOAT', 'data': 'BLOB', 'placed': 'DATE'}
+    indexes = {name: unique for _, name, unique, *_ in _rows(target_path, "PRAGMA index_list(orders)")}
+    assert indexes == {'ux_orders_id': 1, 'ux_orders_sku': 1}
+
+
+def test_query_copy_types_columns_from_the_rows(tmp_path, reporter):
+    sql = _sqlite_db(tmp_path / 'shop.db', 'orders (id INTEGER PRIMARY KEY, total REAL)', [(1, 2.5), (2, 4.0)])
+    target_path = tmp_path / 'copy.db'
+    target = SQLSettings('SQLite', sqlite_path=str(target_path))
+    assert sql_to_sql(sql, target, reporter, query="SELECT id, total * 2 AS doubled FROM orders",
+                      target_table='doubled') == 2
+    assert _rows(target_path, "SELECT * FROM doubled ORDER BY id") == [(1, 5.0), (2, 8.0)]
+
+
+def test_table_is_not_copied_onto_itself(tmp_path, reporter):
+    sql = _sqlite_db(tmp_path / 'shop.db', 'orders (id INTEGER PRIMARY KEY)', [(1,)])
+    with pytest.raises(ValueError, match="onto itself"):
+        sql_to_sql(sql, SQLSettings('SQLite', sqlite_path=str(tmp_path / 'shop.db')), reporter, table='orders')
+
+
+def test_collection_copy_keeps_documents_options_and_indexes(reporter, mongo_client, monkeypatch):
+    monkeypatch.setattr(engine, 'raw_bson_collection', lambda collection: collection) # mongomock can't return raw BSON
+    source = mongo_client['shop']
+    docs = [{'_id': i, 'sku': f's{i}', 'tags': ['a', i]} for i in range(100)]
+    source['orders'].insert_many(docs)
+    source['orders'].create_index('sku', unique=True, name='sku_unique')
+    target = mongo_client['backup']
+    assert mongo_to_mongo(source, target, reporter, 'orders', workers=3) == 100
+    assert list(target['orders'].find().sort('_id')) == docs
+    assert target['orders'].index_information()['sku_unique']['unique']
+
+
+def test_collection_is_not_copied_onto_itself(reporter, mongo_client):
+    with pytest.raises(ValueError, match="onto itself"):
+        mongo_to_mongo(mongo_client['shop'], mongo_client['shop'], reporter, 'orders')
+
+
+def test_normalized_collection_loads_into_linked_tables(tmp_path, reporter, mongo_client):
+    db = mongo_client['shop']
+    db['orders'].insert_many([
+        {'_id': i, 'status': 'new', 'items': [{'sku': f's{j}', 'parts': [{'p': k} for k in range(j)]} for j in range(i % 3)]}
+        for i in range(30)
+    ])
+    output = tmp_path / 'orders.db'
+    assert mongo_to_sql(db, SQLSettings('SQLite'), reporter, 'orders', output=str(output), normalize=True) == 30
+    assert _rows(output, "SELECT COUNT(*) FROM orders") == [(30,)]
+    assert _rows(output, "SELECT COUNT(*) FROM orders_items i JOIN orders o ON o._id = i.orders_id") == [(30,)]
+    assert _rows(output, "SELECT COUNT(*) FROM orders_items_parts p "
+                         "JOIN orders_items i USING (orders_id, items_index)") == [(10,)]
+    assert _rows(output, "SELECT orders_id, items_index, parts_index, p FROM orders_items_parts "
+                         "WHERE orders_id = 2") == [(2, 1, 0, 0)]
+
+
+def test_mixed_id_types_are_read_without_keyset_paging(tmp_path, reporter, mongo_client):
+    db = mongo_client['shop']
+    db['orders'].insert_many([{'_id': i, 'n': i} for i in range(5)] + [{'_id': f'k{i}', 'n': i} for i in range(5)])
+    output = tmp_path / 'orders.db'
+    assert mongo_to_sql(db, SQLSettings('SQLite'), reporter, 'orders', output=str(output)) == 10
+    assert _rows(output, "SELECT COUNT(DISTINCT _id) FROM orders") == [(10,)]
+
+
+def test_resume_is_answered_apart_from_overwrite():
+    assert Reporter(assume_yes=True).confirm_resume("Resume", "?")
+    assert not Reporter(assume_yes=True, resume=False).confirm_resume("Resume", "?")
+    assert Reporter(assume_yes=False, resume=True).confirm_resume("Resume", "?")
+    assert not Reporter(assume_yes=False, resume=True).confirm("Overwrite", "?")
+
+
+def test_cli_resume_options():
+    parser = build_parser()
+    args = ['mongo-to-sql', '--sql-type', 'sqlite', '--collection', 'orders']
+    assert 'resume' not in _job_from_args(parser.parse_args(args))
+    assert _job_from_args(parser.parse_args(args + ['--resume']))['resume'] is True
+    job = _job_from_args(parser.parse_args(args + ['--restart', '-y']))
+    assert job['resume'] is False and job['overwrite']
+
+
+def test_only_unconverted_keys_are_checkpointed():
+    assert _checkpointable_key(1)
+    assert _checkpointable_key('a')
+    assert not _checkpointable_key(True)
+    assert not _checkpointable_key(1.5)
+    assert not _checkpointable_key(Decimal('1'))
+    assert not _checkpointable_key(datetime.date(2024, 1, 1))
+
+
+def test_float_keys_are_transferred_without_checkpoints(tmp_path, mongo_client, monkeypatch):
+    sql = _sqlite_db(tmp_path / 'shop.db', 'prices (price REAL PRIMARY KEY, name TEXT)',
+                     [(i + 0.5, f'p{i}') for i in range(10)])
+    log = io.StringIO()
+    monkeypatch.setattr(engine, 'iter_sql_keyset_chunks', None) # Streamed in one query, as no checkpoint is kept
+    assert sql_to_mongo(sql, mongo_client['shop'], Reporter(assume_yes=True, stream=log), table='prices') == 10
+    assert "can't be resumed" in log.getvalue()
+
+
+def test_clusters_are_told_apart_by_their_servers():
+    def database(hosts):
+        return MongoClient(hosts, connect=False)['shop']
+
+    with pytest.raises(ValueError):
+        _check_distinct_mongo_target(database(['a:27017', 'b:27017']), database('mongodb://b:27017'), [('x', 'x')])
+    _check_distinct_mongo_target(database('mongodb://a:27017'), database('mongodb://c:27017'), [('x', 'x')])
+    _check_distinct_mongo_target(database('mongodb://a:27017'), database('mongodb://a:27017'), [('x', 'y')])
@@ -0,0 +1,156 @@
+import json
+
+import pytest
+from bson import ObjectId
+
+from converter.mongo import (DocumentFlattener, DocumentNormalizer, iter_mongo_partitions, mongo_id_keyset_safe,
+                             mongo_id_range, mongo_id_ranges)
+
+
+OID = ObjectId('65a1b2c3d4e5f60718293a4b')
+
+
+class _IdCollection:
+    """Answers the find_one(sort=...) calls that look up the lowest and highest _id."""
+
+    def __init__(self, ids):
+        self.ids = ids
+
+    def find_one(self, sort=None, projection=None):
+        if not self.ids:
+            return None
+        return {'_id': self.ids[0] if sort[0][1] > 0 else self.ids[-1]}
+
+
+def test_flatten_nested_documents():
+    df = DocumentFlattener().flatten([{'_id': OID, 'a': {'b': 1, 'c': {'d': 'x'}}}])
+    assert list(df.columns) == ['_id', 'a_b', 'a_c_d']
+    assert df.iloc[0].tolist() == [str(OID), 1, 'x']
+
+
+def test_flatten_encodes_lists_as_json():
+    df = DocumentFlattener().flatten([{'tags': ['x', 1], 'refs': [{'id': OID}]}])
+    assert json.loads(df['tags'][0]) == ['x', 1]
+    assert json.loads(df['refs'][0]) == [{'id': str(OID)}]
+
+
+def test_flatten_sanitizes_names_and_keeps_them_across_batches():
+    flattener = DocumentFlattener()
+    flattener.flatten([{'my field': 1}])
+    df = flattener.flatten([{'other': 2}, {'my field': 3}])
+    assert flattener.schema == {'my field': 'myfield', 'other': 'other'}
+    assert list(df.columns) == ['myfield', 'other'] # In first-seen order
+
+
+def test_flatten_keeps_nested_and_literal_paths_apart():
+    flattener = DocumentFlattener(sanitize_names=False)
+    df = flattener.flatten([{'a': {'b': 1}, 'a_b': 2}, {'a_b': 3}], dtype=object)
+    assert flattener.schema == {'a_b': 'a_b', 'a_b_2': 'a_b_2'}
+    assert df.to_dict('list') == {'a_b': [1, None], 'a_b_2': [2, 3]}
+
+
+def test_flatten_gives_names_that_collide_after_sanitizing_columns_of_their_own():
+    flattener = DocumentFlattener()
+    df = flattener.flatten([{'my field': 1, 'myfield': 2, 'Name': 3, 'name': 4}], dtype=object)
+    assert flattener.schema == {'my field': 'myfield', 'myfield': 'myfield_2', 'Name': 'Name', 'name': 'name_2'}
+    assert df.iloc[0].tolist() == [1, 2, 3, 4]
+    assert list(flattener.flatten([{'myfield': 5}]).columns) == ['myfield_2'] # Kept in later batches
+
+
+def test_flatten_object_dtype_keeps_python_types():
+    df = DocumentFlattener().flatten([{'n': 1}, {'n': None}], dtype=object)
+    assert df['n'].tolist() == [1, None]
+
+
+def test_flatten_hands_out_arrays_of_documents():
+    arrays = []
+    df = DocumentFlattener().flatten([{'a': 1, 'items': [{'x': 1}], 'empty': [], 'tags': ['t']}], arrays=arrays)
+    assert list(df.columns) == ['a', 'tags']
+    assert arrays == [(0, 'items', [{'x': 1}])]
+
+
+def test_normalize_splits_arrays_into_child_tables():
+    normalizer = DocumentNormalizer('orders')
+    tables = normalizer.normalize([
+        {'_id': OID, 'tags': ['x'], 'items': [{'sku': 'a', 'parts': [{'p': 1}, {'p': 2}]}, {'sku': 'b'}]},
+        {'_id': 2, 'items': []},
+    ])
+    assert list(tables) == ['orders', 'orders_items', 'orders_items_parts']
+    assert list(tables['orders'].columns) == ['_id', 'tags']
+    assert tables['orders']['_id'].tolist() == [str(OID), 2]
+    assert tables['orders_items'].to_dict('records') == [
+        {'orders_id': str(OID), 'items_index': 0, 'sku': 'a'},
+        {'orders_id': str(OID), 'items_index': 1, 'sku': 'b'},
+    ]
+    assert tables['orders_items_parts'].to_dict('records') == [
+        {'orders_id': str(OID), 'items_index': 0, 'parts_index': 0, 'p': 1},
+        {'orders_id': str(OID), 'items_index': 0, 'parts_index': 1, 'p': 2},
+    ]
+
+
+def test_normalize_records_keys_and_references():
+    normalizer = DocumentNormalizer('orders')
+    normalizer.normalize([{'_id': 1, 'items': [{'parts': [{'p': 1}]}]}])
+    assert normalizer.keys == {
+        'orders': ['_id'],
+        'orders_items': ['orders_id', 'items_index'],
+        'orders_items_parts': ['orders_id', 'items_index', 'parts_index'],
+    }
+    assert normalizer.references == {
+        'orders_items': ('orders', ['orders_id'], ['_id']),
+        'orders_items_parts': ('orders_items', ['orders_id', 'items_index'], ['orders_id', 'items_index']),
+    }
+
+
+def test_normalize_child_keys_match_their_parent_rows():
+    tables = DocumentNormalizer('orders').normalize([
+        {'_id': OID, 'items': [{'parts': [{'p': 1}]}, {'parts': [{'p': 2}, {'p': 3}]}]},
+        {'_id': 7, 'items': [{'parts': [{'p': 4}]}]},
+    ])
+    orders = set(tables['orders']['_id'])
+    items = set(zip(tables['orders_items']['orders_id'], tables['orders_items']['items_index']))
+    parts = tables['orders_items_parts']
+    assert {key for key, _ in items} == orders == {str(OID), 7}
+    assert set(zip(parts['orders_id'], parts['items_index'])) == items
+    assert parts[['orders_id', 'items_index', 'parts_index', 'p']].values.tolist() == \
+        [[str(OID), 0, 0, 1], [str(OID), 1, 0, 2], [str(OID), 1, 1, 3], [7, 0, 0, 4]]
+
+
+def test_normalize_keeps_the_parent_key_over_clashing_fields():
+    tables = DocumentNormalizer('orders').normalize([{'_id': 1, 'items': [{'orders_id': 'other', 'x': 1}]}])
+    assert tables['orders_items'].to_dict('records') == [{'orders_id': 1, 'items_index': 0, 'x': 1}]
+
+
+def test_normalize_keeps_document_ids_whole():
+    tables = DocumentNormalizer('orders').normalize([{'_id': {'region': 'eu', 'n': 1}, 'items': [{'x': 1}]}])
+    assert tables['orders'].to_dict('records') == [{'_id': '{"region": "eu", "n": 1}'}]
+    assert tables['orders_items'].to_dict('records') == \
+        [{'orders_id': '{"region": "eu", "n": 1}', 'items_index': 0, 'x': 1}]
+
+
+def test_mongo_id_range():
+    assert mongo_id_range() == {}
+    assert mongo_id_range(1, 5) == {'_id': {'$gt': 1, '$lte': 5}}
+    assert mongo_id_range(before=5) == {'_id': {'$lte': 5}}
+
+
+def test_mongo_id_ranges_continue_after_the_last_ids():
+    assert mongo_id_ranges([10, 20]) == [(None, 10), (10, 20), (20, None)]
+    assert mongo_id_ranges([10, 20], [4, None, 25]) == [(4, 10), (10, 20), (25, None)]
+
+
+def test_keyset_needs_ids_of_one_type():
+    assert mongo_id_keyset_safe(_IdCollection([]))
+    assert mongo_id_keyset_safe(_IdCollection([1, 2.5, 7]))
+    assert mongo_id_keyset_safe(_IdCollection([OID, ObjectId()]))
+    assert not mongo_id_keyset_safe(_IdCollection([1, 'a']))
+    assert not mongo_id_keyset_safe(_IdCollection([{'a': 1}, {'a': 2}]))
+
+
+def test_partition_readers_forward_base_exceptions():
+    class _Interrupted:
+        def find(self, *args, **kwargs):
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        list(iter_mongo_partitions(_Interrupted(), [(None, 10), (10, None)]))
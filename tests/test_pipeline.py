@@ -0,0 +1,63 @@
+import threading
+
+import pytest
+
+from converter.pipeline import iter_pipelined
+
+
+def test_stages_run_in_order():
+    assert list(iter_pipelined(range(10))) == list(range(10))
+    assert list(iter_pipelined(range(10), lambda x: x + 1, lambda x: x * 2)) == [(x + 1) * 2 for x in range(10)]
+
+
+def test_stages_run_on_their_own_threads():
+    main = threading.get_ident()
+    threads = list(iter_pipelined(range(3), lambda _: threading.get_ident()))
+    assert main not in threads
+
+
+def test_stage_error_is_raised_to_the_consumer():
+    def stage(x):
+        if x == 3:
+            raise ValueError("bad page")
+        return x
+
+    pages = iter_pipelined(range(10), stage)
+    assert [next(pages) for _ in range(3)] == [0, 1, 2]
+    with pytest.raises(ValueError, match="bad page"):
+        next(pages)
+
+
+def test_source_error_is_raised_to_the_consumer():
+    def source():
+        yield 1
+        raise RuntimeError("read failed")
+
+    with pytest.raises(RuntimeError, match="read failed"):
+        list(iter_pipelined(source(), lambda x: x))
+
+
+def test_stopping_early_closes_the_source():
+    closed = threading.Event()
+
+    def source():
+        try:
+            for x in range(1000):
+                yield x
+        finally:
+            closed.set()
+
+    pages = iter_pipelined(source(), lambda x: x, max_pending=1)
+    assert next(pages) == 0
+    pages.close()
+    assert closed.is_set()
+
+
+def test_base_exceptions_do_not_hang_the_consumer():
+    def stage(x):
+        if x == 2:
+            raise SystemExit("stage died")
+        return x
+
+    with pytest.raises(SystemExit):
+        list(iter_pipelined(range(5), stage))
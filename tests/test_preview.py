@@ -0,0 +1,46 @@
+import sqlite3
+import threading
+from contextlib import closing
+
+from converter.preview import PreviewPager, iter_sql_preview_pages, limit_sql_query
+from converter.sql import SQLSettings
+
+
+def _load_all(pager):
+    while True:
+        loaded = threading.Event()
+        if not pager.request_more(loaded.set):
+            return
+        loaded.wait(5)
+
+
+def test_limit_sql_query():
+    assert limit_sql_query("SELECT * FROM t;", "SQLite", 10) == "SELECT * FROM (SELECT * FROM t) AS preview_src LIMIT 10"
+    assert limit_sql_query("SELECT * FROM t", "SQL Server", 10) == "SELECT TOP 10 * FROM (SELECT * FROM t) AS preview_src"
+
+
+def test_pager_loads_pages_up_to_max_rows(tmp_path):
+    path = tmp_path / 'shop.db'
+    with closing(sqlite3.connect(path)) as conn, conn:
+        conn.execute("CREATE TABLE t (id INTEGER, name TEXT)")
+        conn.executemany("INSERT INTO t VALUES (?, ?)", [(i, f'n{i}') for i in range(25)])
+    sql = SQLSettings('SQLite', sqlite_path=str(path))
+    pager = PreviewPager(lambda: iter_sql_preview_pages(sql, "SELECT * FROM t", page_size=10, max_rows=20), max_rows=20)
+    loaded = threading.Event()
+    assert pager.request_more(loaded.set)
+    loaded.wait(5)
+    assert pager.columns == ['id', 'name'] and len(pager.rows) == 10 and not pager.exhausted
+    _load_all(pager)
+    assert pager.rows[-1] == (19, 'n19')
+    assert pager.exhausted and pager.truncated and pager.error is None
+    pager.close()
+
+
+def test_pager_keeps_the_error_of_a_page():
+    def pages():
+        yield from ()
+        raise RuntimeError("query failed")
+
+    pager = PreviewPager(pages)
+    _load_all(pager)
+    assert pager.exhausted and str(pager.error) == "query failed"
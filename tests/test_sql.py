@@ -0,0 +1,248 @@
+import sqlite3
+from contextlib import closing
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from converter.sql import (TEXT_COLUMN, ColumnType, IndexSpec, SQLBatchWriter, SQLRowWriter, SQLSettings,
+                           SingleWriterQueue, _sql_upsert_insert, infer_column_type, infer_sql_schema, key_range_splits,
+                           sanitize_sql_name, sql_connections, sql_key_bounds, sql_table_indexes, widen_column_type)
+
+
+def test_sanitize_sql_name():
+    assert sanitize_sql_name('my field') == 'myfield'
+    assert sanitize_sql_name('orders') == 'orders'
+
+
+def test_single_writer_queue_forwards_base_exceptions():
+    class _Exiting:
+        def write(self, df):
+            raise SystemExit
+
+    writer = SingleWriterQueue(lambda table: _Exiting(), max_pending=1)
+    with pytest.raises(SystemExit):
+        for _ in range(5): # More pages than the queue holds: none of them may block
+            writer.write('items', pd.DataFrame())
+        writer.close()
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    yield conn
+    conn.close()
+
+
+def test_upserts_update_existing_keys(conn):
+    writer = SQLBatchWriter(conn, "SQLite", 'items', upsert_key='id')
+    writer.write(pd.DataFrame({'id': [1, 2], 'name': ['a', 'b']}))
+    writer.write(pd.DataFrame({'id': [2, 3], 'name': ['B', 'c']}))
+    assert conn.execute("SELECT id, name FROM items ORDER BY id").fetchall() == [(1, 'a'), (2, 'B'), (3, 'c')]
+
+
+def test_upserts_resume_an_existing_table(conn):
+    SQLBatchWriter(conn, "SQLite", 'items').write(pd.DataFrame({'id': [1, 2], 'name': ['a', 'b']}))
+    writer = SQLBatchWriter(conn, "SQLite", 'items', if_exists='append', upsert_key='id')
+    writer.resume()
+    writer.write(pd.DataFrame({'id': [1], 'name': ['A']}))
+    assert conn.execute("SELECT id, name FROM items ORDER BY id").fetchall() == [(1, 'A'), (2, 'b')]
+
+
+def test_sql_server_upserts_leave_the_commit_to_their_transaction():
+    calls = []
+
+    class Cursor: # Like pyodbc's, which commits when used as a context manager
+        def executemany(self, statement, rows):
+            calls.append(rows)
+
+        def commit(self):
+            calls.append('commit')
+
+        def close(self):
+            calls.append('close')
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc_info):
+            self.commit()
+
+    dialect = SimpleNamespace(name='mssql', identifier_preparer=SimpleNamespace(quote=lambda name: f"[{name}]"))
+    conn = SimpleNamespace(dialect=dialect, connection=SimpleNamespace(cursor=Cursor))
+    _sql_upsert_insert('id')(SimpleNamespace(name='items'), conn, ['id', 'name'], iter([(1, 'a')]))
+    assert calls == [[(1, 'a')], 'close']
+
+
+def test_key_range_splits(conn):
+    conn.execute('CREATE TABLE t (id INTEGER PRIMARY KEY)')
+    conn.executemany('INSERT INTO t VALUES (?)', [(i,) for i in range(1, 101)])
+    assert key_range_splits(conn, "SQLite", 't', 'id', 4) == [26, 51, 76]
+    assert key_range_splits(conn, "SQLite", 't', 'id', 1) == []
+
+
+def test_key_range_splits_needs_an_integer_key(conn):
+    conn.execute('CREATE TABLE t (k TEXT PRIMARY KEY)')
+    assert key_range_splits(conn, "SQLite", 't', 'k', 4) is None # Empty
+    conn.executemany('INSERT INTO t VALUES (?)', [('a',), ('b',)])
+    assert key_range_splits(conn, "SQLite", 't', 'k', 4) is None
+
+
+def test_sql_key_bounds(conn):
+    conn.execute('CREATE TABLE t (k TEXT PRIMARY KEY) WITHOUT ROWID')
+    assert sql_key_bounds(conn, "SQLite", 't', 'k') == (None, None)
+    conn.executemany('INSERT INTO t VALUES (?)', [('b',), ('a',)])
+    assert sql_key_bounds(conn, "SQLite", 't', 'k') == ('a', 'b')
+    assert sql_key_bounds(conn, "SQLite", 't', 'rowid') is None
+
+
+def test_settings_of_one_database_share_a_pool(tmp_path):
+    path = str(tmp_path / 'shop.db')
+    sql = SQLSettings('SQLite', sqlite_path=path)
+    assert sql_connections.engine(sql) is sql_connections.engine(SQLSettings('SQLite', sqlite_path=path))
+    with closing(sql.connect()) as conn:
+        assert conn.execute("SELECT 1").fetchone() == (1,)
+    sql_connections.dispose(sql)
+
+
+def test_infer_column_type():
+    assert infer_column_type(pd.Series([True, False])) == ColumnType('boolean')
+    assert infer_column_type(pd.Series([1, 2])) == ColumnType('integer')
+    assert infer_column_type(pd.Series([1, 2**40])) == ColumnType('bigint')
+    assert infer_column_type(pd.Series([1.5, None])) == ColumnType('float')
+    assert infer_column_type(pd.Series(['ab', 'abcd'])) == ColumnType('varchar', 4)
+    assert infer_column_type(pd.Series([None, None], dtype=object)) == ColumnType('unknown')
+    assert infer_column_type(pd.Series([1, 'a'], dtype=object)) == TEXT_COLUMN
+
+
+def test_widen_new_columns():
+    assert widen_column_type(None, ColumnType('integer')) == ColumnType('integer')
+    assert widen_column_type(None, ColumnType('varchar', 10)) == ColumnType('varchar', 64) # Room for twice the length
+    assert widen_column_type(None, ColumnType('varchar', 5000)) == TEXT_COLUMN
+    assert widen_column_type(ColumnType('unknown'), ColumnType('float')) == ColumnType('float')
+
+
+def test_widen_known_columns():
+    assert widen_column_type(ColumnType('varchar', 64), ColumnType('varchar', 20)) == ColumnType('varchar', 64)
+    assert widen_column_type(ColumnType('varchar', 64), ColumnType('varchar', 100)) == ColumnType('varchar', 255)
+    assert widen_column_type(ColumnType('integer'), ColumnType('bigint')) == ColumnType('bigint')
+    assert widen_column_type(ColumnType('float'), ColumnType('integer')) == ColumnType('float')
+    assert widen_column_type(ColumnType('integer'), ColumnType('boolean')) == ColumnType('integer')
+    assert widen_column_type(ColumnType('integer'), ColumnType('unknown')) == ColumnType('integer')
+    assert widen_column_type(ColumnType('integer'), ColumnType('varchar', 3)) == TEXT_COLUMN
+    assert widen_column_type(ColumnType('datetime'), ColumnType('float')) == TEXT_COLUMN
+
+
+def test_infer_sql_schema():
+    df = pd.DataFrame({'id': [1, 2], 'name': ['a', None]}, dtype=object)
+    assert infer_sql_schema(df) == {'id': ColumnType('integer'), 'name': ColumnType('varchar', 64)}
+
+
+def test_table_is_declared_from_the_schema_and_first_page(conn):
+    writer = SQLBatchWriter(conn, "SQLite", 'orders', schema={'id': ColumnType('integer'), 'note': ColumnType('unknown')})
+    writer.write(pd.DataFrame({'id': [1.0, None], 'price': [1.5, 2.0]})) # pandas reads [1, None] as floats
+    declared = {name: column_type for _, name, column_type, *_ in conn.execute("PRAGMA table_info(orders)")}
+    assert declared == {'id': 'INTEGER', 'price': 'REAL', 'note': 'TEXT'}
+    assert conn.execute("SELECT id, typeof(id) FROM orders").fetchall() == [(1, 'integer'), (None, 'null')]
+
+
+def test_later_pages_add_and_widen_columns(conn):
+    writer = SQLBatchWriter(conn, "SQLite", 'orders')
+    writer.write(pd.DataFrame({'id': [1], 'code': ['ab']}))
+    assert writer.write(pd.DataFrame({'id': [2**40], 'code': ['x' * 100], 'qty': [3]})) == 2
+    assert writer.column_types == {'id': ColumnType('bigint'), 'code': ColumnType('varchar', 255),
+                                   'qty': ColumnType('integer')}
+    assert conn.execute("SELECT * FROM orders ORDER BY id").fetchall() == [(1, 'ab', None), (2**40, 'x' * 100, 3)]
+
+
+def test_widening_statements_of_server_databases():
+    sa = pytest.importorskip('sqlalchemy')
+    engine = sa.create_mock_engine('postgresql://', lambda *args, **kwargs: None)
+    writer = SQLBatchWriter(engine, "PostgreSQL", 'orders')
+    writer.columns = {'id', 'code'}
+    writer.column_types = {'id': ColumnType('integer'), 'code': ColumnType('varchar', 64)}
+    statements = writer._alter_table_statements(pd.DataFrame({'id': [2**40], 'code': ['x'], 'qty': [1.5]}))
+    assert statements == ['ALTER TABLE orders ALTER COLUMN id TYPE BIGINT USING id::BIGINT',
+                          'ALTER TABLE orders ADD COLUMN qty DOUBLE PRECISION']
+
+
+def test_indexes_are_built_after_the_load(conn):
+    writer = SQLBatchWriter(conn, "SQLite", 'orders')
+    writer.write(pd.DataFrame({'id': [1, 2], 'sku': ['a', 'a'], 'placed': [5, 6]}))
+    errors = writer.build_indexes([IndexSpec((('id', 1),), True), IndexSpec((('sku', 1),), True),
+                                   IndexSpec((('placed', -1),)), IndexSpec((('missing', 1),))])
+    assert len(errors) == 1 and 'non-unique' in errors[0] # The duplicate skus
+    indexes = {name: unique for _, name, unique, *_ in conn.execute("PRAGMA index_list(orders)")}
+    assert indexes == {'ux_orders_id': 1, 'ix_orders_sku': 0, 'ix_orders_placed': 0}
+
+
+def test_source_indexes_are_read_with_the_primary_key_first(tmp_path):
+    sa = pytest.importorskip('sqlalchemy')
+    path = tmp_path / 'shop.db'
+    with closing(sqlite3.connect(path)) as source, source:
+        source.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY, sku TEXT UNIQUE, placed INTEGER)")
+        source.execute("CREATE INDEX ix_placed ON orders (placed, sku)")
+    indexes = sql_table_indexes(sa.create_engine(f"sqlite:///{path}"), 'orders')
+    assert indexes == [IndexSpec((('id', 1),), True), IndexSpec((('sku', 1),), True),
+                       IndexSpec((('placed', 1), ('sku', 1)), False)]
+
+
+def test_row_writer_loads_row_tuples(tmp_path):
+    sa = pytest.importorskip('sqlalchemy')
+    path = tmp_path / 'copy.db'
+    writer = SQLRowWriter(SQLSettings('SQLite', sqlite_path=str(path)), 'items')
+    writer.create({'id': sa.BigInteger(), 'data': sa.LargeBinary(), 'meta': sa.Text()})
+    try:
+        writer.write([(1, memoryview(b'ab'), {'a': 1})])
+        assert writer.write([(2, None, None), (3, bytearray(b'c'), [1])]) == 3
+    finally:
+        writer.close()
+    with closing(sqlite3.connect(path)) as target:
+        assert target.execute("SELECT * FROM items ORDER BY id").fetchall() == \
+            [(1, b'ab', '{"a": 1}'), (2, None, None), (3, b'c', '[1]')]
+
+
+def test_row_writer_keeps_the_settings_of_an_existing_sqlite_database(tmp_path):
+    sa = pytest.importorskip('sqlalchemy')
+    path = tmp_path / 'copy.db'
+    with closing(sqlite3.connect(path)) as target:
+        target.execute("PRAGMA journal_mode = WAL")
+    writer = SQLRowWriter(SQLSettings('SQLite', sqlite_path=str(path)), 'items')
+    writer.create({'id': sa.Integer()})
+    try:
+        writer.write([(1,)])
+    finally:
+        writer.close()
+    with closing(sqlite3.connect(path)) as target:
+        assert target.execute("PRAGMA journal_mode").fetchone() == ('wal',)
+        assert target.execute("SELECT id FROM items").fetchall() == [(1,)]
+
+
+def test_foreign_keys_are_declared_on_server_databases():
+    sa = pytest.importorskip('sqlalchemy')
+    statements = []
+
+    class Target: # Records the statements of the engine's transactions
+        dialect = sa.create_mock_engine('postgresql://', None).dialect
+
+        def begin(self):
+            return closing(self)
+
+        def execute(self, statement):
+            statements.append(str(statement))
+
+        def close(self):
+            pass
+
+    writer = SQLBatchWriter(Target(), "PostgreSQL", 'orders_items')
+    writer.columns = {'orders_id', 'items_index'}
+    writer.add_foreign_key(['orders_id'], 'orders', ['_id'])
+    assert statements == ['ALTER TABLE orders_items ADD CONSTRAINT fk_orders_items_orders_id '
+                          'FOREIGN KEY (orders_id) REFERENCES orders (_id)']
+
+
+def test_foreign_keys_are_skipped_on_sqlite(conn):
+    writer = SQLBatchWriter(conn, "SQLite", 'orders_items')
+    writer.write(pd.DataFrame({'orders_id': [1]}))
+    writer.add_foreign_key(['orders_id'], 'orders', ['_id'])
+    assert conn.execute("PRAGMA foreign_key_list(orders_items)").fetchall() == []